@@ -0,0 +1,47 @@
+"""
+Measures how the time of evaluating DTLZ and C-DTLZ problems grows with the number of objectives. The objectives are
+derived from cumulative products - the time of the values (F) should grow linearly with n_obj and the one of the
+jacobian (F and dF) with the size of the matrix.
+
+    python benchmarks/dtlz_scaling.py
+
+"""
+import timeit
+import warnings
+
+import numpy as np
+
+from pymop.factory import get_problem
+
+warnings.simplefilter("ignore")
+
+PROBLEMS = ["dtlz1", "dtlz2", "dtlz5", "c2dtlz2", "c3dtlz4"]
+
+N_OBJ = [3, 5, 8, 10, 15]
+
+
+def benchmark(name, n_obj, return_values_of, n_rows=1000, number=20):
+    # the fused kernels are not compared here - only the vectorized implementation
+    problem = get_problem(name, n_var=n_obj + 9, n_obj=n_obj, kernels="numpy")
+
+    if problem.n_constr > 0:
+        return_values_of = return_values_of + ["G"] + (["dG"] if "dF" in return_values_of else [])
+
+    X = np.random.random((n_rows, problem.n_var))
+    return min(timeit.repeat(lambda: problem.evaluate(X, return_values_of=return_values_of),
+                             number=number, repeat=3)) / number
+
+
+if __name__ == "__main__":
+
+    print("%-8s %6s %12s %8s %12s %8s" % ("problem", "n_obj", "F", "growth", "F, dF", "growth"))
+
+    for name in PROBLEMS:
+        base = None
+        for n_obj in N_OBJ:
+            t = benchmark(name, n_obj, ["F"]), benchmark(name, n_obj, ["F", "dF"])
+            if base is None:
+                base = t
+
+            print("%-8s %6s %10.1fus %7.2fx %10.1fus %7.2fx" % (name, n_obj, 1e6 * t[0], t[0] / base[0],
+                                                                1e6 * t[1], t[1] / base[1]))
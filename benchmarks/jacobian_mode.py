@@ -0,0 +1,58 @@
+"""
+Compares the time to calculate the jacobian matrices (dF and dG) in forward and reverse mode for the problems of
+the built-in test suites. The crossover is expected where the number of variables equals the number of outputs:
+forward mode runs the problem once for each variable, reverse mode one backward pass for each output.
+
+    python benchmarks/jacobian_mode.py
+
+"""
+import timeit
+import warnings
+
+import numpy as np
+
+from pymop.factory import get_problem
+from pymop.gradient import calc_jacobian_mode
+
+warnings.simplefilter("ignore")
+
+PROBLEMS = [
+    ("zdt1", {"n_var": 30}), ("zdt1", {"n_var": 2}),
+    ("dtlz2", {"n_var": 12, "n_obj": 3}), ("dtlz2", {"n_var": 4, "n_obj": 3}), ("dtlz2", {"n_var": 5, "n_obj": 10}),
+    ("c3dtlz4", {"n_var": 7, "n_obj": 3}),
+    ("ctp1", {}), ("osy", {}), ("carside", {}), ("welded_beam", {}),
+    ("g01", {}), ("g04", {}), ("g05", {}), ("g07", {}), ("g10", {}),
+]
+
+
+def benchmark(name, kwargs, n_rows=1000, number=5):
+    problem = get_problem(name, **kwargs)
+
+    xl = problem.xl if problem.xl is not None else np.zeros(problem.n_var)
+    xu = problem.xu if problem.xu is not None else np.ones(problem.n_var)
+    X = xl + np.random.random((n_rows, problem.n_var)) * (xu - xl)
+
+    return_values_of = ["F", "dF"] + (["G", "dG"] if problem.n_constr > 0 else [])
+
+    ret = {}
+    for mode in ["forward", "reverse"]:
+        problem.jacobian_mode = mode
+        ret[mode] = min(timeit.repeat(lambda: problem.evaluate(X, return_values_of=return_values_of),
+                                      number=1, repeat=number))
+
+    n_outputs = problem.n_obj + max(problem.n_constr, 0)
+    return problem, n_outputs, ret
+
+
+if __name__ == "__main__":
+
+    print("%-12s %6s %9s %10s %10s %8s %8s" % ("problem", "n_var", "n_outputs", "forward", "reverse", "fastest",
+                                               "auto"))
+
+    for name, kwargs in PROBLEMS:
+        problem, n_outputs, ret = benchmark(name, kwargs)
+        fastest = min(ret, key=ret.get)
+        auto = calc_jacobian_mode(problem.n_var, n_outputs)
+
+        print("%-12s %6s %9s %9.4fs %9.4fs %8s %8s" % (name, problem.n_var, n_outputs, ret["forward"],
+                                                       ret["reverse"], fastest, auto))
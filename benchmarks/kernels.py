@@ -0,0 +1,49 @@
+"""
+Compares the time of one evaluation of the function values (F and G) by numpy and by the fused kernels compiled by
+Numba (kernels="numba"). The kernels are compiled once before the time is measured - numba needs to be installed.
+
+    python benchmarks/kernels.py
+
+"""
+import timeit
+import warnings
+
+import numpy as np
+
+from pymop.factory import get_problem
+
+warnings.simplefilter("ignore")
+
+PROBLEMS = [
+    ("zdt1", {"n_var": 30}), ("zdt4", {"n_var": 10}), ("zdt6", {"n_var": 10}),
+    ("dtlz1", {"n_var": 7, "n_obj": 3}), ("dtlz2", {"n_var": 12, "n_obj": 3}), ("dtlz7", {"n_var": 22, "n_obj": 3}),
+    ("ctp1", {}), ("ctp2", {}), ("ctp8", {}),
+    ("g01", {}), ("g02", {}), ("g07", {}), ("g10", {}),
+]
+
+
+def benchmark(name, kwargs, n_rows, number=500):
+    problem = get_problem(name, **kwargs)
+    X = problem.xl + np.random.random((n_rows, problem.n_var)) * (problem.xu - problem.xl)
+    return_values_of = ["F", "G"] if problem.n_constr > 0 else ["F"]
+
+    ret = {}
+    for kernels in ["numpy", "numba"]:
+        problem.kernels = kernels
+        problem.evaluate(X, return_values_of=return_values_of)
+
+        ret[kernels] = min(timeit.repeat(lambda: problem.evaluate(X, return_values_of=return_values_of),
+                                         number=number, repeat=3)) / number
+
+    return ret
+
+
+if __name__ == "__main__":
+
+    print("%-8s %6s %12s %12s %8s" % ("problem", "n_rows", "numpy", "numba", "speedup"))
+
+    for name, kwargs in PROBLEMS:
+        for n_rows in [1, 100, 10000]:
+            ret = benchmark(name, kwargs, n_rows, number=500 if n_rows < 10000 else 10)
+            print("%-8s %6s %10.1fus %10.1fus %7.2fx" % (name, n_rows, 1e6 * ret["numpy"], 1e6 * ret["numba"],
+                                                         ret["numpy"] / ret["numba"]))
@@ -0,0 +1,53 @@
+"""
+Measures the throughput (rows per second) of problems with many variables - or many constraints for CTP1. The
+values are evaluated by numpy (F), the derivatives once analytically (dF) and once by autograd which traces the
+evaluation function (autograd dF). All of them are vectorized over the variables - the time per row should grow
+linearly with n_var and not be dominated by the python interpreter.
+
+    python benchmarks/large_n_var.py
+
+"""
+import timeit
+import warnings
+
+import numpy as np
+
+from pymop import ZDT4, Rosenbrock, CTP1
+
+warnings.simplefilter("ignore")
+
+# the fused kernels are not compared here - only the vectorized implementation
+PROBLEMS = [
+    ("zdt4", lambda n: ZDT4(n_var=n, kernels="numpy"), [10, 100, 1000, 5000]),
+    ("rosenbrock", lambda n: Rosenbrock(n_var=n, kernels="numpy"), [10, 100, 1000, 5000]),
+    ("ctp1", lambda n: CTP1(n_constr=n, kernels="numpy"), [2, 10, 100, 1000]),
+]
+
+
+def benchmark(problem, return_values_of, evaluation_of=None, n_rows=100, number=5):
+    if evaluation_of is not None:
+        problem.evaluation_of = evaluation_of
+
+    X = problem.xl + np.random.random((n_rows, problem.n_var)) * (problem.xu - problem.xl)
+    problem.evaluate(X, return_values_of=return_values_of)
+
+    t = min(timeit.repeat(lambda: problem.evaluate(X, return_values_of=return_values_of), number=number,
+                          repeat=3)) / number
+    return n_rows / t
+
+
+if __name__ == "__main__":
+
+    print("%-10s %6s %14s %14s %14s" % ("problem", "n", "F", "dF", "autograd dF"))
+
+    for name, create, sizes in PROBLEMS:
+        for n in sizes:
+            problem = create(n)
+            values = ["F", "G"] if problem.n_constr > 0 else ["F"]
+            derivatives = values + ["d" + key for key in values]
+
+            F = benchmark(create(n), values)
+            dF = benchmark(create(n), derivatives) if "dF" in problem.evaluation_of else np.nan
+            autograd = benchmark(create(n), derivatives, evaluation_of=values)
+
+            print("%-10s %6s %12.0f/s %12.0f/s %12.0f/s" % (name, n, F, dF, autograd))
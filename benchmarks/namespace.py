@@ -0,0 +1,51 @@
+"""
+Compares the time of one evaluation of the function values (F and G) with anp bound to autograd.numpy and to plain
+numpy. If no derivatives are requested nothing is traced and Problem.evaluate binds plain numpy - the difference is
+the overhead of the autograd wrappers which matters most for small batches.
+
+    python benchmarks/namespace.py
+
+"""
+import timeit
+import warnings
+
+import autograd.numpy
+import numpy as np
+
+from pymop.backend import bind_namespace
+from pymop.factory import get_problem
+
+warnings.simplefilter("ignore")
+
+PROBLEMS = [
+    ("zdt1", {"n_var": 30}), ("zdt3", {"n_var": 30}), ("zdt4", {"n_var": 10}),
+    ("dtlz1", {"n_var": 7, "n_obj": 3}), ("dtlz2", {"n_var": 12, "n_obj": 3}), ("dtlz7", {"n_var": 22, "n_obj": 3}),
+    ("g01", {}), ("g04", {}), ("g07", {}), ("g10", {}),
+]
+
+
+def benchmark(name, kwargs, n_rows, number=500):
+    problem = get_problem(name, **kwargs)
+    X = problem.xl + np.random.random((n_rows, problem.n_var)) * (problem.xu - problem.xl)
+
+    def evaluate():
+        out = dict.fromkeys(["F", "G"] if problem.n_constr > 0 else ["F"])
+        problem._evaluate(X, out)
+
+    ret = {}
+    for label, namespace in [("autograd", autograd.numpy), ("numpy", np)]:
+        with bind_namespace(namespace):
+            ret[label] = min(timeit.repeat(evaluate, number=number, repeat=3)) / number
+
+    return ret
+
+
+if __name__ == "__main__":
+
+    print("%-8s %6s %12s %12s %8s" % ("problem", "n_rows", "autograd", "numpy", "speedup"))
+
+    for name, kwargs in PROBLEMS:
+        for n_rows in [1, 100, 10000]:
+            ret = benchmark(name, kwargs, n_rows, number=500 if n_rows < 10000 else 10)
+            print("%-8s %6s %10.1fus %10.1fus %7.2fx" % (name, n_rows, 1e6 * ret["autograd"], 1e6 * ret["numpy"],
+                                                         ret["autograd"] / ret["numpy"]))
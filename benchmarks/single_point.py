@@ -0,0 +1,69 @@
+"""
+Measures the overhead of evaluating a single point (a vector x) compared to calling the evaluation function of the
+problem directly. A single point skips the batch machinery (chunks, pools, caches and buffers) - it is compared to
+a batch of one row as well. tests/test_evaluation.py pins the overhead of the trivial problem relative to a
+numpy call (SinglePointTest.test_overhead).
+
+    python benchmarks/single_point.py
+
+"""
+import timeit
+import warnings
+
+import autograd.numpy
+import numpy as np
+
+from pymop.backend import bind_namespace
+from pymop.factory import get_problem
+from pymop.problem import Problem
+
+warnings.simplefilter("ignore")
+
+
+class Trivial(Problem):
+
+    def __init__(self, **kwargs):
+        super().__init__(n_var=2, n_obj=1, n_constr=0, xl=0, xu=1, **kwargs)
+
+    def _evaluate(self, x, out, *args, **kwargs):
+        out["F"] = x[:, 0]
+
+
+PROBLEMS = [
+    ("trivial", lambda: Trivial()),
+    ("zdt1", lambda: get_problem("zdt1", n_var=30, kernels="numpy")),
+    ("dtlz2", lambda: get_problem("dtlz2", n_var=12, n_obj=3, kernels="numpy")),
+    ("g01", lambda: get_problem("g01", kernels="numpy")),
+    ("welded_beam", lambda: get_problem("welded_beam")),
+]
+
+
+def benchmark(problem, number=2000, repeat=20):
+    x = problem.xl + np.random.random(problem.n_var) * (problem.xu - problem.xl)
+    keys = ["F", "G"] if problem.n_constr > 0 else ["F"]
+
+    funs = {
+        "direct": lambda: problem._evaluate(x[None, :], dict.fromkeys(keys)),
+        "single": lambda: problem.evaluate(x),
+        "batch": lambda: problem.evaluate(x[None, :]),
+    }
+
+    # the functions are timed alternately - the fastest run of each is kept. The evaluation function is called by
+    # plain numpy as evaluate does if nothing is traced
+    ret = dict.fromkeys(funs, np.inf)
+    for _ in range(repeat):
+        for label, fun in funs.items():
+            with bind_namespace(np if label == "direct" else autograd.numpy):
+                ret[label] = min(ret[label], timeit.timeit(fun, number=number) / number)
+
+    return ret
+
+
+if __name__ == "__main__":
+
+    print("%-12s %10s %10s %10s %10s" % ("problem", "direct", "single", "batch", "overhead"))
+
+    for name, create in PROBLEMS:
+        ret = benchmark(create())
+        print("%-12s %8.1fus %8.1fus %8.1fus %8.1fus" % (name, 1e6 * ret["direct"], 1e6 * ret["single"],
+                                                         1e6 * ret["batch"], 1e6 * (ret["single"] - ret["direct"])))
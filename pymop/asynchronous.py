@@ -0,0 +1,344 @@
+import asyncio
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from pymop.parallel import create_pool
+
+
+class EvaluationQueue:
+    """
+    A submission queue to evaluate a problem asynchronously. Rows are submitted (ask) and each of them is evaluated
+    on its own by the pool of workers of the problem. The results can be polled or awaited (tell) in the order they
+    are finished - this keeps the workers busy even if the evaluation times vary a lot.
+
+    Each result is a tuple (id, x, out) where id is the value returned when submitting, x the evaluated row and out
+    the dictionary of values as defined by return_values_of (the same as evaluate with return_as_dictionary).
+
+    The queue owns its pool of workers (it is not shared with Problem.evaluate) - it is released by close or when
+    the queue is used as a context manager.
+
+    """
+
+    def __init__(self, problem, parallelization="threads", n_workers=None, return_values_of="auto", **kwargs):
+        """
+
+        Parameters
+        ----------
+        problem : Problem
+            The problem to be evaluated.
+
+        parallelization : str
+            The pool of workers the rows are evaluated by - either "threads" or "process".
+
+        n_workers : int
+            The number of workers. By default the number of cpus.
+
+        return_values_of : list of strings
+            The values to be returned for each row (see Problem.evaluate).
+
+        kwargs : dict
+            Additional keyword arguments passed to the evaluation function.
+
+        """
+        self.problem = problem
+        self.pool = create_pool(problem, parallelization, n_workers=n_workers)
+        self.closed = False
+        self.return_values_of = problem._calc_return_values_of(return_values_of)
+        self.kwargs = kwargs
+
+        # the ids of all rows that were submitted but not retrieved yet
+        self.pending = {}
+
+        # the finished evaluations in the order they have been completed
+        self.finished = queue.Queue()
+
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+    def submit(self, X):
+        """
+        Submits one (1d array) or several rows (2d array) to be evaluated. Each row is evaluated independently.
+
+        Returns
+        -------
+        ids : int or list
+            The id of the submitted row or the list of ids if several rows have been submitted.
+
+        """
+
+        only_single_value = len(np.shape(X)) == 1
+        X = np.atleast_2d(X)
+
+        if X.shape[1] != self.problem.n_var:
+            raise Exception('Input dimension %s are not equal to n_var %s!' % (X.shape[1], self.problem.n_var))
+
+        ids = []
+        for k in range(X.shape[0]):
+            x = X[k]
+
+            with self.lock:
+                if self.closed:
+                    raise Exception("The queue has been closed and does not accept any rows anymore.")
+
+                id = next(self.counter)
+                future = self.pool.submit(x[None, :], self.return_values_of, **self.kwargs)
+                self.pending[id] = future
+
+            future.add_done_callback(lambda future, id=id, x=x: self.finished.put((id, x, future)))
+            ids.append(id)
+
+        return ids[0] if only_single_value else ids
+
+    def poll(self):
+        """
+        Returns all evaluations which have been finished since the last call without blocking.
+        """
+        ret = []
+        while True:
+            try:
+                entry = self.finished.get_nowait()
+            except queue.Empty:
+                break
+            ret.append(self._retrieve(*entry))
+        return ret
+
+    async def next(self):
+        """
+        Awaits the next evaluation to be finished.
+        """
+
+        while True:
+
+            try:
+                return self._retrieve(*self.finished.get_nowait())
+            except queue.Empty:
+                pass
+
+            with self.lock:
+                futures = [asyncio.wrap_future(future) for future in self.pending.values()]
+
+            if len(futures) == 0:
+                raise Exception("No evaluations are pending.")
+
+            await asyncio.wait(futures, return_when=asyncio.FIRST_COMPLETED)
+
+    async def results(self):
+        """
+        Awaits all pending evaluations and returns them in the order they have been finished.
+        """
+        ret = []
+        while len(self) > 0:
+            ret.append(await self.next())
+        return ret
+
+    def _retrieve(self, id, x, future):
+        with self.lock:
+            del self.pending[id]
+
+        # raises the exception if the evaluation has failed
+        out = future.result()
+
+        return id, x, self.problem._format_output(dict(out), self.return_values_of, True, True)
+
+    def close(self):
+        """
+        Waits for all submitted rows to be evaluated and releases the pool of workers. Their results can still be
+        retrieved afterwards.
+        """
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        self.pool.close(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self.pending)
+
+
+# resolves a future - a future which can not be resolved anymore must not stop the others of the batch
+def resolve(setter, value):
+    try:
+        setter(value)
+    except Exception:
+        pass
+
+
+class BatchCoalescer:
+    """
+    Coalesces the single points requested by many concurrent callers into batches. A background thread collects the
+    submitted points until either max_batch points are waiting or the first of them has been waiting for max_wait
+    seconds. Then all of them are evaluated by one vectorized call of Problem.evaluate and the results are sent back
+    to the future of each caller.
+
+    The result of each point is the same as evaluating the point on its own (a 1d array).
+
+    """
+
+    def __init__(self, problem, max_batch=64, max_wait=0.001, return_values_of="auto", **kwargs):
+        """
+
+        Parameters
+        ----------
+        problem : Problem
+            The problem to be evaluated.
+
+        max_batch : int
+            The maximum number of points evaluated together.
+
+        max_wait : float
+            The maximum number of seconds a point waits for other points to be batched with.
+
+        return_values_of : list of strings
+            The values to be returned for each point (see Problem.evaluate).
+
+        kwargs : dict
+            Additional keyword arguments for Problem.evaluate - for instance to parallelize the batches.
+
+        """
+        self.problem = problem
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.return_values_of = problem._calc_return_values_of(return_values_of)
+        self.kwargs = kwargs
+
+        # the statistics of the batches and the time points have been waiting
+        self.n_batches = 0
+        self.n_rows = 0
+        self.max_batch_size = 0
+        self.total_wait = 0.0
+        self.max_wait_time = 0.0
+
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, x):
+        """
+        Submits a single point and returns a concurrent.futures.Future with its result.
+        """
+        x = np.asarray(x)
+
+        if x.ndim != 1 or x.shape[0] != self.problem.n_var:
+            raise Exception('A single point with n_var %s values is expected but %s given!'
+                            % (self.problem.n_var, x.shape))
+
+        future = Future()
+        with self.lock:
+            if self.closed:
+                raise Exception("The coalescer has been closed and does not accept any points anymore.")
+            self.queue.put((x, future, time.perf_counter()))
+        return future
+
+    def evaluate(self, x, timeout=None):
+        """
+        Evaluates a single point and blocks until it has been evaluated as part of a batch.
+        """
+        return self.submit(x).result(timeout=timeout)
+
+    def _run(self):
+        running = True
+
+        while running:
+            entry = self.queue.get()
+            if entry is None:
+                break
+
+            batch = [entry]
+            deadline = entry[2] + self.max_wait
+
+            # collect points until the batch is full or the first point has waited long enough
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+
+                try:
+                    entry = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+                if entry is None:
+                    running = False
+                    break
+
+                batch.append(entry)
+
+            self._process(batch)
+
+    def _process(self, batch):
+        start = time.perf_counter()
+
+        # the points whose future has been cancelled by the caller are not evaluated at all
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if len(batch) == 0:
+            return
+
+        with self.lock:
+            self.n_batches += 1
+            self.n_rows += len(batch)
+            self.max_batch_size = max(self.max_batch_size, len(batch))
+            for _, _, submitted in batch:
+                self.total_wait += start - submitted
+                self.max_wait_time = max(self.max_wait_time, start - submitted)
+
+        # the results of all points are prepared first - a failure of any step is sent to every caller
+        try:
+            X = np.row_stack([x for x, _, _ in batch])
+            out = self.problem.evaluate(X, return_values_of=self.return_values_of, return_as_dictionary=True,
+                                        **self.kwargs)
+
+            results = []
+            for k in range(len(batch)):
+                _out = {key: (val[k:k + 1] if val is not None else None) for key, val in out.items()}
+                results.append(self.problem._format_output(_out, self.return_values_of, True, False))
+
+        except Exception as e:
+            for _, future, _ in batch:
+                resolve(future.set_exception, e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            resolve(future.set_result, result)
+
+    def stats(self):
+        """
+        Returns
+        -------
+        stats : dict
+            The number of batches and rows evaluated, the mean and maximum batch size as well as the mean and
+            maximum time (in seconds) a point has been waiting before its batch was evaluated.
+        """
+        with self.lock:
+            return {
+                "n_batches": self.n_batches,
+                "n_rows": self.n_rows,
+                "mean_batch_size": self.n_rows / self.n_batches if self.n_batches > 0 else 0.0,
+                "max_batch_size": self.max_batch_size,
+                "mean_wait": self.total_wait / self.n_rows if self.n_rows > 0 else 0.0,
+                "max_wait": self.max_wait_time
+            }
+
+    def close(self):
+        """
+        Evaluates all points submitted so far and stops the background thread. Points submitted afterwards are
+        rejected.
+        """
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.queue.put(None)
+        self.thread.join()
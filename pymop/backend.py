@@ -0,0 +1,195 @@
+import contextlib
+import threading
+
+import autograd.numpy
+import numpy as np
+
+# the backends the derivatives can be calculated with - autograd is built-in, all others are optional
+BACKENDS = ["autograd", "jax"]
+
+# the backends are created only once - when they are used for the first time
+_backends = {}
+
+
+class Namespace(threading.local):
+    """
+    The numpy namespace the problems are implemented with (anp). Each function is looked up in the namespace bound
+    to the current thread - by default autograd.numpy. Attributes the bound namespace does not provide (constants,
+    dtypes or random numbers) are taken from numpy itself. This allows to evaluate the same source of a problem
+    with other array libraries.
+
+    Each attribute is resolved only once for each thread and namespace - afterwards it is a plain attribute of the
+    thread-local object and accessing it has no overhead.
+
+    """
+
+    def __init__(self):
+        self.__dict__.update(self._attributes_of(autograd.numpy, {}))
+
+    def _attributes_of(self, namespace, attributes):
+        # the attributes resolved for each namespace - including the entries the object itself needs
+        return attributes.setdefault(namespace, {"_namespace": namespace, "_attributes": attributes})
+
+    def __getattr__(self, name):
+        namespace = self._namespace
+        try:
+            value = getattr(namespace, name)
+        except AttributeError:
+            value = getattr(np, name)
+
+        self._attributes[namespace][name] = value
+        self.__dict__[name] = value
+        return value
+
+    def bind(self, namespace):
+        """
+        Binds the namespace to the current thread and returns the one bound before.
+        """
+        # each attribute access of a thread-local object with __getattr__ is costly - the dictionary is read once
+        attrs = self.__dict__
+        previous = attrs["_namespace"]
+
+        if namespace is not previous:
+            attributes = attrs["_attributes"]
+            resolved = attributes.get(namespace)
+            if resolved is None:
+                resolved = self._attributes_of(namespace, attributes)
+
+            attrs.clear()
+            attrs.update(resolved)
+
+        return previous
+
+
+anp = Namespace()
+
+
+@contextlib.contextmanager
+def bind_namespace(namespace):
+    """
+    Binds the namespace to anp for all problems evaluated by the current thread within the context.
+    """
+    previous = anp.bind(namespace)
+    try:
+        yield
+    finally:
+        anp.bind(previous)
+
+
+def get_backend(name):
+    if name not in BACKENDS:
+        raise Exception("Unknown backend %s! Allowed is %s." % (name, BACKENDS))
+
+    # autograd is used by the problem directly
+    if name == "autograd":
+        return None
+
+    if name not in _backends:
+        _backends[name] = JaxBackend()
+
+    return _backends[name]
+
+
+class JaxBackend:
+    """
+    Evaluates a problem and calculates its derivatives by JAX on the CPU. The evaluation function is traced with
+    jax.numpy bound to anp and compiled (jax.jit) together with the jacobian and hessian matrices of all requested
+    outputs. The compiled functions are cached for each problem, shape of the input and the values requested.
+
+    Problems whose evaluation function can not be traced by JAX (e.g. item assignments or plain numpy) are
+    evaluated by autograd instead.
+
+    The precision of the input is kept - float64 is enabled only while the problem is traced and evaluated
+    (thread-locally by jax.experimental.enable_x64). The global configuration of JAX is never changed.
+
+    """
+
+    name = "jax"
+
+    def __init__(self):
+        try:
+            import jax
+            from jax.experimental import enable_x64
+        except ImportError:
+            raise Exception("The jax backend requires jax. Please install it (pip install jax).")
+
+        self.jax = jax
+        self.enable_x64 = enable_x64
+
+    def supports(self, plan, mode):
+        return mode in ["auto", "forward", "reverse"] and not plan.directions and not plan.lagrangian
+
+    def evaluate(self, problem, plan, X, args, kwargs):
+        """
+        Returns the values of plan.traced and the derivatives ("d" and "h" + key) for the rows of X - or None
+        if the problem can not be traced by JAX.
+        """
+
+        key = (tuple(plan.return_values_of), None if plan.wrt is None else tuple(plan.wrt), X.shape, X.dtype.str,
+               problem.jacobian_mode, repr((args, sorted(kwargs.items(), key=lambda e: e[0]))))
+
+        with problem._lock:
+            compiled = problem.__dict__.setdefault("_compiled", {})
+            if key not in compiled:
+                compiled[key] = self.jax.jit(self._compile(problem, plan, X.shape[1], args, kwargs))
+            fun = compiled[key]
+
+        if fun is None:
+            return None
+
+        # the function is traced and evaluated in the precision of the input
+        try:
+            with self.enable_x64(X.dtype.itemsize > 4):
+                out = fun(self.jax.numpy.asarray(X, dtype=X.dtype))
+        except Exception:
+
+            # the problem is never traced by JAX again for these values
+            with problem._lock:
+                compiled[key] = None
+            return None
+
+        return {key: np.asarray(val) for key, val in out.items()}
+
+    def _compile(self, problem, plan, n_var, args, kwargs):
+        from pymop.gradient import calc_jacobian_mode
+        from pymop.problem import at_least2d
+
+        jax, jnp = self.jax, self.jax.numpy
+
+        def evaluate(X):
+            out = dict.fromkeys(plan.traced)
+            with bind_namespace(jnp):
+                problem._evaluate(X, out, *args, **kwargs)
+            at_least2d(out)
+            return {key: val for key, val in out.items() if val is not None}
+
+        # the derivatives of each row on its own - with respect to the variables wrt only
+        wrt = np.arange(n_var) if plan.wrt is None else np.array(plan.wrt)
+
+        def evaluate_row(keys):
+            def fun(_x, x):
+                out = evaluate(x.at[wrt].set(_x)[None, :])
+                return {key: out[key][0] for key in keys if key in out}
+
+            return fun
+
+        mode = problem.jacobian_mode
+        if mode == "auto":
+            n_outputs = sum([{"F": problem.n_obj, "G": problem.n_constr}.get(key, 1) for key in plan.jacobian])
+            mode = calc_jacobian_mode(len(wrt), n_outputs)
+        jacobian = jax.jacfwd if mode == "forward" else jax.jacrev
+
+        def fun(X):
+            out = evaluate(X)
+
+            if len(plan.jacobian) > 0:
+                jac = jax.vmap(jacobian(evaluate_row(plan.jacobian)))(X[:, wrt], X)
+                out.update({"d" + key: val for key, val in jac.items()})
+
+            if len(plan.hessian) > 0:
+                hes = jax.vmap(jax.hessian(evaluate_row(plan.hessian)))(X[:, wrt], X)
+                out.update({"h" + key: val for key, val in hes.items()})
+
+            return out
+
+        return fun
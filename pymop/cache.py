@@ -0,0 +1,163 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class EvaluationCache:
+    """
+    An in-memory cache of evaluations which can be passed to Problem.evaluate. Each row of X is identified by its
+    values together with the problem (class and parameters) and the additional arguments of the evaluation. Rows
+    which have been evaluated before are served from the cache, all others are evaluated together as one batch.
+
+    If the cache exceeds max_size entries or max_bytes bytes the least recently used entries are evicted.
+    The same cache can be shared by several problems and threads.
+
+    """
+
+    def __init__(self, max_size=None, max_bytes=None):
+        """
+
+        Parameters
+        ----------
+        max_size : int
+            The maximum number of rows stored in the cache. Unbounded if None.
+
+        max_bytes : int
+            The (approximate) maximum number of bytes the cached rows and their values are allowed to occupy.
+            Unbounded if None.
+
+        """
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+
+        # each key maps to a dictionary with the values evaluated for this row - ordered from least recently used
+        self.data = OrderedDict()
+        self.n_bytes = 0
+
+        # the statistics of the cache
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.lock = threading.Lock()
+
+    def evaluate(self, problem, X, return_values_of, func, *args, **kwargs):
+        """
+        Returns the values of return_values_of for each row of X - only the rows not found in the cache are
+        evaluated by calling func with the corresponding sub matrix of X.
+        """
+
+        # nothing can be found for an empty block - the problem determines the shape of its (empty) values
+        if X.shape[0] == 0:
+            return func(X)
+
+        prefix = calc_fingerprint(problem, args, kwargs)
+        keys = [(prefix, x.tobytes()) for x in X]
+
+        entries = [None] * len(keys)
+        missing = OrderedDict()
+
+        with self.lock:
+            for k, key in enumerate(keys):
+                entry = self.data.get(key)
+
+                if entry is not None and all([val in entry for val in return_values_of]):
+                    self.data.move_to_end(key)
+                    entries[k] = entry
+                    self.hits += 1
+                else:
+                    missing.setdefault(key, []).append(k)
+                    self.misses += 1
+
+        # evaluate all rows which were not found - duplicates only once
+        if len(missing) > 0:
+            I = [K[0] for K in missing.values()]
+            out = func(X[I])
+
+            with self.lock:
+                for i, (key, K) in enumerate(missing.items()):
+                    entry = {name: (val[i].copy() if val is not None else None) for name, val in out.items()}
+                    for k in K:
+                        entries[k] = entry
+                    self._store(key, entry)
+
+                self._evict()
+
+        out = {}
+        for name in return_values_of:
+            vals = [entry.get(name) for entry in entries]
+            if any([val is None for val in vals]):
+                out[name] = None
+            else:
+                out[name] = np.stack(vals, axis=0)
+
+        return out
+
+    def _store(self, key, entry):
+
+        # values already cached for this row are kept if they have not been evaluated this time
+        if key in self.data:
+            _entry = self.data.pop(key)
+            self.n_bytes -= calc_entry_bytes(key, _entry)
+            entry = {**_entry, **entry}
+
+        self.data[key] = entry
+        self.n_bytes += calc_entry_bytes(key, entry)
+
+    def _evict(self):
+        while len(self.data) > 0 and ((self.max_size is not None and len(self.data) > self.max_size) or
+                                      (self.max_bytes is not None and self.n_bytes > self.max_bytes)):
+            key, entry = self.data.popitem(last=False)
+            self.n_bytes -= calc_entry_bytes(key, entry)
+            self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.n_bytes = 0
+
+    def stats(self):
+        """
+        Returns
+        -------
+        stats : dict
+            The number of hits, misses and evictions as well as the current size of the cache.
+        """
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "size": len(self.data), "n_bytes": self.n_bytes}
+
+    def __len__(self):
+        return len(self.data)
+
+
+# the number of bytes a cached row is occupying
+def calc_entry_bytes(key, entry):
+    return len(key[1]) + sum([val.nbytes for val in entry.values() if isinstance(val, np.ndarray)])
+
+
+# identifies the problem by its class and its public attributes together with the arguments of the evaluation
+def calc_fingerprint(problem, args, kwargs):
+    h = hashlib.sha1()
+    h.update(("%s.%s" % (problem.__class__.__module__, problem.__class__.__qualname__)).encode())
+
+    for name, value in sorted(vars(problem).items(), key=lambda e: e[0]):
+        if not name.startswith("_"):
+            h.update(name.encode())
+            h.update(to_bytes(value))
+
+    h.update(repr((args, sorted(kwargs.items(), key=lambda e: e[0]))).encode())
+
+    return h.digest()
+
+
+def to_bytes(value):
+    if isinstance(value, np.ndarray):
+        return ("%s%s" % (value.dtype, value.shape)).encode() + np.ascontiguousarray(value).tobytes()
+    elif value is None or isinstance(value, (bool, int, float, complex, str, tuple, list, dict, np.generic)):
+        return repr(value).encode()
+    else:
+        # everything else can only be identified by the object itself
+        return ("<%s at %s>" % (type(value).__name__, id(value))).encode()
@@ -56,6 +56,7 @@ STR_TO_PROBLEM = {
 
 
 def get_problem(name, *args, **kwargs):
+    # the options of the evaluation (e.g. dtype or kernels) are passed along to the problem
     return STR_TO_PROBLEM[name.lower()](*args, **kwargs)
 
 
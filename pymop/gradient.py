@@ -1,6 +1,26 @@
+import time
+import warnings
+
 import autograd.numpy as anp
-from autograd.core import VJPNode, vspace, backward_pass
-from autograd.tracer import new_box, isbox, toposort
+import numpy as np
+from autograd.core import VJPNode, JVPNode, vspace, backward_pass
+from autograd.tracer import new_box, isbox, getval, toposort, trace_stack
+
+# the modes the jacobian can be calculated with - by autograd or by finite differences
+JACOBIAN_MODES = ["auto", "forward", "reverse", "fd-forward", "fd-central", "complex-step"]
+
+# the default step sizes of the finite differences - relative to the magnitude of x except for the complex step
+FD_STEPS = {
+    "fd-forward": np.sqrt(np.finfo(float).eps),
+    "fd-central": np.cbrt(np.finfo(float).eps),
+    "complex-step": 1e-20
+}
+
+# the cost of one backward pass relative to one forward pass with tangents (measured by benchmarks/jacobian_mode.py)
+REVERSE_PASS_COST = 1.25
+
+# the storage of the hessian matrices - full symmetric matrices, the packed upper triangle or the diagonal only
+HESSIAN_FORMATS = ["dense", "packed", "diagonal"]
 
 
 # runs the function by making sure the calculations are traced using autograd
@@ -15,22 +35,545 @@ def run_and_trace(fun, x, *args, **kwargs):
 
 def calc_jacobian(start, end):
 
-    # if the end_box is not a box - autograd can not track back
-    if not isbox(end):
-        return vspace(start.shape).zeros()
+    # if the end_box is not a box of the same trace - autograd can not track back and the derivative is zero
+    if not isbox(end) or end._trace != start._trace:
+        return np.zeros(np.shape(end) + (start.shape[1],))
 
     # the final jacobian matrices
     jac = []
 
     # the backward pass is done for each objective function once
     for j in range(end.shape[1]):
-        b = anp.zeros(end.shape)
+        b = np.zeros(end.shape)
         b[:, j] = 1
-        n = new_box(b, 0, VJPNode.new_root(b))
-        _jac = backward_pass(n, end._node)
+        _jac = backward_pass(b, end._node)
         jac.append(_jac)
 
     jac = anp.stack(jac, axis=1)
 
     return jac
 
+
+def calc_derivatives(fun, x, jacobian, hessian, times=None):
+    """
+    Runs the function only once and calculates all jacobian and hessian matrices from the traced calculations
+    (reverse mode). If hessian matrices are requested, the input is traced twice: The backward passes of the inner
+    trace are recorded by the outer trace and the hessian is the jacobian of the jacobian (reverse-over-reverse).
+
+    Parameters
+    ----------
+    fun : func
+        A function returning a dictionary with all values for the input x.
+
+    x : np.array
+        The input matrix of size (n_rows, n_var).
+
+    jacobian : list
+        The outputs the jacobian matrices are calculated for.
+
+    hessian : list
+        The outputs the hessian matrices are calculated for.
+
+    times : dict
+        If provided, the wall time of the phases evaluate, jacobian and hessian are added to it.
+
+    Returns
+    -------
+    out : dict
+        The values returned by the function - converted back to conventional numpy arrays.
+
+    deriv : dict
+        The jacobian matrix (n_rows, n_outputs, n_var) as "d" + key and the hessian matrix
+        (n_rows, n_outputs, n_var, n_var) as "h" + key of the outputs.
+
+    """
+
+    start = time.perf_counter()
+    deriv = {}
+
+    with trace_stack.new_trace() as t:
+        outer = new_box(x, t, VJPNode.new_root(x))
+
+        if len(hessian) > 0:
+            with trace_stack.new_trace() as _t:
+                inner = new_box(outer, _t, VJPNode.new_root(outer))
+                out = fun(inner)
+                _add_time(times, "evaluate", start)
+
+                jacobian, hessian = _filter(out, jacobian), _filter(out, hessian)
+
+                # the jacobian matrices are calculated by the inner trace and therefore still traced by the outer
+                start = time.perf_counter()
+                jac = {key: calc_jacobian(inner, out[key]) for key in set(jacobian).union(hessian)}
+
+        else:
+            out = fun(outer)
+            _add_time(times, "evaluate", start)
+
+            jacobian = _filter(out, jacobian)
+
+            start = time.perf_counter()
+            jac = {key: calc_jacobian(outer, out[key]) for key in jacobian}
+
+        _add_time(times, "jacobian", start)
+
+        if len(hessian) > 0:
+            start = time.perf_counter()
+            for key in hessian:
+                _jac = jac[key]
+                deriv["h" + key] = np.stack([getval(calc_jacobian(outer, _jac[:, k])) for k in range(_jac.shape[1])],
+                                            axis=1)
+            _add_time(times, "hessian", start)
+
+    for key in jacobian:
+        deriv["d" + key] = getval(jac[key])
+
+    return {key: getval(val) for key, val in out.items()}, deriv
+
+
+def calc_derivatives_forward_over_reverse(fun, x, jacobian, hessian, fmt="dense", times=None):
+    """
+    Calculates the hessian matrices by forward-over-reverse products: Each row is repeated once for each variable
+    and the copies are seeded with the unit vector of their variable (forward) around a traced evaluation
+    (reverse). The gradients of the backward passes carry the columns of the hessian as their tangents - the
+    function is run only once and no tape of the backward passes needs to be kept.
+
+    The hessian is symmetric - only the entries of the upper triangle are taken and the full matrix (if requested)
+    is mirrored from those.
+
+    Parameters
+    ----------
+    fun : func
+        A function returning a dictionary with all values for the input x.
+
+    x : np.array
+        The input matrix of size (n_rows, n_var).
+
+    jacobian : list
+        The outputs the jacobian matrices are calculated for.
+
+    hessian : list
+        The outputs the hessian matrices are calculated for.
+
+    fmt : str
+        The storage of the hessian matrices: "dense" (n_rows, n_outputs, n_var, n_var), "packed" the upper triangle
+        row by row (n_rows, n_outputs, n_var * (n_var + 1) / 2) or "diagonal" (n_rows, n_outputs, n_var).
+
+    times : dict
+        If provided, the wall time of the phases evaluate and hessian are added to it.
+
+    Returns
+    -------
+    out : dict
+        The values returned by the function - converted back to conventional numpy arrays.
+
+    deriv : dict
+        The jacobian matrix as "d" + key and the hessian matrix in the requested storage as "h" + key.
+
+    """
+
+    if fmt not in HESSIAN_FORMATS:
+        raise Exception("Unknown hessian format %s! Allowed is %s." % (fmt, HESSIAN_FORMATS))
+
+    n, m = x.shape
+    start = time.perf_counter()
+    deriv = {}
+
+    # the copy k of each row is seeded with the unit vector of variable k
+    _x = np.repeat(x, m, axis=0)
+    seeds = np.tile(np.eye(m), (n, 1))
+
+    with trace_stack.new_trace() as t:
+        outer = new_box(_x, t, JVPNode.new_root(_x, seeds))
+
+        with trace_stack.new_trace() as _t:
+            inner = new_box(outer, _t, VJPNode.new_root(outer))
+            out = fun(inner)
+            _add_time(times, "evaluate", start)
+
+            jacobian, hessian = _filter(out, jacobian), _filter(out, hessian)
+            start = time.perf_counter()
+
+            # the jacobian matrices are calculated by the inner trace and differentiated by the outer one
+            for key in hessian + [key for key in jacobian if key not in hessian]:
+                jac = calc_jacobian(inner, out[key])
+
+                if key in jacobian:
+                    deriv["d" + key] = getval(jac)[::m]
+
+                if key in hessian:
+
+                    # the tangent of copy k is column k of the hessian - an output not depending on x has none
+                    if isbox(jac) and jac._trace == t:
+                        C = jac._node.g
+                    else:
+                        C = np.zeros(np.shape(jac))
+
+                    # the columns of size (n_rows, n_outputs, n_var, n_var) - the last dimension is the column
+                    C = np.reshape(C, (n, m) + np.shape(jac)[1:]).transpose(0, 2, 3, 1)
+                    deriv["h" + key] = calc_hessian_storage(C, fmt)
+
+            _add_time(times, "hessian", start)
+
+    out = {key: (getval(val)[::m] if val is not None else None) for key, val in out.items()}
+
+    return out, deriv
+
+
+def calc_directional_derivatives(fun, x, V, jacobian, products, directional, times=None):
+    """
+    Calculates the directional derivatives J(x) * v and the hessian-vector products H(x) * v of several outputs
+    without any full jacobian or hessian matrix: The function is run once with the directions as tangents
+    (forward). The tangents of the outputs are the directional derivatives - independent of the number of
+    variables. If hessian-vector products or jacobian matrices are requested, the evaluation is traced as well
+    (reverse) and the gradients of the backward passes carry the products as their tangents. This costs about two
+    gradient passes.
+
+    Parameters
+    ----------
+    fun : func
+        A function returning a dictionary with all values for the input x.
+
+    x : np.array
+        The input matrix of size (n_rows, n_var).
+
+    V : np.array
+        The direction of each row of size (n_rows, n_var).
+
+    jacobian : list
+        The outputs the jacobian matrices are calculated for.
+
+    products : list
+        The outputs the hessian-vector products are calculated for.
+
+    directional : list
+        The outputs the directional derivatives are calculated for.
+
+    times : dict
+        If provided, the wall time of the phases evaluate, jacobian and hessian are added to it.
+
+    Returns
+    -------
+    out : dict
+        The values returned by the function - converted back to conventional numpy arrays.
+
+    deriv : dict
+        The jacobian matrix as "d" + key, the hessian-vector products of size (n_rows, n_outputs, n_var) as
+        "h" + key + "_v" and the directional derivatives of size (n_rows, n_outputs) as "d" + key + "_v".
+
+    """
+
+    start = time.perf_counter()
+    deriv = {}
+
+    with trace_stack.new_trace() as t:
+        outer = new_box(x, t, JVPNode.new_root(x, np.array(V, dtype=x.dtype)))
+
+        # without any backward pass the directions are only propagated forward
+        if len(jacobian) == 0 and len(products) == 0:
+            out = fun(outer)
+            _add_time(times, "evaluate", start)
+
+        else:
+            with trace_stack.new_trace() as _t:
+                inner = new_box(outer, _t, VJPNode.new_root(outer))
+                out = fun(inner)
+                _add_time(times, "evaluate", start)
+
+                jacobian, products = _filter(out, jacobian), _filter(out, products)
+                start = time.perf_counter()
+
+                for key in products + [key for key in jacobian if key not in products]:
+                    jac = calc_jacobian(inner, out[key])
+
+                    if key in jacobian:
+                        deriv["d" + key] = getval(jac)
+
+                    if key in products:
+                        deriv["h" + key + "_v"] = _tangent(jac, t)
+
+                _add_time(times, "hessian" if len(products) > 0 else "jacobian", start)
+
+        for key in _filter(out, directional):
+            deriv["d" + key + "_v"] = _tangent(out[key], t)
+
+    return {key: getval(val) for key, val in out.items()}, deriv
+
+
+# the tangent of a value with respect to the forward trace t - zero if the value does not depend on the input
+def _tangent(val, t):
+    shape = np.shape(val)
+
+    # the boxes of traces inside of the forward trace are unwrapped
+    while isbox(val) and val._trace != t:
+        val = val._value
+
+    if isbox(val):
+        return val._node.g
+    else:
+        return np.zeros(shape)
+
+
+# converts the hessian matrices (..., n_var, n_var) to the given storage - only the upper triangle is used
+def calc_hessian_storage(H, fmt):
+    m = H.shape[-1]
+
+    if fmt == "packed":
+        I, J = np.triu_indices(m)
+        return H[..., I, J]
+    elif fmt == "diagonal":
+        return np.diagonal(H, axis1=-2, axis2=-1).copy()
+    else:
+        I, J = np.tril_indices(m, -1)
+        H = np.array(H)
+        H[..., I, J] = H[..., J, I]
+        return H
+
+
+# the shape of the hessian matrix of one output of one row in the given storage
+def calc_hessian_shape(n_var, fmt):
+    if fmt == "packed":
+        return n_var * (n_var + 1) // 2,
+    elif fmt == "diagonal":
+        return n_var,
+    else:
+        return n_var, n_var
+
+
+# the position of each entry (i, j) with i <= j of the upper triangle in the packed storage (row by row)
+def calc_packed_index(n_var):
+    I, J = np.triu_indices(n_var)
+    index = np.zeros((n_var, n_var), dtype=int)
+    index[I, J] = np.arange(len(I))
+    index[J, I] = index[I, J]
+    return index
+
+
+def pack_hessian(H, fmt):
+    """
+    Converts dense symmetric hessian matrices (..., n_var, n_var) to the given storage.
+    """
+    return calc_hessian_storage(H, fmt) if fmt != "dense" else H
+
+
+def unpack_hessian(P, n_var):
+    """
+    Converts hessian matrices in packed storage (..., n_var * (n_var + 1) / 2) back to dense symmetric matrices.
+    """
+    return P[..., calc_packed_index(n_var)]
+
+
+# only the outputs which have been set by the function can be derived
+def _filter(out, keys):
+    return [key for key in keys if out.get(key) is not None]
+
+
+def _add_time(times, phase, start):
+    if times is not None:
+        times[phase] += time.perf_counter() - start
+
+
+def calc_jacobian_forward(fun, x, keys, colors=None, wrt=None):
+    """
+    Calculates the jacobian matrices of several outputs using forward mode. The function is run once for each
+    variable (or each color) and the tangents of all outputs are propagated along - all rows of x at once, because
+    each row is evaluated independently.
+
+    Parameters
+    ----------
+    fun : func
+        A function returning a dictionary with the values of all keys for the input x.
+
+    x : np.array
+        The input matrix of size (n_rows, n_var).
+
+    keys : list
+        The outputs the jacobian matrices are calculated for.
+
+    colors : np.array
+        The color of each variable. All variables of one color are seeded together and the compressed jacobian
+        matrices are returned (see pymop.sparsity). If None, each variable is seeded on its own.
+
+    wrt : list
+        The indices of the variables the jacobian matrices are calculated with respect to. Only these variables are
+        seeded (the colors are then the ones of these variables). If None, all of them.
+
+    Returns
+    -------
+    out : dict
+        The values returned by the function in the first pass - converted back to conventional numpy arrays.
+
+    jac : dict
+        The jacobian matrix of size (n_rows, n_outputs, n_var) or (n_rows, n_outputs, n_colors) for each key.
+
+    """
+
+    seeds = calc_seeds(x.shape[1], colors, wrt=wrt)
+    out, jac = None, {key: [] for key in keys}
+
+    for k in range(seeds.shape[1]):
+        g = np.tile(seeds[:, k], (x.shape[0], 1))
+
+        with trace_stack.new_trace() as t:
+            start_box = new_box(x, t, JVPNode.new_root(x, g))
+            _out = fun(start_box)
+
+            # the values do not depend on the tangents - they are taken from the first pass
+            if out is None:
+                out = {key: getval(val) for key, val in _out.items()}
+
+            for key in _filter(_out, keys):
+                val = _out[key]
+
+                # an output not depending on the input has a tangent of zero
+                if isbox(val) and val._trace == t:
+                    _jac = val._node.g
+                else:
+                    _jac = np.zeros(np.shape(val))
+
+                jac[key].append(np.reshape(_jac, (x.shape[0], -1)))
+
+    return out, {key: np.stack(val, axis=2) for key, val in jac.items() if len(val) > 0}
+
+
+def calc_jacobian_fd(fun, x, keys, mode="fd-central", step=None, colors=None, wrt=None):
+    """
+    Calculates the jacobian matrices by finite differences (fd-forward, fd-central) or the complex step
+    (complex-step) without any tracing. All perturbed points of all rows are stacked into one matrix together with x
+    itself and evaluated by calling the function only once.
+
+    The complex step is only exact if the function is holomorphic, i.e. it is written by analytic operations which
+    propagate the imaginary part (no abs, maximum, comparisons or casts to float). Therefore, each row is evaluated
+    along a random direction by central differences as well - if the results do not match, a warning is raised and
+    the jacobian matrices are calculated by central differences instead.
+
+    Parameters
+    ----------
+    fun : func
+        A function returning a dictionary with the values of all rows of its input.
+
+    x : np.array
+        The input matrix of size (n_rows, n_var).
+
+    keys : list
+        The outputs the jacobian matrices are calculated for.
+
+    mode : str
+        The finite difference scheme - "fd-forward", "fd-central" or "complex-step".
+
+    step : float
+        The step size. Relative to max(1, |x|) for finite differences and absolute for the complex step.
+        If None, a default depending on the scheme is used.
+
+    colors : np.array
+        The color of each variable. All variables of one color are perturbed together (with the step size of the
+        largest of them) and the compressed jacobian matrices are returned. If None, each variable on its own.
+
+    wrt : list
+        The indices of the variables to be perturbed. If None, all of them.
+
+    Returns
+    -------
+    out : dict
+        The values returned by the function for x.
+
+    jac : dict
+        The jacobian matrix of size (n_rows, n_outputs, n_var) or (n_rows, n_outputs, n_colors) for each key.
+
+    """
+
+    if mode not in FD_STEPS:
+        raise Exception("Unknown finite difference scheme %s! Allowed is %s." % (mode, list(FD_STEPS.keys())))
+
+    n, m = x.shape
+    step = FD_STEPS[mode] if step is None else step
+
+    # the variables perturbed together in each pass
+    seeds = calc_seeds(m, colors, wrt=wrt)
+    l = seeds.shape[1]
+
+    # the step size of each pass of each row - and the perturbed points of size (n_rows, n_passes, n_var)
+    if mode == "complex-step":
+        h = np.full((n, l), step)
+        D = 1j * h[:, :, None] * seeds.T
+    else:
+        h = step * np.max(np.maximum(1.0, np.abs(x))[:, None, :] * seeds.T, axis=2)
+        D = h[:, :, None] * seeds.T
+
+    P = x[:, None, :] + D
+
+    if mode == "fd-central":
+        _x = np.concatenate([x, P.reshape(n * l, m), (x[:, None, :] - D).reshape(n * l, m)], axis=0)
+    elif mode == "complex-step":
+
+        # the complex step is verified by central differences along a random direction v of the perturbed variables
+        r = np.random.RandomState(1).uniform(0.5, 1.0, l)
+        hv = FD_STEPS["fd-central"] * np.max(np.maximum(1.0, np.abs(x)), axis=1)
+        V = hv[:, None] * (seeds @ r)[None, :]
+        _x = np.concatenate([x, P.reshape(n * l, m), x + V, x - V], axis=0)
+    else:
+        _x = np.concatenate([x, P.reshape(n * l, m)], axis=0)
+
+    _out = fun(_x)
+
+    # the values of the unperturbed rows
+    out = {key: (val[:n] if isinstance(val, np.ndarray) else val) for key, val in _out.items()}
+
+    jac = {}
+    for key in _filter(_out, keys):
+        val = _out[key]
+        k = val.shape[1]
+
+        if mode == "fd-forward":
+            _jac = (val[n:n + n * l].reshape(n, l, k) - val[:n, None, :]) / h[:, :, None]
+        elif mode == "fd-central":
+            _jac = (val[n:n + n * l].reshape(n, l, k) - val[n + n * l:].reshape(n, l, k)) / (2 * h[:, :, None])
+        else:
+            _jac = np.imag(val[n:n + n * l].reshape(n, l, k)) / h[:, :, None]
+
+            if not is_complex_step_valid(val, _jac, r, hv, n, l):
+                warnings.warn("The complex step of %s does not match central differences - the function is not "
+                              "holomorphic. The jacobian matrices are calculated by central differences instead." % key)
+                return calc_jacobian_fd(fun, x, keys, mode="fd-central", colors=colors, wrt=wrt)
+
+        jac[key] = _jac.transpose(0, 2, 1)
+
+    # the values evaluated with a complex input are real for real x
+    if mode == "complex-step":
+        out = {key: (np.real(val) if isinstance(val, np.ndarray) and np.iscomplexobj(val) else val)
+               for key, val in out.items()}
+
+    return out, jac
+
+
+# whether the directional derivatives of the complex step match the ones of central differences along v
+def is_complex_step_valid(val, jac, r, hv, n, l):
+    f, d = np.real(val[:n]), np.einsum("nlk,l->nk", jac, r)
+    _d = np.real(val[n + n * l:n + n * l + n] - val[n + n * l + n:]) / (2 * hv[:, None])
+
+    tol = 1e-4 * np.maximum(1.0, np.maximum(np.abs(f), np.abs(_d)))
+    return not np.any(np.abs(d - _d) > tol)
+
+
+# the seed matrix of size (n_var, n_passes) - the identity if no coloring is used
+def calc_seeds(n_var, colors, wrt=None):
+    if colors is None:
+        seeds = np.eye(n_var if wrt is None else len(wrt))
+    else:
+        seeds = (colors[:, None] == np.arange(colors.max() + 1)[None, :]).astype(float)
+
+    if wrt is None:
+        return seeds
+
+    # only the variables of the subset are seeded - all others are constant
+    _seeds = np.zeros((n_var, seeds.shape[1]))
+    _seeds[wrt] = seeds
+    return _seeds
+
+
+def calc_jacobian_mode(n_var, n_outputs):
+    """
+    Forward mode needs one pass for each variable, reverse mode one backward pass for each output. The mode with
+    the lower cost is used - a backward pass is slightly more expensive than a forward pass.
+    """
+    return "forward" if n_var <= REVERSE_PASS_COST * n_outputs else "reverse"
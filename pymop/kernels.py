@@ -0,0 +1,406 @@
+"""
+Fused kernels of the classic test problems (ZDT, DTLZ, CTP and G). Each kernel loops over the rows of x and writes
+the objectives F and the constraints G of a row directly - without any temporary arrays. The kernels are compiled by
+Numba (numba.njit) when they are used for the first time. Without compilation they are plain python functions which
+are only used to check their correctness.
+
+All kernels have the signature kernel(x, F, G, *params) where F and G are preallocated arrays of size
+(n_rows, n_obj) and (n_rows, n_constr).
+
+"""
+import importlib.util
+import math
+
+import numpy as np
+
+# the modes the kernels are used - "auto" if numba is installed, "numba" always and "numpy" never
+KERNEL_MODES = ["auto", "numba", "numpy"]
+
+# numba is only imported if a kernel is compiled
+HAS_NUMBA = importlib.util.find_spec("numba") is not None
+
+# each kernel is compiled only once - numba caches the machine code on disk as well
+_compiled = {}
+
+
+def get_kernel(fun, mode="auto"):
+    """
+    Returns the compiled kernel - or None if no kernel should be used for the given mode.
+    """
+
+    if mode not in KERNEL_MODES:
+        raise Exception("Unknown kernel mode %s! Allowed is %s." % (mode, KERNEL_MODES))
+
+    if mode == "numpy" or (mode == "auto" and not HAS_NUMBA):
+        return None
+
+    kernel = _compiled.get(fun)
+    if kernel is None:
+        try:
+            import numba
+        except ImportError:
+            raise Exception("The compiled kernels require numba. Please install it (pip install numba).")
+        kernel = _compiled.setdefault(fun, numba.njit(cache=True)(fun))
+
+    return kernel
+
+
+# ---------------------------------------------------------------------------------------------------------
+# ZDT
+# ---------------------------------------------------------------------------------------------------------
+
+
+def zdt1(x, F, G):
+    n, m = x.shape
+    for i in range(n):
+        s = 0.0
+        for j in range(1, m):
+            s += x[i, j]
+        g = 1.0 + 9.0 / (m - 1) * s
+
+        F[i, 0] = x[i, 0]
+        F[i, 1] = g * (1.0 - np.sqrt(x[i, 0] / g))
+
+
+def zdt2(x, F, G):
+    n, m = x.shape
+    for i in range(n):
+        s = 0.0
+        for j in range(1, m):
+            s += x[i, j]
+        g = 1.0 + 9.0 / (m - 1) * s
+
+        F[i, 0] = x[i, 0]
+        F[i, 1] = g * (1.0 - (x[i, 0] / g) ** 2)
+
+
+def zdt3(x, F, G):
+    n, m = x.shape
+    for i in range(n):
+        s = 0.0
+        for j in range(1, m):
+            s += x[i, j]
+        g = 1.0 + 9.0 / (m - 1) * s
+
+        f1 = x[i, 0]
+        F[i, 0] = f1
+        F[i, 1] = g * (1.0 - np.sqrt(f1 / g) - f1 / g * np.sin(10.0 * math.pi * f1))
+
+
+def zdt4(x, F, G):
+    n, m = x.shape
+    for i in range(n):
+        g = 1.0 + 10.0 * (m - 1)
+        for j in range(1, m):
+            g += x[i, j] * x[i, j] - 10.0 * np.cos(4.0 * math.pi * x[i, j])
+
+        F[i, 0] = x[i, 0]
+        F[i, 1] = g * (1.0 - np.sqrt(x[i, 0] / g))
+
+
+def zdt6(x, F, G):
+    n, m = x.shape
+    for i in range(n):
+        s = 0.0
+        for j in range(1, m):
+            s += x[i, j]
+        g = 1.0 + 9.0 * (s / (m - 1.0)) ** 0.25
+
+        f1 = 1.0 - np.exp(-4.0 * x[i, 0]) * np.sin(6.0 * math.pi * x[i, 0]) ** 6
+        F[i, 0] = f1
+        F[i, 1] = g * (1.0 - (f1 / g) ** 2)
+
+
+# ---------------------------------------------------------------------------------------------------------
+# DTLZ
+# ---------------------------------------------------------------------------------------------------------
+
+
+def dtlz1(x, F, G):
+    n, m = x.shape
+    M = F.shape[1]
+    k = m - M + 1
+
+    for i in range(n):
+        s = 0.0
+        for j in range(M - 1, m):
+            d = x[i, j] - 0.5
+            s += d * d - np.cos(20.0 * math.pi * d)
+        g = 100.0 * (k + s)
+
+        # the products of the position variables are accumulated - the objective l from the end ends with 1 - x_l
+        p = 0.5 * (1.0 + g)
+        for l in range(M - 1):
+            F[i, M - 1 - l] = p * (1.0 - x[i, l])
+            p *= x[i, l]
+        F[i, 0] = p
+
+
+def dtlz_spherical(x, F, G, alpha, distance, degenerated):
+    """
+    The objectives of DTLZ2-6 on the unit sphere: The distance is either 1 (g1 of DTLZ3), 2 (the squared distance
+    to 0.5 of DTLZ2, 4 and 5) or 3 (the sum of x^0.1 of DTLZ6). If degenerated, the angles (except the first one)
+    are contracted towards 0.5 depending on g (DTLZ5 and DTLZ6).
+    """
+    n, m = x.shape
+    M = F.shape[1]
+    k = m - M + 1
+
+    for i in range(n):
+        g = 0.0
+        for j in range(M - 1, m):
+            d = x[i, j] - 0.5
+            if distance == 1:
+                g += d * d - np.cos(20.0 * math.pi * d)
+            elif distance == 2:
+                g += d * d
+            else:
+                g += x[i, j] ** 0.1
+        if distance == 1:
+            g = 100.0 * (k + g)
+
+        # the cosines of the angles are accumulated - the objective l from the end ends with the sine of angle l
+        p = 1.0 + g
+        for l in range(M - 1):
+            theta = x[i, l]
+            if degenerated and l > 0:
+                theta = (1.0 + 2.0 * g * theta) / (2.0 * (1.0 + g))
+
+            a = theta ** alpha * math.pi / 2.0
+            F[i, M - 1 - l] = p * np.sin(a)
+            p *= np.cos(a)
+        F[i, 0] = p
+
+
+def dtlz7(x, F, G):
+    n, m = x.shape
+    M = F.shape[1]
+    k = m - M + 1
+
+    for i in range(n):
+        s = 0.0
+        for j in range(m - k, m):
+            s += x[i, j]
+        g = 1.0 + 9.0 / k * s
+
+        h = M
+        for j in range(M - 1):
+            f = x[i, j]
+            F[i, j] = f
+            h -= f / (1.0 + g) * (1.0 + np.sin(3.0 * math.pi * f))
+
+        F[i, M - 1] = (1.0 + g) * h
+
+
+# ---------------------------------------------------------------------------------------------------------
+# CTP
+# ---------------------------------------------------------------------------------------------------------
+
+
+def ctp1(x, F, G, multimodal, a, b):
+    n, m = x.shape
+    for i in range(n):
+
+        g = 1.0
+        if multimodal:
+            g += 10.0 * (m - 1)
+            for j in range(1, m):
+                g += x[i, j] ** 2 - 10.0 * np.cos(2.0 * math.pi * x[i, j])
+        else:
+            for j in range(1, m):
+                g += x[i, j]
+
+        f1 = x[i, 0]
+        F[i, 0], F[i, 1] = f1, g * np.exp(-f1 / g)
+
+    for j in range(G.shape[1]):
+        for i in range(n):
+            G[i, j] = - (F[i, 1] - a[j] * np.exp(-b[j] * F[i, 0]))
+
+
+def ctp(x, F, G, multimodal, constraints):
+    """
+    The problems CTP2-8 where each row of constraints are the parameters (theta, a, b, c, d, e) of one constraint.
+    """
+    n, m = x.shape
+
+    for i in range(n):
+
+        g = 1.0
+        if multimodal:
+            g += 10.0 * (m - 1)
+            for j in range(1, m):
+                g += x[i, j] ** 2 - 10.0 * np.cos(2.0 * math.pi * x[i, j])
+        else:
+            for j in range(1, m):
+                g += x[i, j]
+
+        f1 = x[i, 0]
+        F[i, 0], F[i, 1] = f1, g * (1.0 - np.sqrt(f1 / g))
+
+    # each constraint is evaluated for all rows at once - its parameters are the same for all of them
+    for j in range(constraints.shape[0]):
+        theta, a, b, c, d, e = constraints[j, 0], constraints[j, 1], constraints[j, 2], constraints[j, 3], \
+            constraints[j, 4], constraints[j, 5]
+        sin_theta, cos_theta = np.sin(theta), np.cos(theta)
+
+        for i in range(n):
+            f1, f2 = F[i, 0], F[i, 1]
+            u = sin_theta * (f2 - e) + cos_theta * f1
+
+            # the powers of one and two are calculated without pow - as numpy does for scalar exponents
+            if c != 1.0:
+                u = u ** c
+
+            v = np.abs(np.sin(b * math.pi * u))
+            v = v * v if d == 2.0 else v ** d
+
+            G[i, j] = - (cos_theta * (f2 - e) - sin_theta * f1 - a * v)
+
+
+# ---------------------------------------------------------------------------------------------------------
+# G
+# ---------------------------------------------------------------------------------------------------------
+
+
+def g1(x, F, G):
+    for i in range(x.shape[0]):
+        f = 0.0
+        for j in range(4):
+            f += 5.0 * x[i, j] - 5.0 * x[i, j] * x[i, j]
+        for j in range(4, 13):
+            f -= x[i, j]
+        F[i, 0] = f
+
+        G[i, 0] = 2 * x[i, 0] + 2 * x[i, 1] + x[i, 9] + x[i, 10] - 10
+        G[i, 1] = 2 * x[i, 0] + 2 * x[i, 2] + x[i, 9] + x[i, 11] - 10
+        G[i, 2] = 2 * x[i, 1] + 2 * x[i, 2] + x[i, 10] + x[i, 11] - 10
+        G[i, 3] = -8 * x[i, 0] + x[i, 9]
+        G[i, 4] = -8 * x[i, 1] + x[i, 10]
+        G[i, 5] = -8 * x[i, 2] + x[i, 11]
+        G[i, 6] = -2 * x[i, 3] - x[i, 4] + x[i, 9]
+        G[i, 7] = -2 * x[i, 5] - x[i, 6] + x[i, 10]
+        G[i, 8] = -2 * x[i, 7] - x[i, 8] + x[i, 11]
+
+
+def g2(x, F, G):
+    n, m = x.shape
+    for i in range(n):
+        a, b, c, p, s = 0.0, 2.0, 0.0, 1.0, 0.0
+        for j in range(m):
+            cos2 = np.cos(x[i, j]) ** 2
+            a += cos2 * cos2
+            b *= cos2
+            c += (j + 1) * x[i, j] ** 2
+            p *= x[i, j]
+            s += x[i, j]
+
+        c = np.sqrt(c)
+        if c == 0:
+            c = 1e-20
+
+        F[i, 0] = -np.abs((a - b) / c)
+        G[i, 0] = -p + 0.75
+        G[i, 1] = s - 7.5 * m
+
+
+def g3(x, F, G):
+    n, m = x.shape
+    for i in range(n):
+        p, s = 1.0, 0.0
+        for j in range(m):
+            p *= x[i, j]
+            s += x[i, j] ** 2
+
+        F[i, 0] = -np.sqrt(m) ** m * p
+        G[i, 0] = np.abs(s - 1) - 1e-4
+
+
+def g4(x, F, G):
+    for i in range(x.shape[0]):
+        x0, x1, x2, x3, x4 = x[i, 0], x[i, 1], x[i, 2], x[i, 3], x[i, 4]
+        F[i, 0] = 5.3578547 * x2 ** 2 + 0.8356891 * x0 * x4 + 37.293239 * x0 - 40792.141
+
+        u = 85.334407 + 0.0056858 * x1 * x4 + 0.0006262 * x0 * x3 - 0.0022053 * x2 * x4
+        v = 80.51249 + 0.0071317 * x1 * x4 + 0.0029955 * x0 * x1 + 0.0021813 * x2 ** 2
+        w = 9.300961 + 0.0047026 * x2 * x4 + 0.0012547 * x0 * x2 + 0.0019085 * x2 * x3
+
+        G[i, 0], G[i, 1] = -u, u - 92
+        G[i, 2], G[i, 3] = -v + 90, v - 110
+        G[i, 4], G[i, 5] = -w + 20, w - 25
+
+
+def g5(x, F, G):
+    for i in range(x.shape[0]):
+        x0, x1, x2, x3 = x[i, 0], x[i, 1], x[i, 2], x[i, 3]
+        F[i, 0] = 3 * x0 + 1e-6 * x0 ** 3 + 2 * x1 + 2e-6 / 3 * x1 ** 3
+
+        G[i, 0] = x2 - x3 - 0.55
+        G[i, 1] = x3 - x2 - 0.55
+        G[i, 2] = np.abs(1000 * (np.sin(-x2 - 0.25) + np.sin(-x3 - 0.25)) + 894.8 - x0) - 1e-4
+        G[i, 3] = np.abs(1000 * (np.sin(x2 - 0.25) + np.sin(x2 - x3 - 0.25)) + 894.8 - x1) - 1e-4
+        G[i, 4] = np.abs(1000 * (np.sin(x3 - 0.25) + np.sin(x3 - x2 - 0.25)) + 1294.8) - 1e-4
+
+
+def g6(x, F, G):
+    for i in range(x.shape[0]):
+        x0, x1 = x[i, 0], x[i, 1]
+        F[i, 0] = (x0 - 10) ** 3 + (x1 - 20) ** 3
+
+        G[i, 0] = -(x0 - 5) ** 2 - (x1 - 5) ** 2 + 100
+        G[i, 1] = (x0 - 6) ** 2 + (x1 - 5) ** 2 - 82.81
+
+
+def g7(x, F, G):
+    for i in range(x.shape[0]):
+        x0, x1, x2, x3, x4 = x[i, 0], x[i, 1], x[i, 2], x[i, 3], x[i, 4]
+        x5, x6, x7, x8, x9 = x[i, 5], x[i, 6], x[i, 7], x[i, 8], x[i, 9]
+
+        F[i, 0] = x0 ** 2 + x1 ** 2 + x0 * x1 - 14 * x0 - 16 * x1 + (x2 - 10) ** 2 + 4 * (x3 - 5) ** 2 \
+            + (x4 - 3) ** 2 + 2 * (x5 - 1) ** 2 + 5 * x6 ** 2 + 7 * (x7 - 11) ** 2 + 2 * (x8 - 10) ** 2 \
+            + (x9 - 7) ** 2 + 45
+
+        G[i, 0] = 4 * x0 + 5 * x1 - 3 * x6 + 9 * x7 - 105
+        G[i, 1] = 10 * x0 - 8 * x1 - 17 * x6 + 2 * x7
+        G[i, 2] = -8 * x0 + 2 * x1 + 5 * x8 - 2 * x9 - 12
+        G[i, 3] = 3 * (x0 - 2) ** 2 + 4 * (x1 - 3) ** 2 + 2 * x2 ** 2 - 7 * x3 - 120
+        G[i, 4] = 5 * x0 ** 2 + 8 * x1 + (x2 - 6) ** 2 - 2 * x3 - 40
+        G[i, 5] = 0.5 * (x0 - 8) ** 2 + 2 * (x1 - 4) ** 2 + 3 * x4 ** 2 - x5 - 30
+        G[i, 6] = x0 ** 2 + 2 * (x1 - 2) ** 2 - 2 * x0 * x1 + 14 * x4 - 6 * x5
+        G[i, 7] = -3 * x0 + 6 * x1 + 12 * (x8 - 8) ** 2 - 7 * x9
+
+
+def g8(x, F, G):
+    for i in range(x.shape[0]):
+        x0, x1 = x[i, 0], x[i, 1]
+        F[i, 0] = -(np.sin(2 * math.pi * x0) ** 3 * np.sin(2 * math.pi * x1)) / (x0 ** 3 * (x0 + x1))
+
+        G[i, 0] = x0 ** 2 - x1 + 1
+        G[i, 1] = 1 - x0 + (x1 - 4) ** 2
+
+
+def g9(x, F, G):
+    for i in range(x.shape[0]):
+        x0, x1, x2, x3, x4, x5, x6 = x[i, 0], x[i, 1], x[i, 2], x[i, 3], x[i, 4], x[i, 5], x[i, 6]
+
+        F[i, 0] = (x0 - 10) ** 2 + 5 * (x1 - 12) ** 2 + x2 ** 4 + 3 * (x3 - 11) ** 2 + 10 * x4 ** 6 \
+            + 7 * x5 ** 2 + x6 ** 4 - 4 * x5 * x6 - 10 * x5 - 8 * x6
+
+        v1, v2 = 2 * x0 ** 2, x1 ** 2
+        G[i, 0] = v1 + 3 * v2 ** 2 + x2 + 4 * x3 ** 2 + 5 * x4 - 127
+        G[i, 1] = 7 * x0 + 3 * x1 + 10 * x2 ** 2 + x3 - x4 - 282
+        G[i, 2] = 23 * x0 + v2 + 6 * x5 ** 2 - 8 * x6 - 196
+        G[i, 3] = 2 * v1 + v2 - 3 * x0 * x1 + 2 * x2 ** 2 + 5. * x5 - 11 * x6
+
+
+def g10(x, F, G):
+    for i in range(x.shape[0]):
+        x0, x1, x2, x3, x4, x5, x6, x7 = x[i, 0], x[i, 1], x[i, 2], x[i, 3], x[i, 4], x[i, 5], x[i, 6], x[i, 7]
+        F[i, 0] = x0 + x1 + x2
+
+        G[i, 0] = -1 + 0.0025 * (x3 + x5)
+        G[i, 1] = -1 + 0.0025 * (-x3 + x4 + x6)
+        G[i, 2] = -1 + 0.01 * (-x4 + x7)
+        G[i, 3] = 100 * x0 - x0 * x5 + 833.33252 * x3 - 83333.333
+        G[i, 4] = x1 * x3 - x1 * x6 - 1250 * x3 + 1250 * x4
+        G[i, 5] = x2 * x4 - x2 * x7 - 2500. * x4 + 1250000
@@ -0,0 +1,151 @@
+import bisect
+import json
+import threading
+import time
+
+# the phases of an evaluation the wall time is measured for
+PHASES = ["validation", "evaluate", "jacobian", "hessian", "cv"]
+
+# the upper bounds (in seconds) of the buckets of the timing histograms: 1us, 2us, 5us, ..., 50s
+TIME_BOUNDS = [m * 10.0 ** e for e in range(-6, 2) for m in [1, 2, 5]]
+
+# the upper bounds of the buckets of the batch size histogram: 1, 2, 4, ..., 2^24
+BATCH_SIZE_BOUNDS = [2 ** e for e in range(25)]
+
+
+class Histogram:
+    """
+    A histogram with fixed buckets. Each bucket counts the values smaller or equal than its upper bound (and larger
+    than the upper bound of the previous one), the last bucket counts all values larger than the last bound.
+    """
+
+    def __init__(self, bounds):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.n = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.n += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def mean(self):
+        return self.total / self.n if self.n > 0 else None
+
+    def to_dict(self):
+        return {"bounds": self.bounds, "counts": self.counts, "n": self.n, "total": self.total,
+                "mean": self.mean(), "min": self.min, "max": self.max}
+
+
+class Metrics:
+    """
+    Collects metrics about the evaluations of a problem: The number of evaluations and rows, the distribution
+    of the batch sizes and the wall time spent in each phase (validation, evaluate, jacobian, hessian, cv) of an
+    evaluation. Hooks can be registered which are called before and after each evaluation.
+
+    If a trace file is provided, each evaluation and each evaluated batch of rows is appended as one JSON line.
+    Please note, that if a problem is evaluated by a pool of processes the phases of the batches are measured in
+    the workers and therefore not recorded.
+
+    """
+
+    def __init__(self, trace=None):
+        """
+
+        Parameters
+        ----------
+        trace : str
+            The path of the JSONL file each record is appended to. If None, no trace is written.
+
+        """
+
+        self.n_evals = 0
+        self.n_rows = 0
+        self.n_batches = 0
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BOUNDS)
+        self.times = {phase: Histogram(TIME_BOUNDS) for phase in PHASES}
+        self.total_time = Histogram(TIME_BOUNDS)
+
+        # functions called with (problem, X, return_values_of) before and (problem, X, out) after each evaluation
+        self.before = []
+        self.after = []
+
+        self.trace = trace
+        self.file = open(trace, "a") if trace is not None else None
+
+        self.lock = threading.Lock()
+
+    def add_hooks(self, before=None, after=None):
+        if before is not None:
+            self.before.append(before)
+        if after is not None:
+            self.after.append(after)
+
+    def notify_before(self, problem, X, return_values_of):
+        for hook in self.before:
+            hook(problem, X, return_values_of)
+
+    def notify_after(self, problem, X, out):
+        for hook in self.after:
+            hook(problem, X, out)
+
+    def record_evaluation(self, problem, n_rows, return_values_of, validation, total):
+        with self.lock:
+            self.n_evals += 1
+            self.n_rows += n_rows
+            self.times["validation"].add(validation)
+            self.total_time.add(total)
+
+            if self.file is not None:
+                self._write({"type": "evaluation", "problem": problem.name(), "time": time.time(), "n_rows": n_rows,
+                             "return_values_of": list(return_values_of), "validation": validation, "total": total})
+
+    def record_batch(self, problem, n_rows, times):
+        with self.lock:
+            self.n_batches += 1
+            self.batch_sizes.add(n_rows)
+            for phase, value in times.items():
+                self.times[phase].add(value)
+
+            if self.file is not None:
+                self._write({"type": "batch", "problem": problem.name(), "time": time.time(), "n_rows": n_rows,
+                             "times": times})
+
+    def _write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def summary(self):
+        """
+        Returns
+        -------
+        summary : dict
+            All metrics collected so far - the histograms as dictionaries.
+        """
+        with self.lock:
+            return {
+                "n_evals": self.n_evals,
+                "n_rows": self.n_rows,
+                "n_batches": self.n_batches,
+                "batch_sizes": self.batch_sizes.to_dict(),
+                "times": {phase: self.times[phase].to_dict() for phase in PHASES},
+                "total_time": self.total_time.to_dict()
+            }
+
+    def export(self, fname):
+        """
+        Appends the summary of all metrics collected so far as one JSON line to the given file.
+        """
+        with open(fname, "a") as f:
+            f.write(json.dumps({"type": "summary", **self.summary()}) + "\n")
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
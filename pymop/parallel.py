@@ -0,0 +1,309 @@
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor, Future
+
+import numpy as np
+
+from pymop.sparsity import concatenate
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:
+    shared_memory, resource_tracker = None, None
+
+# the environment variables limiting the number of threads the BLAS libraries are allowed to use
+BLAS_THREADS_ENV = ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "VECLIB_MAXIMUM_THREADS",
+                    "NUMEXPR_NUM_THREADS"]
+
+
+def get_pool(problem, parallelization, n_workers=None):
+    """
+    Returns the pool of the problem to evaluate with. The pool is only created once and then kept alive
+    (and warm) until the problem is shut down or a different kind of pool is requested.
+
+    Parameters
+    ----------
+    problem : Problem
+        The problem to be evaluated by the workers of the pool.
+
+    parallelization : str
+        The kind of the pool - either "process" or "threads".
+
+    n_workers : int
+        The number of workers. By default the number of cpus.
+
+    """
+
+    n_workers = calc_n_workers(parallelization, n_workers)
+
+    with problem._lock:
+        pool = getattr(problem, "_pool", None)
+
+        if pool is not None and not (pool.parallelization == parallelization and pool.n_workers == n_workers):
+            pool.close()
+            pool = None
+
+        if pool is None:
+            pool = POOLS[parallelization](problem, n_workers)
+            problem._pool = pool
+
+    return pool
+
+
+def create_pool(problem, parallelization, n_workers=None):
+    """
+    Creates a new pool which is owned by the caller - it is not shared with Problem.evaluate and needs to be
+    closed by the caller.
+    """
+    return POOLS[parallelization](problem, calc_n_workers(parallelization, n_workers))
+
+
+def calc_n_workers(parallelization, n_workers):
+    if parallelization not in POOLS:
+        raise Exception("Unknown parallelization %s! Allowed is %s." % (parallelization, list(POOLS.keys())))
+    return os.cpu_count() if n_workers is None else n_workers
+
+
+# splits n rows into at most n_shards contiguous shards of (almost) equal size
+def calc_shards(n, n_shards):
+    bounds = np.linspace(0, n, min(n, n_shards) + 1).astype(int)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+# ---------------------------------------------------------------------------------------------------------
+# Process Pool
+# ---------------------------------------------------------------------------------------------------------
+
+
+# the problem a worker process evaluates - it is sent only once when the worker is started
+_problem = None
+
+
+def _init_worker(problem, blas_threads):
+    global _problem
+    _problem = problem
+
+    # the environment variables are set before spawning, if the process was forked the limits are set directly
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(blas_threads)
+    except ImportError:
+        pass
+
+
+def _evaluate_shard(X, start, end, outputs, return_values_of, args, kwargs):
+    attached = []
+
+    # if X lives in shared memory read the rows of this shard directly from there
+    if isinstance(X, SharedArray):
+        shm, _X = X.attach()
+        attached.append(shm)
+        X = np.array(_X[start:end])
+        del _X
+
+    out = _problem._evaluate_batch(X, return_values_of, *args, **kwargs)
+
+    # write all values with the expected layout into shared memory - everything else is returned
+    ret = {}
+    for key, val in out.items():
+        buf = outputs.get(key)
+
+        if buf is not None and isinstance(val, np.ndarray) and val.shape == (end - start,) + buf.shape[1:] \
+                and val.dtype == buf.dtype:
+            shm, _val = buf.attach()
+            attached.append(shm)
+            _val[start:end] = val
+            del _val
+            ret[key] = True
+        else:
+            ret[key] = val
+
+    for shm in attached:
+        shm.close()
+
+    return ret
+
+
+def _evaluate_rows(X, return_values_of, args, kwargs):
+    return _problem._evaluate_batch(X, return_values_of, *args, **kwargs)
+
+
+def _collect(shards, rets, outputs):
+
+    # the values are either in shared memory or have been returned by the worker directly
+    out = {}
+    for key in rets[0].keys():
+        vals = []
+        for (start, end), ret in zip(shards, rets):
+            if ret[key] is True:
+                vals.append(outputs[key].array()[start:end])
+            else:
+                vals.append(ret[key])
+
+        if any([val is None for val in vals]):
+            out[key] = None
+        else:
+            out[key] = concatenate(vals)
+
+    return out
+
+
+class SharedArray:
+    """
+    A reference to an array in shared memory which can be sent to a worker without copying its content.
+    """
+
+    def __init__(self, shape, dtype):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.n_bytes = max(1, int(np.prod(self.shape)) * self.dtype.itemsize)
+        self.shm = shared_memory.SharedMemory(create=True, size=self.n_bytes)
+        self.name = self.shm.name
+
+    def __getstate__(self):
+        return {"shape": self.shape, "dtype": self.dtype, "n_bytes": self.n_bytes, "name": self.name, "shm": None}
+
+    def attach(self):
+        shm = shared_memory.SharedMemory(name=self.name)
+        return shm, np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+
+    def array(self):
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    def release(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ProcessPool:
+    """
+    Evaluates a problem by sharding the rows of X over a persistent pool of worker processes. Each worker
+    receives the problem once when it is started. If available, X and the results are exchanged through
+    shared memory.
+    """
+
+    parallelization = "process"
+
+    def __init__(self, problem, n_workers, blas_threads=1):
+        self.n_workers = n_workers
+        self.n_var = problem.n_var
+        self.n_obj = problem.n_obj
+        self.n_constr = problem.n_constr
+        self.dtype = problem.dtype
+        self.hessian_format = problem.hessian_format
+
+        # the workers need to share the resource tracker of this process to not release the shared memory twice
+        if resource_tracker is not None:
+            resource_tracker.ensure_running()
+
+        # pin the BLAS threads of the workers to avoid oversubscription - spawned workers inherit the environment
+        environ = {name: os.environ.get(name) for name in BLAS_THREADS_ENV}
+        try:
+            for name in BLAS_THREADS_ENV:
+                os.environ[name] = str(blas_threads)
+            self.pool = multiprocessing.Pool(n_workers, initializer=_init_worker, initargs=(problem, blas_threads))
+        finally:
+            for name, value in environ.items():
+                if value is None:
+                    del os.environ[name]
+                else:
+                    os.environ[name] = value
+
+    def evaluate(self, X, return_values_of, *args, **kwargs):
+        from pymop.problem import calc_output_layout
+
+        n = X.shape[0]
+
+        # without any rows there is nothing to shard - one worker evaluates the empty block (no shared memory needed)
+        if n == 0:
+            return self.pool.apply(_evaluate_rows, (X, return_values_of, args, kwargs))
+
+        shards = calc_shards(n, self.n_workers)
+
+        shared = []
+        try:
+
+            if shared_memory is not None:
+                _X = SharedArray(X.shape, X.dtype)
+                shared.append(_X)
+                _X.array()[:] = X
+
+                outputs = {}
+                for key in return_values_of:
+                    layout = calc_output_layout(self, key, n)
+                    if layout is not None:
+                        outputs[key] = SharedArray(*layout)
+                        shared.append(outputs[key])
+
+                tasks = [(_X, start, end, outputs, return_values_of, args, kwargs) for start, end in shards]
+
+            else:
+                outputs = {}
+                tasks = [(X[start:end], 0, end - start, outputs, return_values_of, args, kwargs)
+                         for start, end in shards]
+
+            rets = self.pool.starmap(_evaluate_shard, tasks)
+            out = _collect(shards, rets, outputs)
+
+        finally:
+            for e in shared:
+                e.release()
+
+        return out
+
+    def submit(self, X, return_values_of, *args, **kwargs):
+        future = Future()
+        self.pool.apply_async(_evaluate_rows, (X, return_values_of, args, kwargs),
+                              callback=future.set_result, error_callback=future.set_exception)
+        return future
+
+    def close(self, wait=False):
+        if wait:
+            self.pool.close()
+        else:
+            self.pool.terminate()
+        self.pool.join()
+
+
+# ---------------------------------------------------------------------------------------------------------
+# Thread Pool
+# ---------------------------------------------------------------------------------------------------------
+
+
+class ThreadPool:
+    """
+    Evaluates a problem by sharding the rows of X over a pool of threads. Most of the evaluation functions
+    consist of vectorized numpy operations which release the GIL - no pickling or spawning is necessary.
+    """
+
+    parallelization = "threads"
+
+    def __init__(self, problem, n_workers):
+        self.problem = problem
+        self.n_workers = n_workers
+        self.executor = ThreadPoolExecutor(max_workers=n_workers)
+
+    def evaluate(self, X, return_values_of, *args, **kwargs):
+        from pymop.problem import merge_outputs
+
+        # without any rows there is nothing to shard - the empty block is evaluated directly
+        if X.shape[0] == 0:
+            return self.problem._evaluate_batch(X, return_values_of, *args, **kwargs)
+
+        futures = [self.executor.submit(self.problem._evaluate_batch, X[start:end], return_values_of, *args, **kwargs)
+                   for start, end in calc_shards(X.shape[0], self.n_workers)]
+
+        return merge_outputs([future.result() for future in futures])
+
+    def submit(self, X, return_values_of, *args, **kwargs):
+        return self.executor.submit(self.problem._evaluate_batch, X, return_values_of, *args, **kwargs)
+
+    def close(self, wait=True):
+        self.executor.shutdown(wait=True)
+
+
+# all pools that can be used for parallelization
+POOLS = {
+    "process": ProcessPool,
+    "threads": ThreadPool
+}
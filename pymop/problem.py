@@ -1,3 +1,8 @@
+import asyncio
+import functools
+import operator
+import threading
+import time
 import warnings
 from abc import abstractmethod
 
@@ -5,7 +10,53 @@ import autograd
 import autograd.numpy as anp
 import numpy as np
 
-from pymop.gradient import run_and_trace, calc_jacobian
+from pymop.backend import get_backend, bind_namespace, BACKENDS, anp as namespace
+from pymop.gradient import calc_derivatives, calc_derivatives_forward_over_reverse, calc_directional_derivatives, \
+    calc_jacobian_forward, calc_jacobian_fd, calc_jacobian_mode, calc_hessian_shape, pack_hessian, JACOBIAN_MODES, \
+    FD_STEPS, HESSIAN_FORMATS
+from pymop.kernels import get_kernel, KERNEL_MODES
+from pymop.metrics import Metrics
+from pymop.parallel import get_pool
+from pymop.sparsity import detect_sparsity, color_columns, decompress, to_sparse, is_sparse, concatenate, \
+    coo_matrix, select_columns
+
+
+def option(name, validate):
+    """
+    An option of the evaluation which is validated whenever it is set. The plans, sparsity patterns and compiled
+    functions of the problem as well as its pool of workers depend on the options and are discarded if one changes.
+    The value is read by a plain attribute lookup as the options are read during every evaluation.
+    """
+
+    def fset(problem, value):
+        validate(value)
+        problem.__dict__["_" + name] = value
+        problem._discard_compiled()
+
+    return property(operator.attrgetter("_" + name), fset)
+
+
+def one_of(name, allowed):
+    def validate(value):
+        if value not in allowed:
+            raise Exception("Unknown %s %s! Allowed is %s." % (name, value, allowed))
+
+    return validate
+
+
+def validate_dtype(dtype):
+    if dtype is not None and np.dtype(dtype).kind != "f":
+        raise Exception("The precision of the evaluation needs to be a floating point type and not %s!" % dtype)
+
+
+def validate_fd_step(fd_step):
+    if fd_step is not None and not fd_step > 0:
+        raise Exception("The step size of the finite differences needs to be positive and not %s!" % fd_step)
+
+
+def validate_jacobian_sparsity(sparsity):
+    if not (sparsity is None or isinstance(sparsity, dict) or (isinstance(sparsity, str) and sparsity == "auto")):
+        raise Exception("The jacobian sparsity needs to be None, auto or a dictionary and not %s!" % sparsity)
 
 
 class Problem:
@@ -16,7 +67,19 @@ class Problem:
     and ideal point are stored.
     """
 
-    def __init__(self, n_var=-1, n_obj=-1, n_constr=0, xl=None, xu=None, type_var=np.double, evaluation_of="auto"):
+    # the options of the evaluation - see __init__
+    dtype = option("dtype", validate_dtype)
+    jacobian_mode = option("jacobian_mode", one_of("jacobian mode", JACOBIAN_MODES))
+    fd_step = option("fd_step", validate_fd_step)
+    jacobian_sparsity = option("jacobian_sparsity", validate_jacobian_sparsity)
+    jacobian_format = option("jacobian_format", one_of("jacobian format", ["dense", "sparse"]))
+    hessian_format = option("hessian_format", one_of("hessian format", HESSIAN_FORMATS))
+    backend = option("backend", one_of("backend", BACKENDS))
+    kernels = option("kernels", one_of("kernel mode", KERNEL_MODES))
+
+    def __init__(self, n_var=-1, n_obj=-1, n_constr=0, xl=None, xu=None, type_var=np.double, evaluation_of="auto",
+                 dtype=None, jacobian_mode="auto", fd_step=None, jacobian_sparsity=None, jacobian_format="dense",
+                 hessian_format="dense", backend="autograd", kernels="auto"):
         """
 
         Parameters
@@ -33,6 +96,44 @@ class Problem:
             upper bounds for the variable. if integer all upper bounds are equal.
         type_var : numpy type
             type of the variable to be evaluated. Can also be np.object if it is a complex data type
+        dtype : numpy type
+            floating point precision of the evaluation, e.g. np.float32. The input, all values returned and the
+            pareto front are kept in this precision - intermediate values are only if the evaluation function does
+            not upcast them. If None the precision of the input is used.
+        jacobian_mode : str
+            mode autograd calculates the jacobian matrices with - "forward", "reverse" or "auto" to choose the
+            mode with fewer passes (n_var compared to the number of outputs). If the evaluation function can not be
+            traced by autograd (plain numpy, scipy or external solvers), "fd-forward", "fd-central" or
+            "complex-step" calculate the jacobian matrices by finite differences instead. The complex step requires
+            an evaluation function of analytic operations only (no abs, maximum or comparisons) - otherwise central
+            differences are used with a warning.
+        fd_step : float
+            step size of the finite differences (relative to max(1, |x|)) or the complex step (absolute).
+            If None a default depending on the scheme is used.
+        jacobian_sparsity : str or dict
+            if "auto" the sparsity pattern of the jacobian matrices is detected by probing and the variables are
+            colored such that one forward pass (or finite difference) is needed for each color only. A dictionary
+            declares the boolean pattern of size (n_outputs, n_var) for each output, e.g. {"G": pattern}. If None
+            the sparsity is not exploited.
+        jacobian_format : str
+            "dense" returns the jacobian matrices as arrays of size (n, n_outputs, n_var), "sparse" as a
+            scipy.sparse.coo_matrix of size (n * n_outputs, n_var) - this requires scipy.
+        hessian_format : str
+            "dense" returns the full symmetric hessian matrices of size (n, n_outputs, n_var, n_var), "packed" only
+            their upper triangle row by row (n, n_outputs, n_var * (n_var + 1) / 2) and "diagonal" only their
+            diagonal (n, n_outputs, n_var). Use pymop.gradient.unpack_hessian to restore packed matrices.
+        backend : str
+            the library the derivatives are calculated with - "autograd" or "jax" which compiles the evaluation
+            together with the jacobian and hessian matrices (requires jax). The evaluation function needs to use
+            anp (pymop.backend) to be traced by jax - otherwise autograd is used.
+        kernels : str
+            if only the values are requested (no derivatives) problems with a fused kernel (pymop.kernels) are
+            evaluated by it - "numba" always (requires numba), "auto" if numba is installed and "numpy" never.
+            A subclass overriding any method of such a problem (except the pareto front, pareto set or name) is
+            always evaluated by its evaluation function.
+
+        All options of the evaluation (dtype to kernels) are validated and can also be changed after the problem
+        has been created.
         """
 
         # number of variable for this problem
@@ -41,6 +142,28 @@ class Problem:
         # type of the variable to be evaluated
         self.type_var = type_var
 
+        # floating point precision of the evaluation
+        self.dtype = dtype
+
+        # the mode autograd uses for the jacobian matrices
+        self.jacobian_mode = jacobian_mode
+
+        # the step size if the jacobian matrices are calculated by finite differences
+        self.fd_step = fd_step
+
+        # the sparsity of the jacobian matrices and the format they are returned in
+        self.jacobian_sparsity = jacobian_sparsity
+        self.jacobian_format = jacobian_format
+
+        # the storage of the hessian matrices
+        self.hessian_format = hessian_format
+
+        # the library the derivatives are calculated with
+        self.backend = backend
+
+        # whether the values are evaluated by the compiled kernel of the problem (if it provides one)
+        self.kernels = kernels
+
         # number of objectives
         self.n_obj = n_obj
 
@@ -61,6 +184,12 @@ class Problem:
         # the pareto set of this problem
         self._pareto_set = None
 
+        # guards the lazily calculated attributes if the problem is shared by several threads
+        self._lock = threading.RLock()
+
+        # the metrics collected for each evaluation - disabled by default
+        self._metrics = None
+
         # actually defines what _evaluate is setting during the evaluation
         if evaluation_of == "auto":
             # by default F is set, and G if the problem does have constraints
@@ -102,7 +231,9 @@ class Problem:
             For a single-objective problem only one point is returned but still in a two dimensional array.
         """
         if self._pareto_front is None:
-            self._pareto_front = self._calc_pareto_front(*args, **kwargs)
+            with self._lock:
+                if self._pareto_front is None:
+                    self._pareto_front = cast_to(self._calc_pareto_front(*args, **kwargs), self.dtype)
 
         return self._pareto_front
 
@@ -114,7 +245,9 @@ class Problem:
             Returns the pareto set for a problem. Points in the X space to be known to be optimal!
         """
         if self._pareto_set is None:
-            self._pareto_set = self._calc_pareto_set(*args, **kwargs)
+            with self._lock:
+                if self._pareto_set is None:
+                    self._pareto_set = cast_to(self._calc_pareto_set(*args, **kwargs), self.dtype)
 
         return self._pareto_set
 
@@ -123,6 +256,16 @@ class Problem:
                  *args,
                  return_values_of="auto",
                  return_as_dictionary=False,
+                 chunk_size=None,
+                 memory_budget=None,
+                 parallelization=None,
+                 n_workers=None,
+                 cache=None,
+                 buffers=None,
+                 V=None,
+                 weights=None,
+                 multipliers=None,
+                 wrt=None,
                  **kwargs):
 
         """
@@ -148,7 +291,59 @@ class Problem:
             the problem has constraints) are returned. Otherwise, you can provide a list of values to be returned.
 
             Allowed is ["F", "CV", "G", "dF", "dG", "dCV", "hF", "hG", "hCV", "feasible"] where the d stands for
-            derivative and h stands for hessian matrix.
+            derivative and h stands for hessian matrix. The derivatives of the constraint violation are the sums of
+            the derivatives of all violated constraints (G > 0) - no additional evaluation is necessary.
+
+            Without calculating any full jacobian or hessian matrix, "dF_v" and "dG_v" are the directional
+            derivatives along the directions V (one forward pass), "hF_v" and "hG_v" the hessian-vector products and
+            "hL_v" the one of the lagrangian L = sum(weights * F) + sum(multipliers * G). The hessian of the
+            lagrangian itself is "hL".
+
+        chunk_size : int
+            If provided, X is split into blocks of at most chunk_size rows. Each block is evaluated (including
+            the derivatives and the constraint violation) on its own and the results are stitched together
+            afterwards. This bounds the peak memory without changing the results.
+
+        memory_budget : int
+            Alternatively to chunk_size, the approximate number of bytes the results of one block are allowed to
+            occupy. The chunk size is then derived from the values to be returned.
+
+        parallelization : str
+            If "process", the rows of X are sharded over a persistent pool of worker processes, if "threads" over
+            a pool of threads. The pool is created with the first call and kept alive until shutdown is called.
+            The results are identical to the serial evaluation.
+
+        n_workers : int
+            The number of workers used for the parallelization. By default the number of cpus.
+
+        cache : pymop.cache.EvaluationCache
+            If provided, rows which have been evaluated before are served from the cache and only the remaining ones
+            are evaluated.
+
+        buffers : dict
+            Preallocated arrays (for instance for "F", "G", "CV" or "feasible") the results are written into. They
+            need to have the shape of the value returned (for a single point the first dimension is omitted) and the
+            arrays themselves are returned. If all rows are evaluated at once and serially, CV and feasible are
+            calculated into their buffers and a compiled kernel writes F and G directly into theirs - otherwise
+            (and for the values of _evaluate) the results are copied into the buffers.
+
+        V : np.array
+            The directions of the directional derivatives and the hessian-vector products - one for all rows (n_var)
+            or one for each row (the same shape as X).
+
+        weights : np.array
+            The weights of the objectives in the lagrangian - one for all rows (n_obj) or one for each row.
+            By default all objectives are weighted by one.
+
+        multipliers : np.array
+            The multipliers of the constraints in the lagrangian - one for all rows (n_constr) or one for each row.
+            By default zero.
+
+        wrt : list
+            The indices (or a boolean mask) of the variables the jacobian matrices ("dF", "dG" and "dCV") are
+            calculated with respect to. The matrices then only have a column for each of these variables in the given
+            order. In forward mode and for finite differences only these variables are seeded - the cost then scales
+            with the size of the subset and not with n_var. By default all variables.
 
 
         Returns
@@ -158,112 +353,673 @@ class Problem:
 
         """
 
+        metrics = self._metrics
+        if metrics is not None:
+            start = time.perf_counter()
+
+        plan = self._get_plan(return_values_of, wrt=wrt)
+
+        # a single point without any further options does not need the machinery for evaluating blocks of rows
+        if type(X) is np.ndarray and X.ndim == 1 and not plan.use_autograd and chunk_size is None \
+                and memory_budget is None and parallelization is None and cache is None and metrics is None \
+                and self.jacobian_format == "dense" and self.hessian_format == "dense" and plan.wrt is None:
+            views = calc_buffer_views(self, plan, buffers, 1, True)
+            return self._evaluate_point(X, plan, return_as_dictionary, buffers, views, *args, **kwargs)
+
         # make the array at least 2-d - even if only one row should be evaluated
         only_single_value = len(np.shape(X)) == 1
-        X = np.atleast_2d(X)
+        X = cast_to(np.atleast_2d(X), self.dtype)
 
         # check the dimensionality of the problem and the given input
         if X.shape[1] != self.n_var:
             raise Exception('Input dimension %s are not equal to n_var %s!' % (X.shape[1], self.n_var))
 
+        return_values_of = plan.return_values_of
+
+        # the subset of variables is passed along with the rows to each block (and is part of the key of the cache)
+        if plan.wrt is not None:
+            kwargs["wrt"] = plan.wrt
+
+        if metrics is not None:
+            validation = time.perf_counter() - start
+            metrics.notify_before(self, X, return_values_of)
+
+        # the function evaluating a block of rows - either directly or by a pool of workers
+        evaluate_batch = self._get_evaluate_batch(parallelization, n_workers)
+
+        # the number of rows evaluated at once - by default all of them
+        chunk_size = calc_chunk_size(self, return_values_of, chunk_size=chunk_size, memory_budget=memory_budget)
+
+        def evaluate_rows(X):
+            if chunk_size is None or X.shape[0] <= chunk_size:
+                return evaluate_batch(X, return_values_of, *args, **kwargs)
+            else:
+                return merge_outputs([evaluate_batch(X[k:k + chunk_size], return_values_of, *args, **kwargs)
+                                      for k in range(0, X.shape[0], chunk_size)])
+
+        # the directions and weights of the hessian products are attached to the rows and split along with them
+        _X = attach_columns(self, plan, X, V=V, weights=weights, multipliers=multipliers)
+
+        # the values of a serial evaluation of all rows at once are written into the buffers directly
+        if cache is None and parallelization is None and (chunk_size is None or X.shape[0] <= chunk_size):
+            views = calc_buffer_views(self, plan, buffers, np.shape(_X)[0], only_single_value)
+            out = self._evaluate_batch(_X, return_values_of, *args, buffers=views, **kwargs)
+        elif cache is None:
+            out = evaluate_rows(_X)
+        else:
+            if self.jacobian_format == "sparse" and any([is_jacobian(val) for val in plan.return_values_of]):
+                raise Exception("Sparse jacobian matrices can not be cached.")
+            out = cache.evaluate(self, _X, return_values_of, evaluate_rows, *args, **kwargs)
+
+        if metrics is not None:
+            metrics.notify_after(self, X, out)
+            metrics.record_evaluation(self, X.shape[0], return_values_of, validation, time.perf_counter() - start)
+
+        return self._format_output(out, return_values_of, only_single_value, return_as_dictionary, buffers=buffers)
+
+    def evaluate_iter(self,
+                      X,
+                      *args,
+                      return_values_of="auto",
+                      return_as_dictionary=False,
+                      chunk_size=None,
+                      memory_budget=None,
+                      parallelization=None,
+                      n_workers=None,
+                      **kwargs):
+        """
+        Evaluates X block by block and yields the results of each block as soon as they are available.
+        The values yielded are of the same form as the ones returned by evaluate, but only for the rows of
+        the current block. If neither chunk_size nor memory_budget is provided DEFAULT_MEMORY_BUDGET is used.
+
+        Parameters
+        ----------
+        X : np.array
+            A two dimensional matrix where each row is a point to evaluate and each column a variable.
+
+        chunk_size : int
+            The maximum number of rows evaluated at once.
+
+        memory_budget : int
+            The approximate number of bytes the results of one block are allowed to occupy.
+
+        parallelization : str
+            The parallelization used to evaluate each block (see evaluate).
+
+        n_workers : int
+            The number of workers used for the parallelization.
+
+        """
+
+        X = cast_to(np.atleast_2d(X), self.dtype)
+
+        if X.shape[1] != self.n_var:
+            raise Exception('Input dimension %s are not equal to n_var %s!' % (X.shape[1], self.n_var))
+
+        return_values_of = self._calc_return_values_of(return_values_of)
+
+        if chunk_size is None and memory_budget is None:
+            memory_budget = DEFAULT_MEMORY_BUDGET
+        chunk_size = calc_chunk_size(self, return_values_of, chunk_size=chunk_size, memory_budget=memory_budget)
+
+        evaluate_batch = self._get_evaluate_batch(parallelization, n_workers)
+
+        for k in range(0, X.shape[0], chunk_size):
+            out = evaluate_batch(X[k:k + chunk_size], return_values_of, *args, **kwargs)
+            yield self._format_output(out, return_values_of, False, return_as_dictionary)
+
+    async def evaluate_async(self, X, *args, executor=None, **kwargs):
+        """
+        Coroutine evaluating X without blocking the event loop. The evaluation runs in the given executor (by default
+        the one of the event loop) and all other arguments are the same as for evaluate.
+        To submit rows one by one and retrieve them as soon as they are finished use pymop.asynchronous.EvaluationQueue.
+
+        Parameters
+        ----------
+        executor : concurrent.futures.Executor
+            The executor to run the evaluation in.
+
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(executor, functools.partial(self.evaluate, X, *args, **kwargs))
+
+    @property
+    def metrics(self):
+        """
+        Returns
+        -------
+        metrics : pymop.metrics.Metrics
+            The metrics collected for the evaluations of this problem or None if disabled.
+        """
+        return self._metrics
+
+    def enable_metrics(self, trace=None):
+        """
+        Starts collecting metrics (counts, batch sizes and timings of each phase) for all evaluations of
+        this problem. Before and after hooks can be registered at the returned object.
+
+        Parameters
+        ----------
+        trace : str
+            The path of a JSONL file each evaluation is written to for offline analysis.
+
+        Returns
+        -------
+        metrics : pymop.metrics.Metrics
+            The object the metrics are collected in.
+
+        """
+        self.disable_metrics()
+        self._metrics = Metrics(trace=trace)
+        return self._metrics
+
+    def disable_metrics(self):
+        if self._metrics is not None:
+            self._metrics.close()
+            self._metrics = None
+
+    def verify_gradient(self, X=None, n_points=100, seed=1):
+        """
+        Compares the derivatives provided by the evaluation function (see evaluation_of) with the ones calculated
+        by autograd. If no points are given they are sampled randomly within the bounds.
+
+        Parameters
+        ----------
+        X : np.array
+            The points the derivatives are compared at.
+
+        n_points : int
+            The number of random points if X is None.
+
+        seed : int
+            The random seed of the points - the global random state is not changed.
+
+        Returns
+        -------
+        errors : dict
+            The maximum deviation max|analytic - autograd| / (1 + max|autograd|) for each derivative.
+
+        """
+
+        keys = [val for val in self.evaluation_of if val.startswith("d") or val.startswith("h")]
+
+        if X is None:
+            xl = np.zeros(self.n_var) if self.xl is None else self.xl
+            xu = np.ones(self.n_var) if self.xu is None else self.xu
+            X = xl + np.random.RandomState(seed).random_sample((n_points, self.n_var)) * (xu - xl)
+
+        X = cast_to(np.atleast_2d(X), self.dtype)
+
+        analytic = self._evaluate_batch(X, keys)
+        autograd = self._evaluate_with_derivatives(X, self._get_plan(keys, analytic=False), None, {})
+
+        errors = {}
+        for key in keys:
+            if analytic[key] is not None and autograd[key] is not None:
+                errors[key] = np.max(np.abs(analytic[key] - autograd[key])) / (1 + np.max(np.abs(autograd[key])))
+
+        return errors
+
+    def shutdown(self):
+        """
+        Shuts down the pool of workers used for parallel evaluations. If evaluated in parallel again
+        a new pool is started.
+        """
+        pool = getattr(self, "_pool", None)
+        if pool is not None:
+            pool.close()
+            self._pool = None
+
+    def _discard_compiled(self):
+        # the plans, sparsity patterns and compiled functions were created for the previous options
+        for name in ["_plans", "_jacobian_patterns", "_compiled"]:
+            self.__dict__.pop(name, None)
+
+        # the workers of a process pool keep a copy of the problem with the previous options
+        self.shutdown()
+
+    def _get_evaluate_batch(self, parallelization, n_workers):
+        if parallelization is None:
+            return self._evaluate_batch
+        else:
+            return get_pool(self, parallelization, n_workers=n_workers).evaluate
+
+    def _get_plan(self, return_values_of, analytic=True, wrt=None):
+
+        # the plans are compiled once for each combination of values to be returned
+        key = return_values_of if type(return_values_of) == str else tuple(return_values_of)
+        key = key if analytic else ("autograd", key)
+
+        if wrt is not None:
+            wrt = calc_wrt(self, wrt)
+            key = (key, tuple(wrt))
+
+        plans = self.__dict__.get("_plans")
+        if plans is None:
+            plans = self.__dict__.setdefault("_plans", {})
+
+        plan = plans.get(key)
+        if plan is None:
+            plan = plans.setdefault(key, EvaluationPlan(self, self._calc_return_values_of(return_values_of),
+                                                        analytic=analytic, wrt=wrt))
+
+        return plan
+
+    def _evaluate_point(self, x, plan, return_as_dictionary, buffers, views, *args, **kwargs):
+
+        if x.shape[0] != self.n_var:
+            raise Exception('Input dimension %s are not equal to n_var %s!' % (x.shape[0], self.n_var))
+
+        if self.dtype is not None:
+            x = cast_to(x, self.dtype)
+
+        out = dict.fromkeys(plan.values)
+
+        # nothing is traced - the problem is evaluated by plain numpy without the overhead of autograd
+        self._evaluate_values(x[None, :], out, plan, views, *args, **kwargs)
+
+        # derivatives the evaluation function should have provided but did not are calculated by autograd
+        if is_derivative_missing(out, plan):
+            out = self._evaluate_with_derivatives(x[None, :], self._get_plan(plan.return_values_of, analytic=False),
+                                                  None, {}, *args, **kwargs)
+
+        if plan.return_dcv or plan.return_hcv:
+            self._calc_constraint_violation_derivatives(out, plan, 1)
+
+        # only the first dimension of a two or more dimensional value needs to be removed
+        for key, val in out.items():
+            if val is not None and val.ndim > 1:
+                out[key] = val[0]
+
+        if self.dtype is not None:
+            cast_output(out, self.dtype)
+
+        if plan.calc_constraint_violation:
+            CV = views["CV"][0] if "CV" in views else None
+            if self.n_constr == 0:
+                CV = np.zeros(1, dtype=self.dtype) if CV is None else fill(CV, 0)
+            else:
+                CV = np.maximum(out["G"], 0).sum(keepdims=True, out=CV)
+
+            if plan.return_cv:
+                out["CV"] = CV
+
+            if plan.return_feasible:
+                out["feasible"] = np.less_equal(CV, 0, out=views["feasible"][0] if "feasible" in views else None)
+
+        for key in plan.auxiliary:
+            del out[key]
+
+        if buffers is not None or return_as_dictionary:
+            return self._format_output(out, plan.return_values_of, False, return_as_dictionary, buffers=buffers)
+        elif plan.n_values == 1:
+            return out[plan.return_values_of[0]]
+        else:
+            return tuple([out[val] for val in plan.return_values_of])
+
+    def _calc_return_values_of(self, return_values_of):
+
         # automatic return the function values and CV if it has constraints if not defined otherwise
         if type(return_values_of) == str and return_values_of == "auto":
             return_values_of = ["F"]
             if self.n_constr > 0:
                 return_values_of.append("CV")
 
-        # create the output dictionary for _evaluate to be filled
-        out = {}
-        for val in return_values_of:
-            out[val] = None
+        return return_values_of
+
+    def _evaluate_batch(self, X, return_values_of, *args, wrt=None, buffers=None, **kwargs):
+        plan = self._get_plan(return_values_of, wrt=wrt)
+        X, columns = detach_columns(self, plan, X)
 
-        # all values that are set in the evaluation function
-        values_not_set = [val for val in return_values_of if val not in self.evaluation_of]
+        # the wall time of each phase if metrics are collected
+        metrics = self._metrics
+        if metrics is not None:
+            times = dict.fromkeys(["evaluate", "jacobian", "hessian", "cv"], 0.0)
+            start = time.perf_counter()
 
-        # have a look if gradients are not set and try to use autograd and calculate grading if implemented using it
-        gradients_not_set = [val for val in values_not_set if val.startswith("d")]
+        # create the output dictionary for _evaluate to be filled
+        out = dict.fromkeys(plan.values)
 
         # if no autograd is necessary for evaluation just traditionally use the evaluation method
-        if len(gradients_not_set) == 0:
-            self._evaluate(X, out, *args, **kwargs)
+        if not plan.use_autograd:
+            self._evaluate_values(X, out, plan, buffers, *args, **kwargs)
             at_least2d(out)
 
-        # otherwise try to use autograd to calculate the gradient for this problem
+            # derivatives the evaluation function should have provided but did not are calculated by autograd
+            if is_derivative_missing(out, plan):
+                out = self._evaluate_with_derivatives(X, self._get_plan(plan.return_values_of, analytic=False,
+                                                                        wrt=plan.wrt),
+                                                      times if metrics is not None else None, columns, *args,
+                                                      **kwargs)
+
+            # the derivatives provided by the evaluation function are converted to the requested formats
+            else:
+                if plan.wrt is not None:
+                    for key in [key for key in plan.derivatives if is_jacobian(key) and out[key] is not None]:
+                        out[key] = select_columns(out[key], plan.wrt)
+
+                self._format_derivatives(out, plan)
+
+            if metrics is not None:
+                times["evaluate"] = time.perf_counter() - start
+
+        # otherwise try to use autograd (or finite differences) to calculate the derivatives for this problem
         else:
+            out = self._evaluate_with_derivatives(X, plan, times if metrics is not None else None, columns, *args,
+                                                  **kwargs)
 
-            # calculate the function value by tracing all the calculations
-            root, _ = run_and_trace(self._evaluate, X, *[out])
-            at_least2d(out)
+        # make sure no value was upcasted during the evaluation
+        if self.dtype is not None:
+            cast_output(out, self.dtype)
+
+        # the buffers are always set here - also if the values have not been written into them by a kernel
+        if buffers is None:
+            buffers = {}
+        for key in ["F", "G"]:
+            if key in buffers and out.get(key) is not buffers[key]:
+                np.copyto(buffers[key], out[key], casting="same_kind")
+                out[key] = buffers[key]
+
+        if metrics is not None:
+            start = time.perf_counter()
+
+        # if constraint violation should be returned as well
+        if plan.calc_constraint_violation:
+            if self.n_constr == 0:
+                CV = np.zeros([X.shape[0], 1], dtype=self.dtype) if "CV" not in buffers else fill(buffers["CV"], 0)
+            else:
+                CV = Problem.calc_constraint_violation(out["G"], out=buffers.get("CV"))
+
+            if plan.return_cv:
+                out["CV"] = CV
+
+            # if an additional boolean flag for feasibility should be returned
+            if plan.return_feasible:
+                out["feasible"] = np.less_equal(CV, 0, out=buffers.get("feasible"))
+
+        if plan.return_dcv or plan.return_hcv:
+            self._calc_constraint_violation_derivatives(out, plan, X.shape[0])
+
+        # the values which have only been evaluated for the derivatives of the constraint violation
+        for key in plan.auxiliary:
+            del out[key]
+
+        if metrics is not None:
+            times["cv"] = time.perf_counter() - start
+            metrics.record_batch(self, X.shape[0], times)
+
+        return out
+
+    def _evaluate_values(self, X, out, plan, buffers, *args, **kwargs):
+
+        # only values are requested - the problem is evaluated by its compiled kernel without any temporary arrays
+        if plan.values_only and len(args) == 0 and len(kwargs) == 0 and X.dtype.kind == "f" and has_kernel(type(self)):
+            fun, params = self._kernel()
+            kernel = get_kernel(fun, self.kernels)
+
+            if kernel is not None:
+                # the kernel writes into the buffers directly if they are of the same type as the input
+                F, G = [buffers[key] if buffers is not None and key in buffers and buffers[key].dtype == X.dtype
+                        else np.empty((X.shape[0], max(m, 0)), dtype=X.dtype)
+                        for key, m in [("F", self.n_obj), ("G", self.n_constr)]]
+                kernel(X, F, G, *params)
 
-            # the dictionary where the values are stored
+                out["F"] = F
+                if self.n_constr > 0:
+                    out["G"] = G
+                return
+
+        # plain numpy is bound while evaluating - without a context manager as this is on the path of every evaluation
+        previous = namespace.bind(np)
+        try:
+            self._evaluate(X, out, *args, **kwargs)
+        finally:
+            if previous is not np:
+                namespace.bind(previous)
+
+    def _evaluate_with_derivatives(self, X, plan, times, columns, *args, **kwargs):
+
+        # evaluates the problem for the (traced) input and returns all values - also the ones differentiated
+        def fun(X):
+            _out = dict.fromkeys(plan.traced)
+            self._evaluate(X, _out, *args, **kwargs)
+            at_least2d(_out)
+
+            if plan.lagrangian:
+                _out["L"] = calc_lagrangian(_out, columns["weights"], columns["multipliers"])
+
+            return _out
+
+        mode = self.jacobian_mode
+        start = time.perf_counter()
+
+        # the values and derivatives are calculated by another backend if it supports them - otherwise by autograd
+        backend = get_backend(self.backend)
+        if backend is not None and backend.supports(plan, mode):
+            out = backend.evaluate(self, plan, X, args, kwargs)
+
+            if out is not None:
+                if times is not None:
+                    times["jacobian"] += time.perf_counter() - start
+                return self._format_derivatives({**dict.fromkeys(plan.values), **out}, plan)
+
+        # the sparsity pattern of each output if the structure of the jacobian matrices should be exploited
+        sparsity = None
+        if self.jacobian_sparsity is not None and len(plan.hessian) == 0 and len(plan.products) == 0:
+            sparsity = self._get_jacobian_sparsity(fun, plan.jacobian)
+
+            # only the columns of the variables the derivatives are calculated with respect to are colored
+            if plan.wrt is not None:
+                sparsity = {key: val[:, plan.wrt] for key, val in sparsity.items()}
+
+        if mode in FD_STEPS:
+
+            if len(plan.hessian) > 0 or len(plan.products) > 0:
+                raise Exception("Hessian matrices can not be calculated by finite differences (%s)." % mode)
+
+            if len(plan.directional) > 0:
+                raise Exception("Directional derivatives are calculated by autograd only (%s)." % mode)
+
+            # all perturbed points are evaluated together - parallelization shards the rows before
+            forward = [key for key in plan.jacobian if sparsity is None or key in sparsity]
+            colors = self._get_colors(sparsity, forward, wrt=plan.wrt)
+            with bind_namespace(np):
+                out, jac = calc_jacobian_fd(fun, X, plan.jacobian, mode=mode, step=self.fd_step, colors=colors,
+                                            wrt=plan.wrt)
             deriv = {}
 
-            # if the result is calculated to be derivable
-            for key, val in out.items():
+            if times is not None:
+                times["jacobian"] += time.perf_counter() - start
+
+        else:
 
-                # if yes it is already a derivative
-                if key.startswith("d"):
-                    continue
+            # the outputs whose jacobian matrices are calculated in forward mode - all others in reverse mode
+            forward = self._get_forward_outputs(mode, plan, sparsity)
+            colors = self._get_colors(sparsity, forward, wrt=plan.wrt)
 
-                name = "d" + key
-                is_derivable = (type(val) == autograd.numpy.numpy_boxes.ArrayBox)
+            out, jac, deriv = None, {}, {}
 
-                # if should be returned AND was not calculated yet AND is derivable using autograd
-                if name in return_values_of and out.get(name) is None and is_derivable:
+            if len(forward) > 0:
 
-                    # calculate the jacobian matrix and set it - (ignore warnings of autograd here)
+                # not all functions of autograd support forward mode - then reverse mode is used instead
+                try:
                     with warnings.catch_warnings():
                         warnings.simplefilter("ignore")
+                        out, jac = calc_jacobian_forward(fun, X, forward, colors=colors, wrt=plan.wrt)
+                except Exception:
+                    out, jac, forward = None, {}, []
+
+                if times is not None:
+                    times["jacobian"] += time.perf_counter() - start
+
+            # the problem is evaluated only once for all other jacobian matrices (reverse mode)
+            reverse = [key for key in plan.jacobian if key not in forward]
+
+            if len(plan.hessian) > 0:
+                out, deriv = self._calc_hessians(fun, X, reverse, plan.hessian, times)
+                reverse = []
+
+            # the directional derivatives and hessian-vector products need one evaluation along the directions
+            if len(plan.products) > 0 or len(plan.directional) > 0:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    _out, _deriv = calc_directional_derivatives(fun, X, columns["V"], reverse, plan.products,
+                                                                plan.directional, times=times)
+                out, deriv = out if out is not None else _out, {**deriv, **_deriv}
+
+            elif out is None or len(reverse) > 0:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    out, deriv = calc_derivatives(fun, X, reverse, [], times=times)
+
+            # the lagrangian itself is only evaluated to be differentiated
+            out.pop("L", None)
+
+            # reverse mode always calculates the derivatives with respect to all variables
+            if plan.wrt is not None:
+                for key in [key for key in reverse if "d" + key in deriv]:
+                    deriv["d" + key] = deriv["d" + key][..., plan.wrt]
+
+        sparse = self.jacobian_format == "sparse"
+
+        # recover the jacobian matrices if all variables of one color have been perturbed together
+        for key, val in jac.items():
+            if colors is not None and key in forward:
+                deriv["d" + key] = decompress(val, colors, sparsity[key], sparse=sparse)
+            else:
+                deriv["d" + key] = val
+
+        # all values are returned - also derivatives which could not be calculated
+        out = {**dict.fromkeys(plan.values), **out}
+
+        for key, val in deriv.items():
+            out[key] = to_sparse(val) if sparse and is_jacobian(key) and not is_sparse(val) else val
+
+        return out
+
+    # converts the (dense) jacobian and hessian matrices to the formats they should be returned in
+    def _format_derivatives(self, out, plan):
+        for key in plan.derivatives:
+            if out[key] is None:
+                continue
+            elif is_jacobian(key) and self.jacobian_format == "sparse" and not is_sparse(out[key]):
+                out[key] = to_sparse(out[key])
+            elif key.startswith("h") and self.hessian_format != "dense" and np.ndim(out[key]) == 4:
+                out[key] = pack_hessian(out[key], self.hessian_format)
+        return out
+
+    def _calc_hessians(self, fun, X, jacobian, hessian, times):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+
+            try:
+                return calc_derivatives_forward_over_reverse(fun, X, jacobian, hessian, fmt=self.hessian_format,
+                                                             times=times)
+
+            # not all functions of autograd support forward mode - then the backward passes are traced instead
+            except Exception:
+                out, deriv = calc_derivatives(fun, X, jacobian, hessian, times=times)
+                return out, {key: (pack_hessian(val, self.hessian_format) if key.startswith("h") else val)
+                             for key, val in deriv.items()}
+
+    def _calc_constraint_violation_derivatives(self, out, plan, n):
+
+        # without any constraints the constraint violation is constant
+        if self.n_constr <= 0:
+            if plan.return_dcv:
+                dCV = np.zeros((n, 1, plan.n_wrt), dtype=self.dtype)
+                out["dCV"] = to_sparse(dCV) if self.jacobian_format == "sparse" else dCV
+            if plan.return_hcv:
+                out["hCV"] = np.zeros((n, 1) + calc_hessian_shape(self.n_var, self.hessian_format), dtype=self.dtype)
+            return
+
+        # only the constraints which are violated contribute to the constraint violation
+        active = np.reshape(out["G"], (n, self.n_constr)) > 0
+
+        if plan.return_dcv:
+            out["dCV"] = sum_active(out["dG"], active)
+        if plan.return_hcv:
+            out["hCV"] = sum_active(out["hG"], active)
+
+    def _get_forward_outputs(self, mode, plan, sparsity):
+
+        if len(plan.hessian) > 0 or len(plan.products) > 0 or mode == "reverse":
+            return []
+        elif mode == "forward":
+            return list(plan.jacobian)
+
+        # without any sparsity all outputs are calculated in the same mode
+        if sparsity is None:
+            n_outputs = sum([{"F": self.n_obj, "G": self.n_constr}.get(key, 1) for key in plan.jacobian])
+            return list(plan.jacobian) if calc_jacobian_mode(plan.n_wrt, n_outputs) == "forward" else []
+
+        # otherwise forward mode needs one pass for each color of the output
+        return [key for key in plan.jacobian if key in sparsity and
+                calc_jacobian_mode(self._get_colors(sparsity, [key], wrt=plan.wrt).max() + 1,
+                                   sparsity[key].shape[0]) == "forward"]
+
+    # the coloring of the variables for the union of the sparsity patterns of the outputs - calculated only once
+    def _get_colors(self, sparsity, keys, wrt=None):
+        keys = tuple([key for key in keys if sparsity is not None and key in sparsity])
+
+        if len(keys) == 0:
+            return None
 
-                        if "h" + key not in out:
-                            jac = calc_jacobian(root, val)
-                        else:
+        # the patterns restricted to a subset of variables are colored on their own
+        _key = keys if wrt is None else (keys, tuple(wrt))
 
-                            def calc_gradient(X):
-                                _out = {}
-                                _root, _ = run_and_trace(self._evaluate, X, *[_out])
-                                at_least2d(_out)
-                                jac = calc_jacobian(_root, _out[key])
-                                return jac
+        with self._lock:
+            colors = self.__dict__.setdefault("_jacobian_colors", {})
+            if _key not in colors:
+                colors[_key] = color_columns(np.row_stack([sparsity[key] for key in keys]))
+            return colors[_key]
 
-                            _root, jac = run_and_trace(calc_gradient, X)
+    def _get_jacobian_sparsity(self, fun, keys):
+        with self._lock:
+            patterns = self.__dict__.setdefault("_jacobian_patterns", {})
 
-                            hessian = []
-                            for k in range(jac.shape[1]):
-                                _hessian = calc_jacobian(_root, jac[:, k])
-                                hessian.append(_hessian[:, None, ...])
-                            hessian = np.concatenate(hessian, axis=1)
-                            deriv["h" + key] = hessian
+            missing = [key for key in keys if key not in patterns]
 
-                        deriv[name] = jac
+            if len(missing) > 0:
 
-            # merge to the output
-            out = {**out, **deriv}
+                # the patterns declared by the problem are used directly - all others are detected by probing
+                declared = self.jacobian_sparsity if isinstance(self.jacobian_sparsity, dict) else {}
+                for key in [key for key in missing if key in declared]:
+                    patterns[key] = np.asarray(declared[key], dtype=bool)
 
-            # convert back to conventional numpy arrays - no array box as return type
-            for key in out.keys():
-                if type(out[key]) == autograd.numpy.numpy_boxes.ArrayBox:
-                    out[key] = out[key]._value
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    patterns.update(detect_sparsity(fun, self.xl, self.xu, self.n_var,
+                                                    [key for key in missing if key not in declared],
+                                                    mode=self.jacobian_mode))
 
-        # if constraint violation should be returned as well
-        if self.n_constr == 0:
-            CV = np.zeros([X.shape[0], 1])
-        else:
-            CV = Problem.calc_constraint_violation(out["G"])
+                # outputs not set by the evaluation function have no pattern and are never probed again
+                for key in missing:
+                    patterns.setdefault(key, None)
 
-        if "CV" in return_values_of:
-            out["CV"] = CV
+            return {key: patterns[key] for key in keys if patterns[key] is not None}
 
-        # if an additional boolean flag for feasibility should be returned
-        if "feasible" in return_values_of:
-            out["feasible"] = (CV <= 0)
+    @staticmethod
+    def _format_output(out, return_values_of, only_single_value, return_as_dictionary, buffers=None):
 
         # remove the first dimension of the output - in case input was a 1d- vector
         if only_single_value:
             for key in out.keys():
-                if out[key] is not None:
+                if out[key] is not None and not is_sparse(out[key]):
                     out[key] = out[key][0, :]
 
+        # write the values into the arrays provided by the caller (if not done already) and return those instead
+        if buffers is not None:
+            for key, buf in buffers.items():
+                if key not in return_values_of or out.get(key) is None:
+                    raise Exception("A buffer was provided for %s but this value is not returned!" % key)
+                if buf.shape != out[key].shape:
+                    raise Exception("The buffer for %s has the shape %s but %s is required!"
+                                    % (key, buf.shape, out[key].shape))
+                if not np.may_share_memory(buf, out[key]):
+                    np.copyto(buf, out[key], casting="same_kind")
+                out[key] = buf
+
         if return_as_dictionary:
             return out
         else:
@@ -278,6 +1034,13 @@ class Problem:
     def _evaluate(self, x, f, *args, **kwargs):
         pass
 
+    def _kernel(self):
+        """
+        Returns the fused kernel of the problem (pymop.kernels) together with its parameters - or None if the problem
+        does not provide one.
+        """
+        return None
+
     def name(self):
         """
         Returns
@@ -303,6 +1066,22 @@ class Problem:
     def _calc_pareto_set(self, *args, **kwargs):
         pass
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+
+        # the pool of workers, the lock and the metrics belong to this process and are never sent along with the problem
+        state.pop("_pool", None)
+        state.pop("_lock", None)
+        state.pop("_metrics", None)
+        state.pop("_compiled", None)
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+        self._metrics = None
+
     # some problem information
     def __str__(self):
         s = "# name: %s\n" % self.name()
@@ -315,13 +1094,225 @@ class Problem:
         return s
 
     @staticmethod
-    def calc_constraint_violation(G):
+    def calc_constraint_violation(G, out=None):
         if G is None:
             return None
         elif G.shape[1] == 0:
-            return np.zeros(G.shape[0])[:, None]
+            return np.zeros(G.shape[0])[:, None] if out is None else fill(out, 0)
         else:
-            return np.sum(G * (G > 0).astype(np.float), axis=1)[:, None]
+            return np.sum(np.maximum(G, 0), axis=1, keepdims=True, out=out)
+
+
+class EvaluationPlan:
+    """
+    Everything about an evaluation which only depends on the problem and the values to be returned. It is compiled
+    once and then reused for each evaluation.
+    """
+
+    def __init__(self, problem, return_values_of, analytic=True, wrt=None):
+        self.return_values_of = list(return_values_of)
+        self.n_values = len(self.return_values_of)
+
+        # the variables the jacobian matrices are calculated with respect to - None for all of them
+        self.wrt = wrt
+        self.n_wrt = problem.n_var if wrt is None else len(wrt)
+
+        if wrt is not None and any([val.startswith("h") and not val.endswith("_v") for val in self.return_values_of]):
+            raise Exception("Hessian matrices can not be restricted to a subset of variables (wrt).")
+
+        # the derivatives of the constraint violation are derived from the ones of the constraints
+        self.return_dcv = "dCV" in self.return_values_of
+        self.return_hcv = "hCV" in self.return_values_of
+
+        # all values to be evaluated - including the constraints needed for the constraint violation derivatives
+        self.values = [val for val in self.return_values_of if val not in ["dCV", "hCV"]]
+        if problem.n_constr > 0:
+            for val, required in [("dCV", ["G", "dG"]), ("hCV", ["G", "hG"])]:
+                if val in self.return_values_of:
+                    self.values.extend([e for e in required if e not in self.values])
+
+        # the values which are evaluated but not returned
+        self.auxiliary = [val for val in self.values if val not in self.return_values_of]
+
+        # all derivatives to be evaluated - jacobian ("d") and hessian ("h") matrices
+        self.derivatives = [val for val in self.values if val.startswith("d") or val.startswith("h")]
+
+        # if only the objectives and constraints (or values derived from them) are evaluated
+        self.values_only = len(self.derivatives) == 0
+
+        # all values that are not set in the evaluation function - or all of them if autograd is enforced
+        values_not_set = [val for val in self.values if not analytic or val not in problem.evaluation_of]
+
+        # if a derivative is not set by the evaluation function autograd is used to calculate all of them
+        self.use_autograd = any([val in self.derivatives for val in values_not_set])
+
+        # the outputs autograd calculates the jacobian and hessian matrices, the hessian-vector products and the
+        # directional derivatives for
+        self.jacobian, self.hessian, self.products, self.directional = [], [], [], []
+        if self.use_autograd:
+            self.jacobian = [val[1:] for val in self.derivatives if is_jacobian(val)]
+            self.hessian = [val[1:] for val in self.derivatives if val.startswith("h") and not val.endswith("_v")]
+            self.products = [val[1:-2] for val in self.derivatives if val.startswith("h") and val.endswith("_v")]
+            self.directional = [val[1:-2] for val in self.derivatives if val.startswith("d") and val.endswith("_v")]
+
+        # the directions and the weights of the lagrangian are attached to each row of the input
+        self.directions = len(self.products) > 0 or len(self.directional) > 0
+        self.lagrangian = "L" in self.hessian + self.products + self.directional
+
+        # the values the evaluation function is asked for - no derivatives if they are calculated by autograd
+        self.values_of = self.values
+        if self.use_autograd:
+            self.values_of = [val for val in self.values if val not in self.derivatives]
+
+        # the values of the traced evaluation - the lagrangian is derived from the objectives and constraints
+        self.traced = self.values_of + [val for val in self.jacobian + self.hessian + self.products + self.directional
+                                        if val != "L"]
+        if self.lagrangian:
+            self.traced += ["F"] + (["G"] if problem.n_constr > 0 else [])
+
+        self.return_cv = "CV" in self.return_values_of
+        self.return_feasible = "feasible" in self.return_values_of
+        self.calc_constraint_violation = self.return_cv or self.return_feasible
+
+
+# the methods a subclass can override (besides special methods like __init__) without changing what the kernel of
+# its superclass calculates
+KERNEL_INDEPENDENT = ["_calc_pareto_front", "_calc_pareto_set", "name"]
+
+
+# the kernel of a problem is only used if the class providing it also provides the evaluation function - and no
+# subclass overrides any other method the evaluation might depend on (e.g. _evaluate of InvertedDTLZ1 or g2 of DTLZ)
+@functools.lru_cache(maxsize=None)
+def has_kernel(cls):
+    for c in cls.__mro__:
+        if "_kernel" in c.__dict__:
+            return c is not Problem and "_evaluate" in c.__dict__
+
+        for name, value in c.__dict__.items():
+            is_method = callable(value) or isinstance(value, (staticmethod, classmethod, property))
+            if is_method and name not in KERNEL_INDEPENDENT and not (name.startswith("__") and name.endswith("__")):
+                return False
+
+    return False
+
+
+# the validated indices of the variables the jacobian matrices are calculated with respect to
+def calc_wrt(problem, wrt):
+    wrt = np.asarray(wrt)
+
+    if wrt.dtype == np.bool_:
+        if wrt.shape != (problem.n_var,):
+            raise Exception("The mask of the variables (wrt) needs to have n_var %s entries!" % problem.n_var)
+        wrt = np.nonzero(wrt)[0]
+
+    wrt = np.atleast_1d(wrt)
+
+    if wrt.ndim != 1 or len(wrt) == 0 or not np.issubdtype(wrt.dtype, np.integer):
+        raise Exception("The variables (wrt) need to be a non-empty list of indices or a boolean mask!")
+
+    if np.any(wrt < -problem.n_var) or np.any(wrt >= problem.n_var):
+        raise Exception("The indices of the variables (wrt) need to be smaller than n_var %s!" % problem.n_var)
+
+    wrt = [int(e) for e in np.mod(wrt, problem.n_var)]
+
+    if len(set(wrt)) != len(wrt):
+        raise Exception("The variables (wrt) need to be unique!")
+
+    return wrt
+
+
+# true if the value is a jacobian matrix - and not a directional derivative
+def is_jacobian(key):
+    return key.startswith("d") and not key.endswith("_v")
+
+
+# true if a derivative was not set by the evaluation function even though the value itself was
+def is_derivative_missing(out, plan):
+    return any([out.get(val) is None and out.get(val[1:]) is not None for val in plan.derivatives])
+
+
+# the lagrangian sum(weights * F) + sum(multipliers * G) of each row - also if the rows have been repeated
+def calc_lagrangian(out, weights, multipliers):
+    n = out["F"].shape[0]
+    r = n // weights.shape[0]
+
+    L = anp.sum(out["F"] * np.repeat(weights, r, axis=0), axis=1, keepdims=True)
+    if out.get("G") is not None and multipliers.shape[1] > 0:
+        L = L + anp.sum(out["G"] * np.repeat(multipliers, r, axis=0), axis=1, keepdims=True)
+
+    return L
+
+
+# attaches the columns needed for the hessian products (directions, weights, multipliers) to the input
+def attach_columns(problem, plan, X, V=None, weights=None, multipliers=None):
+    n = X.shape[0]
+    columns = [X]
+
+    if plan.directions:
+        if V is None:
+            raise Exception("The directions V are required for the directional derivatives and hessian products!")
+        columns.append(np.broadcast_to(V, (n, problem.n_var)))
+
+    if plan.lagrangian:
+        n_constr = max(problem.n_constr, 0)
+        columns.append(np.broadcast_to(1.0 if weights is None else weights, (n, problem.n_obj)))
+        columns.append(np.broadcast_to(0.0 if multipliers is None else multipliers, (n, n_constr)))
+
+    if len(columns) == 1:
+        return X
+
+    return cast_to(np.column_stack(columns), problem.dtype)
+
+
+# splits the input into the variables and the attached columns
+def detach_columns(problem, plan, X):
+    if not (plan.directions or plan.lagrangian):
+        return X, {}
+
+    n_var, n_obj, n_constr = problem.n_var, problem.n_obj, max(problem.n_constr, 0)
+
+    expected = n_var + (n_var if plan.directions else 0) + (n_obj + n_constr if plan.lagrangian else 0)
+    if X.shape[1] != expected:
+        raise Exception("The hessian products need the directions, weights and multipliers attached to the rows!")
+
+    columns, k = {}, n_var
+
+    if plan.directions:
+        columns["V"], k = X[:, k:k + n_var], k + n_var
+
+    if plan.lagrangian:
+        columns["weights"] = X[:, k:k + n_obj]
+        columns["multipliers"] = X[:, k + n_obj:k + n_obj + n_constr]
+
+    return X[:, :n_var], columns
+
+
+# sums up the derivatives (jacobian or hessian matrices) of all active functions of each row
+def sum_active(D, active):
+    n, m = active.shape
+
+    # a sparse jacobian has the rows of all functions stacked - they are reduced by a selection matrix
+    if is_sparse(D):
+        S = coo_matrix()((active.ravel().astype(D.dtype), (np.repeat(np.arange(n), m), np.arange(n * m))),
+                         shape=(n, n * m))
+        return coo_matrix()(S @ D.tocsr())
+
+    active = np.reshape(active, active.shape + (1,) * (np.ndim(D) - 2))
+    return np.sum(D * active, axis=1, keepdims=True)
+
+
+# converts an array to the given floating point precision - without copying if it is already in this precision
+def cast_to(X, dtype):
+    if dtype is None or not isinstance(X, np.ndarray) or X.dtype == dtype or X.dtype.kind not in "fiu":
+        return X
+    return X.astype(dtype, copy=False)
+
+
+# converts all floating point values of the output to the given precision
+def cast_output(out, dtype):
+    for key, val in out.items():
+        if (isinstance(val, np.ndarray) or is_sparse(val)) and val.dtype.kind == "f" and val.dtype != dtype:
+            out[key] = val.astype(dtype)
 
 
 # makes all the output at least 2-d dimensional
@@ -329,3 +1320,105 @@ def at_least2d(d):
     for key in d.keys():
         if len(np.shape(d[key])) == 1:
             d[key] = d[key][:, None]
+
+
+# the default number of bytes the results of one block are allowed to occupy when evaluating iteratively
+DEFAULT_MEMORY_BUDGET = 64 * 1024 ** 2
+
+
+# estimates the number of bytes necessary to store the input and the results of one row
+def calc_bytes_per_row(problem, return_values_of, itemsize=8):
+    n_var, n_obj, n_constr = problem.n_var, problem.n_obj, max(problem.n_constr, 0)
+
+    n_hessian = int(np.prod(calc_hessian_shape(n_var, problem.hessian_format)))
+
+    n_entries = {
+        "F": n_obj, "G": n_constr, "CV": 1, "feasible": 1,
+        "dF": n_obj * n_var, "dG": n_constr * n_var, "dCV": n_var,
+        "hF": n_obj * n_hessian, "hG": n_constr * n_hessian, "hCV": n_hessian,
+        "hF_v": n_obj * n_var, "hG_v": n_constr * n_var, "hL": n_hessian, "hL_v": n_var,
+        "dF_v": n_obj, "dG_v": n_constr
+    }
+
+    return itemsize * (n_var + sum([n_entries.get(val, 0) for val in return_values_of]))
+
+
+# returns the shape and data type of a value returned for n rows - None if it is not known beforehand
+def calc_output_layout(problem, key, n):
+    n_var, n_obj, n_constr = problem.n_var, problem.n_obj, problem.n_constr
+    dtype = problem.dtype if problem.dtype is not None else np.float64
+
+    hessian = calc_hessian_shape(n_var, problem.hessian_format)
+
+    layouts = {
+        "F": ((n, n_obj), dtype),
+        "G": ((n, n_constr), dtype),
+        "CV": ((n, 1), dtype),
+        "feasible": ((n, 1), np.bool_),
+        "dF": ((n, n_obj, n_var), dtype),
+        "dG": ((n, n_constr, n_var), dtype),
+        "hF": ((n, n_obj) + hessian, dtype),
+        "hG": ((n, n_constr) + hessian, dtype),
+        "dCV": ((n, 1, n_var), dtype),
+        "hCV": ((n, 1) + hessian, dtype),
+        "hF_v": ((n, n_obj, n_var), dtype),
+        "hG_v": ((n, n_constr, n_var), dtype),
+        "hL": ((n, 1) + hessian, dtype),
+        "hL_v": ((n, 1, n_var), dtype),
+        "dF_v": ((n, n_obj), dtype),
+        "dG_v": ((n, n_constr), dtype),
+    }
+
+    if key not in layouts or (key in ["G", "dG", "hG", "hG_v", "dG_v"] and n_constr <= 0):
+        return None
+
+    return layouts[key]
+
+
+# the buffers of the values calculated at the end of an evaluation (always with the first dimension) - validated
+# before the evaluation so that they can be written into directly
+def calc_buffer_views(problem, plan, buffers, n, only_single_value):
+    views = {}
+    if buffers is None:
+        return views
+
+    for key in ["F", "G", "CV", "feasible"]:
+        layout = calc_output_layout(problem, key, n)
+        if key not in buffers or key not in plan.return_values_of or layout is None:
+            continue
+
+        buf, shape = buffers[key], layout[0][1:] if only_single_value else layout[0]
+        if buf.shape != shape:
+            raise Exception("The buffer for %s has the shape %s but %s is required!" % (key, buf.shape, shape))
+        views[key] = buf[None, :] if only_single_value else buf
+
+    return views
+
+
+def fill(a, value):
+    a.fill(value)
+    return a
+
+
+# returns the number of rows to be evaluated at once - None if all rows can be evaluated together
+def calc_chunk_size(problem, return_values_of, chunk_size=None, memory_budget=None):
+    if chunk_size is not None:
+        if chunk_size < 1:
+            raise Exception("The chunk size needs to be at least 1 but is %s!" % chunk_size)
+        return int(chunk_size)
+
+    elif memory_budget is not None:
+        return max(1, int(memory_budget // calc_bytes_per_row(problem, return_values_of)))
+
+    return None
+
+
+# stitches the outputs of several blocks of rows back together
+def merge_outputs(outs):
+    out = {}
+    for key in outs[0].keys():
+        if outs[0][key] is None:
+            out[key] = None
+        else:
+            out[key] = concatenate([_out[key] for _out in outs])
+    return out
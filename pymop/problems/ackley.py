@@ -1,12 +1,11 @@
-import autograd.numpy as np
-
+from pymop.backend import anp as np
 from pymop.problem import Problem
 
 
 class Ackley(Problem):
 
-    def __init__(self, n_var=10, c1=20, c2=.2, c3=2 * np.pi):
-        super().__init__(n_var=n_var, n_obj=1, n_constr=0, xl=-32, xu=32, type_var=np.double)
+    def __init__(self, n_var=10, c1=20, c2=.2, c3=2 * np.pi, **kwargs):
+        super().__init__(n_var=n_var, n_obj=1, n_constr=0, xl=-32, xu=32, type_var=np.double, **kwargs)
         self.c1 = c1
         self.c2 = c2
         self.c3 = c3
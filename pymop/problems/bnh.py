@@ -1,12 +1,11 @@
-import autograd.numpy as anp
-
+from pymop.backend import anp
 from pymop.problem import Problem
 
 
 class BNH(Problem):
 
-    def __init__(self):
-        super().__init__(n_var=2, n_obj=2, n_constr=2, type_var=anp.double)
+    def __init__(self, **kwargs):
+        super().__init__(n_var=2, n_obj=2, n_constr=2, type_var=anp.double, **kwargs)
         self.xl = anp.zeros(self.n_var)
         self.xu = anp.array([5.0, 3.0])
 
@@ -1,12 +1,11 @@
-import autograd.numpy as anp
-
+from pymop.backend import anp
 from pymop.problem import Problem
 
 
 class CantileveredBeam(Problem):
 
-    def __init__(self):
-        super().__init__(n_var=4, n_obj=1, n_constr=2, type_var=anp.double)
+    def __init__(self, **kwargs):
+        super().__init__(n_var=4, n_obj=1, n_constr=2, type_var=anp.double, **kwargs)
         self.xl = anp.array([2, 0.1, 0.1, 3.0])
         self.xu = anp.array([12.0, 1.0, 2.0, 7.0])
         self.h1 = anp.array([0.1, 0.25, 0.35, 0.5, 0.65, 0.75, 0.9, 1.0])
@@ -1,5 +1,4 @@
-import autograd.numpy as anp
-
+from pymop.backend import anp
 from pymop.problems.dtlz import DTLZ1, DTLZ2, DTLZ3, DTLZ4
 
 
@@ -8,10 +7,14 @@ class C1DTLZ1(DTLZ1):
     def __init__(self, n_var=12, n_obj=3, **kwargs):
         super().__init__(n_var, n_obj, **kwargs)
         self.n_constr = 1
+        self.evaluation_of = ["F", "dF", "G", "dG"]
 
     def _evaluate(self, X, out, *args, **kwargs):
-        super()._evaluate(X, out, *args, **kwargs)
-        out["G"] = constraint_c1_linear(out["F"])
+        F, dF = evaluate_objectives(super()._evaluate, X, out, *args, **kwargs)
+        out["G"] = constraint_c1_linear(F)
+
+        if "dG" in out:
+            out["dG"] = anp.matmul(constraint_c1_linear_jacobian(F), dF)
 
     def _calc_pareto_front(self, ref_dirs, *args, **kwargs):
         return super()._calc_pareto_front(ref_dirs, *args, **kwargs)
@@ -22,6 +25,7 @@ class C1DTLZ3(DTLZ3):
     def __init__(self, n_var=12, n_obj=3, r=None, **kwargs):
         super().__init__(n_var, n_obj, **kwargs)
         self.n_constr = 1
+        self.evaluation_of = ["F", "dF", "G", "dG"]
 
         if r is None:
             if self.n_obj < 5:
@@ -34,8 +38,11 @@ class C1DTLZ3(DTLZ3):
         self.r = r
 
     def _evaluate(self, X, out, *args, **kwargs):
-        super()._evaluate(X, out, *args, **kwargs)
-        out["G"] = constraint_c1_spherical(out["F"], self.r)
+        F, dF = evaluate_objectives(super()._evaluate, X, out, *args, **kwargs)
+        out["G"] = constraint_c1_spherical(F, self.r)
+
+        if "dG" in out:
+            out["dG"] = anp.matmul(constraint_c1_spherical_jacobian(F, self.r), dF)
 
     def _calc_pareto_front(self, ref_dirs, *args, **kwargs):
         return super()._calc_pareto_front(ref_dirs, *args, **kwargs)
@@ -46,6 +53,7 @@ class C2DTLZ2(DTLZ2):
     def __init__(self, n_var=12, n_obj=3, r=None, **kwargs):
         super().__init__(n_var, n_obj, **kwargs)
         self.n_constr = 1
+        self.evaluation_of = ["F", "dF", "G", "dG"]
 
         if r is None:
             if n_obj == 2:
@@ -58,8 +66,11 @@ class C2DTLZ2(DTLZ2):
         self.r = r
 
     def _evaluate(self, X, out, *args, **kwargs):
-        super()._evaluate(X, out, *args, **kwargs)
-        out["G"] = constraint_c2(out["F"], self.r)
+        F, dF = evaluate_objectives(super()._evaluate, X, out, *args, **kwargs)
+        out["G"] = constraint_c2(F, self.r)
+
+        if "dG" in out:
+            out["dG"] = anp.matmul(constraint_c2_jacobian(F, self.r), dF)
 
     def _calc_pareto_front(self, ref_dirs, *args, **kwargs):
         F = super()._calc_pareto_front(ref_dirs, *args, **kwargs)
@@ -73,10 +84,14 @@ class C3DTLZ4(DTLZ4):
     def __init__(self, n_var=7, n_obj=3, **kwargs):
         super().__init__(n_var, n_obj, **kwargs)
         self.n_constr = n_obj
+        self.evaluation_of = ["F", "dF", "G", "dG"]
 
     def _evaluate(self, X, out, *args, **kwargs):
-        super()._evaluate(X, out, *args, **kwargs)
-        out["G"] = constraint_c3_spherical(out["F"])
+        F, dF = evaluate_objectives(super()._evaluate, X, out, *args, **kwargs)
+        out["G"] = constraint_c3_spherical(F)
+
+        if "dG" in out:
+            out["dG"] = anp.matmul(constraint_c3_spherical_jacobian(F), dF)
 
     def _calc_pareto_front(self, ref_dirs, *args, **kwargs):
         F = super()._calc_pareto_front(ref_dirs, *args, **kwargs)
@@ -88,12 +103,31 @@ class C3DTLZ4(DTLZ4):
         return F
 
 
+# evaluates the objectives - with their jacobian if the one of the constraints is requested (chain rule)
+def evaluate_objectives(evaluate, X, out, *args, **kwargs):
+    _out = dict(out)
+    if "dG" in out:
+        _out["dF"] = None
+
+    evaluate(X, _out, *args, **kwargs)
+    out.update({key: _out[key] for key in out})
+
+    return _out["F"], _out.get("dF")
+
+
 def constraint_c1_linear(f):
     g = - (1 - f[:, -1] / 0.6 - anp.sum(f[:, :-1] / 0.5, axis=1))
 
     return g
 
 
+# the derivatives of the constraints with respect to the objectives - each of shape (n, n_constr, n_obj)
+def constraint_c1_linear_jacobian(f):
+    dg = anp.full(f.shape, 2.0, dtype=f.dtype)
+    dg[:, -1] = 1 / 0.6
+    return dg[:, None, :]
+
+
 def constraint_c1_spherical(f, r):
     radius = anp.sum(f ** 2, axis=1)
     g = - (radius - 16) * (radius - r ** 2)
@@ -101,41 +135,49 @@ def constraint_c1_spherical(f, r):
     return g
 
 
+def constraint_c1_spherical_jacobian(f, r):
+    radius = anp.sum(f ** 2, axis=1)
+    return (- (2 * radius - 16 - r ** 2)[:, None] * 2 * f)[:, None, :]
+
+
 def constraint_c2(f, r):
     n_obj = f.shape[1]
 
-    v1 = anp.inf * anp.ones(f.shape[0])
-
-    for i in range(n_obj):
-        temp = (f[:, i] - 1) ** 2 + (anp.sum(f ** 2, axis=1) - f[:, i] ** 2) - r ** 2
-        v1 = anp.minimum(temp.flatten(), v1)
+    # the squared radius is the same for all objectives - only the own term is replaced
+    radius = anp.sum(f ** 2, axis=1)
+    v1 = anp.min((f - 1) ** 2 + (radius[:, None] - f ** 2), axis=1) - r ** 2
 
     a = 1 / anp.sqrt(n_obj)
     v2 = anp.sum((f - a) ** 2, axis=1) - r ** 2
-    g = anp.minimum(v1, v2.flatten())
+    g = anp.minimum(v1, v2)
 
     return g
 
 
-def constraint_c3_linear(f):  # M lines
-    n_obj = f.shape[1]
-    g = []
+def constraint_c2_jacobian(f, r):
+    n, n_obj = f.shape
 
-    for i in range(n_obj):
-        _g = 1 - f[:, i] / 0.5 - (anp.sum(f, axis=1) - f[:, i])
-        g.append(_g)
+    # the values and gradients of all terms the minimum is taken of - the first n_obj are v1, the last is v2
+    terms = anp.column_stack([(f - 1) ** 2 + anp.sum(f ** 2, axis=1)[:, None] - f ** 2 - r ** 2,
+                              anp.sum((f - 1 / anp.sqrt(n_obj)) ** 2, axis=1) - r ** 2])
 
-    return anp.column_stack(g)
+    grads = anp.zeros((n, n_obj + 1, n_obj), dtype=f.dtype)
+    grads[:, :n_obj] = 2 * f[:, None, :] - 2 * anp.eye(n_obj, dtype=f.dtype)
+    grads[:, n_obj] = 2 * (f - 1 / anp.sqrt(n_obj))
+
+    return grads[anp.arange(n), anp.argmin(terms, axis=1)][:, None, :]
+
+
+def constraint_c3_linear(f):  # M lines
+    return 1 - f / 0.5 - (anp.sum(f, axis=1)[:, None] - f)
 
 
 def constraint_c3_spherical(f):  # M ellipse
-    n_obj = f.shape[1]
-    g = []
+    return 1 - f ** 2 / 4 - (anp.sum(f ** 2, axis=1)[:, None] - f ** 2)
+
 
-    for i in range(n_obj):
-        _g = 1 - f[:, i] ** 2 / 4 - (anp.sum(f ** 2, axis=1) - f[:, i] ** 2)
-        g.append(_g)
-    return anp.column_stack(g)
+def constraint_c3_spherical_jacobian(f):
+    return - 2 * f[:, None, :] + 1.5 * anp.eye(f.shape[1], dtype=f.dtype) * f[:, None, :]
 
 
 def constraint_c4_cylindrical(f, r):  # cylindrical
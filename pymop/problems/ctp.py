@@ -1,32 +1,59 @@
-import autograd.numpy as anp
+import numpy as np
 
+from pymop import kernels
+from pymop.backend import anp
 from pymop.problem import Problem
 from pymop.util import load_pareto_front_from_file
 
 
 class CTP(Problem):
 
-    def __init__(self, n_var=2, n_constr=1, option="linear"):
-        super().__init__(n_var=n_var, n_obj=2, n_constr=n_constr, xl=0, xu=1, type_var=anp.double)
+    # the parameters (theta, a, b, c, d, e) of each constraint (see calc_constraint)
+    constraints = []
+
+    def __init__(self, n_var=2, n_constr=1, option="linear", **kwargs):
+        super().__init__(n_var=n_var, n_obj=2, n_constr=n_constr, xl=0, xu=1, type_var=anp.double,
+                         evaluation_of=["F", "dF", "G", "dG"], **kwargs)
 
         def g_linear(x):
             return 1 + anp.sum(x, axis=1)
 
+        def dg_linear(x):
+            return anp.ones_like(x)
+
         def g_multimodal(x):
             A = 10
             return 1 + A * x.shape[1] + anp.sum(x ** 2 - A * anp.cos(2 * anp.pi * x), axis=1)
 
+        def dg_multimodal(x):
+            A = 10
+            return 2 * x + 2 * anp.pi * A * anp.sin(2 * anp.pi * x)
+
+        self.multimodal = option == "multimodal"
+
         if option == "linear":
             self.calc_g = g_linear
+            self.calc_dg = dg_linear
 
         elif option == "multimodal":
             self.calc_g = g_multimodal
+            self.calc_dg = dg_multimodal
             self.xl[:, 1:] = -5.12
             self.xu[:, 1:] = 5.12
 
         else:
             print("Unknown option for CTP problems.")
 
+    def _kernel(self):
+        return kernels.ctp, (self.multimodal, np.array(self.constraints, dtype=float))
+
+    def _evaluate(self, x, out, *args, **kwargs):
+        f1, f2 = self.calc_objectives(x)
+        out["F"] = anp.column_stack([f1, f2])
+        out["G"] = anp.column_stack([self.calc_constraint(*params, f1, f2) for params in self.constraints])
+
+        self.calc_jacobian(x, out, f1, f2, self.constraints)
+
     def calc_objectives(self, x):
         f1 = x[:, 0]
         gg = self.calc_g(x[:, 1:])
@@ -37,6 +64,41 @@ class CTP(Problem):
         return - (anp.cos(theta) * (f2 - e) - anp.sin(theta) * f1 -
                   a * anp.abs(anp.sin(b * anp.pi * (anp.sin(theta) * (f2 - e) + anp.cos(theta) * f1) ** c)) ** d)
 
+    def calc_objectives_jacobian(self, x):
+        f1 = x[:, 0]
+        gg = self.calc_g(x[:, 1:])
+
+        df1, df2 = anp.zeros_like(x), anp.zeros_like(x)
+        df1[:, 0] = 1
+        df2[:, 0] = - 0.5 * anp.sqrt(gg / f1)
+        df2[:, 1:] = (1 - 0.5 * anp.sqrt(f1 / gg))[:, None] * self.calc_dg(x[:, 1:])
+        return df1, df2
+
+    def calc_constraint_jacobian(self, theta, a, b, c, d, e, f1, f2, df1, df2):
+        u = anp.sin(theta) * (f2 - e) + anp.cos(theta) * f1
+        s = anp.sin(b * anp.pi * u ** c)
+        ds = anp.cos(b * anp.pi * u ** c) * b * anp.pi * c * u ** (c - 1)
+
+        dv = d * anp.abs(s) ** (d - 1) * anp.sign(s) * ds
+        du = anp.sin(theta) * df2 + anp.cos(theta) * df1
+
+        return - (anp.cos(theta) * df2 - anp.sin(theta) * df1 - a * dv[:, None] * du)
+
+    def calc_jacobian(self, x, out, f1, f2, constraints):
+        """
+        Sets the jacobian of the objectives and the constraints (if requested) - each constraint is defined
+        by its parameters (theta, a, b, c, d, e) of calc_constraint.
+        """
+        if "dF" in out or "dG" in out:
+            df1, df2 = self.calc_objectives_jacobian(x)
+
+            if "dF" in out:
+                out["dF"] = anp.stack([df1, df2], axis=1)
+
+            if "dG" in out:
+                out["dG"] = anp.stack([self.calc_constraint_jacobian(*params, f1, f2, df1, df2)
+                                       for params in constraints], axis=1)
+
 
 class CTP1(CTP):
 
@@ -61,133 +123,94 @@ class CTP1(CTP):
     def _calc_pareto_front(self):
         return load_pareto_front_from_file("ctp1.pf")
 
+    def _kernel(self):
+        return kernels.ctp1, (self.multimodal, np.array(self.a, dtype=float), np.array(self.b, dtype=float))
+
     def _evaluate(self, x, out, *args, **kwargs):
         f1 = x[:, 0]
         gg = self.calc_g(x[:, 1:])
         f2 = gg * anp.exp(-f1 / gg)
+
+        # all constraints at once - each column belongs to one pair of parameters (a, b) kept in the type of x
+        a, b = self.a.astype(x.dtype), self.b.astype(x.dtype)
+        e = a * anp.exp(-b * f1[:, None])
+
         out["F"] = anp.column_stack([f1, f2])
+        out["G"] = - (f2[:, None] - e)
 
-        a, b = self.a, self.b
+        if "dF" in out or "dG" in out:
+            df1 = anp.zeros_like(x)
+            df1[:, 0] = 1
 
-        g = []
-        for j in range(self.n_constr):
-            _g = - (f2 - (a[j] * anp.exp(-b[j] * f1)))
-            g.append(_g)
+            df2 = anp.zeros_like(x)
+            df2[:, 0] = - anp.exp(-f1 / gg)
+            df2[:, 1:] = (anp.exp(-f1 / gg) * (1 + f1 / gg))[:, None] * self.calc_dg(x[:, 1:])
 
-        out["F"] = anp.column_stack([f1, f2])
-        out["G"] = anp.column_stack(g)
+            if "dF" in out:
+                out["dF"] = anp.stack([df1, df2], axis=1)
+
+            if "dG" in out:
+                out["dG"] = - (df2[:, None, :] + (b * e)[:, :, None] * df1[:, None, :])
 
 
 class CTP2(CTP):
 
+    constraints = [(-0.2 * anp.pi, 0.2, 10, 1, 6, 1)]
+
     def _calc_pareto_front(self):
         return load_pareto_front_from_file("ctp2.pf")
 
-    def _evaluate(self, x, out, *args, **kwargs):
-        f1, f2 = self.calc_objectives(x)
-        out["F"] = anp.column_stack([f1, f2])
-
-        theta = -0.2 * anp.pi
-        a, b, c, d, e = 0.2, 10, 1, 6, 1
-        out["G"] = self.calc_constraint(theta, a, b, c, d, e, f1, f2)
-
 
 class CTP3(CTP):
 
+    constraints = [(-0.2 * anp.pi, 0.1, 10, 1, 0.5, 1)]
+
     def _calc_pareto_front(self):
         return load_pareto_front_from_file("ctp3.pf")
 
-    def _evaluate(self, x, out, *args, **kwargs):
-        f1, f2 = self.calc_objectives(x)
-        out["F"] = anp.column_stack([f1, f2])
-
-        theta = -0.2 * anp.pi
-        a, b, c, d, e = 0.1, 10, 1, 0.5, 1
-
-        out["G"] = self.calc_constraint(theta, a, b, c, d, e, f1, f2)
-
 
 class CTP4(CTP):
 
+    constraints = [(-0.2 * anp.pi, 0.75, 10, 1, 0.5, 1)]
+
     def _calc_pareto_front(self):
         return load_pareto_front_from_file("ctp4.pf")
 
-    def _evaluate(self, x, out, *args, **kwargs):
-        f1, f2 = self.calc_objectives(x)
-        out["F"] = anp.column_stack([f1, f2])
-
-        theta = -0.2 * anp.pi
-        a, b, c, d, e = 0.75, 10, 1, 0.5, 1
-
-        out["G"] = self.calc_constraint(theta, a, b, c, d, e, f1, f2)
-
 
 class CTP5(CTP):
 
+    constraints = [(-0.2 * anp.pi, 0.1, 10, 2, 0.5, 1)]
+
     def _calc_pareto_front(self):
         return load_pareto_front_from_file("ctp5.pf")
 
-    def _evaluate(self, x, out, *args, **kwargs):
-        f1, f2 = self.calc_objectives(x)
-        out["F"] = anp.column_stack([f1, f2])
-
-        theta = -0.2 * anp.pi
-        a, b, c, d, e = 0.1, 10, 2, 0.5, 1
-
-        out["G"] = self.calc_constraint(theta, a, b, c, d, e, f1, f2)
-
 
 class CTP6(CTP):
 
+    constraints = [(0.1 * anp.pi, 40, 0.5, 1, 2, -2)]
+
     def _calc_pareto_front(self):
         return load_pareto_front_from_file("ctp6.pf")
 
-    def _evaluate(self, x, out, *args, **kwargs):
-        f1, f2 = self.calc_objectives(x)
-        out["F"] = anp.column_stack([f1, f2])
-
-        theta = 0.1 * anp.pi
-        a, b, c, d, e = 40, 0.5, 1, 2, -2
-
-        out["G"] = self.calc_constraint(theta, a, b, c, d, e, f1, f2)
-
 
 class CTP7(CTP):
 
+    constraints = [(-0.05 * anp.pi, 40, 5, 1, 6, 0)]
+
     def _calc_pareto_front(self):
         return load_pareto_front_from_file("ctp7.pf")
 
-    def _evaluate(self, x, out, *args, **kwargs):
-        f1, f2 = self.calc_objectives(x)
-        out["F"] = anp.column_stack([f1, f2])
-
-        theta = -0.05 * anp.pi
-        a, b, c, d, e = 40, 5, 1, 6, 0
 
-        out["G"] = self.calc_constraint(theta, a, b, c, d, e, f1, f2)
+class CTP8(CTP):
 
+    constraints = [(0.1 * anp.pi, 40, 0.5, 1, 2, -2), (-0.05 * anp.pi, 40, 2, 1, 6, 0)]
 
-class CTP8(CTP):
     def __init__(self, **kwargs):
         super().__init__(n_constr=2, **kwargs)
 
     def _calc_pareto_front(self):
         return load_pareto_front_from_file("ctp8.pf")
 
-    def _evaluate(self, x, out, *args, **kwargs):
-        f1, f2 = self.calc_objectives(x)
-        out["F"] = anp.column_stack([f1, f2])
-
-        theta = 0.1 * anp.pi
-        a, b, c, d, e = 40, 0.5, 1, 2, -2
-        g1 = self.calc_constraint(theta, a, b, c, d, e, f1, f2)
-
-        theta = -0.05 * anp.pi
-        a, b, c, d, e = 40, 2, 1, 6, 0
-        g2 = self.calc_constraint(theta, a, b, c, d, e, f1, f2)
-
-        out["G"] = anp.column_stack([g1, g2])
-
 
 if __name__ == '__main__':
     problem = CTP1(n_constr=3)
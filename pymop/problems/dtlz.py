@@ -1,10 +1,10 @@
-import autograd.numpy as anp
-
+from pymop import kernels
+from pymop.backend import anp
 from pymop.problem import Problem
 
 
 class DTLZ(Problem):
-    def __init__(self, n_var, n_obj, k=None):
+    def __init__(self, n_var, n_obj, k=None, **kwargs):
 
         if n_var:
             self.k = n_var - n_obj + 1
@@ -14,27 +14,107 @@ class DTLZ(Problem):
         else:
             raise Exception("Either provide number of variables or k!")
 
-        super().__init__(n_var=n_var, n_obj=n_obj, n_constr=0, xl=0, xu=1, type_var=anp.double)
+        super().__init__(n_var=n_var, n_obj=n_obj, n_constr=0, xl=0, xu=1, type_var=anp.double,
+                         evaluation_of=["F", "dF"], **kwargs)
 
     def g1(self, X_M):
         return 100 * (self.k + anp.sum(anp.square(X_M - 0.5) - anp.cos(20 * anp.pi * (X_M - 0.5)), axis=1))
 
+    def dg1(self, X_M):
+        return 100 * (2 * (X_M - 0.5) + 20 * anp.pi * anp.sin(20 * anp.pi * (X_M - 0.5)))
+
     def g2(self, X_M):
         return anp.sum(anp.square(X_M - 0.5), axis=1)
 
+    def dg2(self, X_M):
+        return 2 * (X_M - 0.5)
+
     def obj_func(self, X_, g, alpha=1):
-        f = []
+        a = anp.power(X_, alpha) * anp.pi / 2.0
+        return (1 + g)[:, None] * calc_products(anp.cos(a), anp.sin(a))
+
+    def obj_func_jacobian(self, X_, g, dg, alpha=1):
+        P, dP = calc_spherical_products(X_, alpha=alpha)
+        return calc_jacobian(P, dP, g, dg)
+
+
+# the cumulative products C[:, l] = U[:, 0] * ... * U[:, l - 1] for l = 0, ..., m - each one is the previous one
+# multiplied by a single column (autograd can not differentiate anp.cumprod)
+def calc_cumulative_products(U):
+    c = anp.ones(U.shape[0], dtype=U.dtype)
+    C = [c]
+    for l in range(U.shape[1]):
+        c = c * U[:, l]
+        C.append(c)
+    return anp.column_stack(C)
+
+
+def calc_products(U, V):
+    """
+    Calculates the products P[:, i] = U[:, 0] * ... * U[:, m - i - 1] * V[:, m - i] (without V for i = 0) the
+    objectives of DTLZ are based on. All of them are derived from the cumulative products of U - the number of
+    operations grows linearly with the number of objectives.
+    """
+    C = calc_cumulative_products(U)
+    return (C * anp.concatenate([V, anp.ones((V.shape[0], 1), dtype=V.dtype)], axis=1))[:, ::-1]
+
+
+def calc_products_jacobian(U, dU, V, dV):
+    """
+    Calculates the products P of calc_products and their derivatives dP of size (n, m + 1, m) with respect to each
+    column.
+    """
+    n, m = U.shape
+    C = calc_cumulative_products(U)
+    P, dP = calc_products(U, V), anp.zeros((n, m + 1, m), dtype=U.dtype)
+
+    # E[:, j] is the product of U[:, 0] * ... * U[:, l - 1] without U[:, j] (j < l) - updated by one column for each l
+    E = anp.zeros((n, m), dtype=U.dtype)
+
+    for l in range(m + 1):
+        i = m - l
+        v = V[:, l] if i > 0 else anp.ones(n, dtype=U.dtype)
+
+        dP[:, i, :l] = E[:, :l] * dU[:, :l] * v[:, None]
+
+        if i > 0:
+            dP[:, i, l] = C[:, l] * dV[:, l]
+            E[:, :l] *= U[:, l][:, None]
+            E[:, l] = C[:, l]
+
+    return P, dP
+
+
+# the products of cosines and sines of the angles x^alpha * pi / 2 and their derivatives
+def calc_spherical_products(X_, alpha=1):
+    a = anp.power(X_, alpha) * anp.pi / 2.0
+    da = alpha * anp.power(X_, alpha - 1) * anp.pi / 2.0
+    cos_a, sin_a = anp.cos(a), anp.sin(a)
+    return calc_products_jacobian(cos_a, -sin_a * da, sin_a, cos_a * da)
+
+
+# the jacobian of F = (1 + g) * P where P depends on the position variables X_ and g on the distance variables X_M
+def calc_jacobian(P, dP, g, dg):
+    return anp.concatenate([(1 + g)[:, None, None] * dP, P[:, :, None] * dg[:, None, :]], axis=2)
 
-        for i in range(0, self.n_obj):
-            _f = (1 + g)
-            _f *= anp.prod(anp.cos(anp.power(X_[:, :X_.shape[1] - i], alpha) * anp.pi / 2.0), axis=1)
-            if i > 0:
-                _f *= anp.sin(anp.power(X_[:, X_.shape[1] - i], alpha) * anp.pi / 2.0)
 
-            f.append(_f)
+# the angles of DTLZ5 and DTLZ6 - all except the first one are contracted towards 0.5 depending on g
+def calc_degenerated_angles(X_, g):
+    return anp.column_stack([X_[:, 0], (1 + 2 * g[:, None] * X_[:, 1:]) / (2 * (1 + g[:, None]))])
 
-        f = anp.column_stack(f)
-        return f
+
+# the jacobian of DTLZ5 and DTLZ6 where the angles theta are a function of X_ and g
+def calc_degenerated_jacobian(X_, theta, g, dg):
+    P, dP = calc_spherical_products(theta, alpha=1)
+
+    # the derivatives of theta with respect to X_ (only the diagonal) and with respect to g
+    dtheta = anp.column_stack([anp.ones(X_.shape[0], dtype=X_.dtype), anp.tile((g / (1 + g))[:, None], (1, X_.shape[1] - 1))])
+    dtheta_dg = anp.column_stack([anp.zeros(X_.shape[0], dtype=X_.dtype), (2 * X_[:, 1:] - 1) / (2 * (1 + g[:, None]) ** 2)])
+
+    dF = (1 + g)[:, None, None] * dP * dtheta[:, None, :]
+    dF_dg = P + (1 + g)[:, None] * anp.sum(dP * dtheta_dg[:, None, :], axis=2)
+
+    return anp.concatenate([dF, dF_dg[:, :, None] * dg[:, None, :]], axis=2)
 
 
 def generic_sphere(ref_dirs):
@@ -48,19 +128,18 @@ class DTLZ1(DTLZ):
     def _calc_pareto_front(self, ref_dirs=None):
         return 0.5 * ref_dirs
 
+    def _kernel(self):
+        return kernels.dtlz1, ()
+
     def _evaluate(self, x, out, *args, **kwargs):
         X_, X_M = x[:, :self.n_obj - 1], x[:, self.n_obj - 1:]
         g = self.g1(X_M)
 
-        f = []
-        for i in range(0, self.n_obj):
-            _f = 0.5 * (1 + g)
-            _f *= anp.prod(X_[:, :X_.shape[1] - i], axis=1)
-            if i > 0:
-                _f *= 1 - X_[:, X_.shape[1] - i]
-            f.append(_f)
+        out["F"] = 0.5 * (1 + g)[:, None] * calc_products(X_, 1 - X_)
 
-        out["F"] = anp.column_stack(f)
+        if "dF" in out:
+            P, dP = calc_products_jacobian(X_, anp.ones_like(X_), 1 - X_, -anp.ones_like(X_))
+            out["dF"] = calc_jacobian(0.5 * P, 0.5 * dP, g, self.dg1(X_M))
 
 
 class DTLZ2(DTLZ):
@@ -70,11 +149,17 @@ class DTLZ2(DTLZ):
     def _calc_pareto_front(self, ref_dirs):
         return generic_sphere(ref_dirs)
 
+    def _kernel(self):
+        return kernels.dtlz_spherical, (1.0, 2, False)
+
     def _evaluate(self, x, out, *args, **kwargs):
         X_, X_M = x[:, :self.n_obj - 1], x[:, self.n_obj - 1:]
         g = self.g2(X_M)
         out["F"] = self.obj_func(X_, g, alpha=1)
 
+        if "dF" in out:
+            out["dF"] = self.obj_func_jacobian(X_, g, self.dg2(X_M), alpha=1)
+
 
 class DTLZ3(DTLZ):
     def __init__(self, n_var=10, n_obj=3, **kwargs):
@@ -83,11 +168,17 @@ class DTLZ3(DTLZ):
     def _calc_pareto_front(self, ref_dirs):
         return generic_sphere(ref_dirs)
 
+    def _kernel(self):
+        return kernels.dtlz_spherical, (1.0, 1, False)
+
     def _evaluate(self, x, out, *args, **kwargs):
         X_, X_M = x[:, :self.n_obj - 1], x[:, self.n_obj - 1:]
         g = self.g1(X_M)
         out["F"] = self.obj_func(X_, g, alpha=1)
 
+        if "dF" in out:
+            out["dF"] = self.obj_func_jacobian(X_, g, self.dg1(X_M), alpha=1)
+
 
 class DTLZ4(DTLZ):
     def __init__(self, n_var=10, n_obj=3, alpha=100, d=100, **kwargs):
@@ -98,11 +189,17 @@ class DTLZ4(DTLZ):
     def _calc_pareto_front(self, ref_dirs):
         return generic_sphere(ref_dirs)
 
+    def _kernel(self):
+        return kernels.dtlz_spherical, (float(self.alpha), 2, False)
+
     def _evaluate(self, x, out, *args, **kwargs):
         X_, X_M = x[:, :self.n_obj - 1], x[:, self.n_obj - 1:]
         g = self.g2(X_M)
         out["F"] = self.obj_func(X_, g, alpha=self.alpha)
 
+        if "dF" in out:
+            out["dF"] = self.obj_func_jacobian(X_, g, self.dg2(X_M), alpha=self.alpha)
+
 
 class DTLZ5(DTLZ):
     def __init__(self, n_var=10, n_obj=3, **kwargs):
@@ -111,15 +208,20 @@ class DTLZ5(DTLZ):
     def _calc_pareto_front(self):
         raise Exception("Not implemented yet.")
 
+    def _kernel(self):
+        return kernels.dtlz_spherical, (1.0, 2, True)
+
     def _evaluate(self, x, out, *args, **kwargs):
         X_, X_M = x[:, :self.n_obj - 1], x[:, self.n_obj - 1:]
         g = self.g2(X_M)
 
-        theta = 1 / (2 * (1 + g[:, None])) * (1 + 2 * g[:, None] * X_)
-        theta = anp.column_stack([x[:, 0], theta[:, 1:]])
+        theta = calc_degenerated_angles(X_, g)
 
         out["F"] = self.obj_func(theta, g)
 
+        if "dF" in out:
+            out["dF"] = calc_degenerated_jacobian(X_, theta, g, self.dg2(X_M))
+
 
 class DTLZ6(DTLZ):
     def __init__(self, n_var=10, n_obj=3, **kwargs):
@@ -128,31 +230,44 @@ class DTLZ6(DTLZ):
     def _calc_pareto_front(self):
         raise Exception("Not implemented yet.")
 
+    def _kernel(self):
+        return kernels.dtlz_spherical, (1.0, 3, True)
+
     def _evaluate(self, x, out, *args, **kwargs):
         X_, X_M = x[:, :self.n_obj - 1], x[:, self.n_obj - 1:]
         g = anp.sum(anp.power(X_M, 0.1), axis=1)
 
-        theta = 1 / (2 * (1 + g[:, None])) * (1 + 2 * g[:, None] * X_)
-        theta = anp.column_stack([x[:, 0], theta[:, 1:]])
+        theta = calc_degenerated_angles(X_, g)
 
         out["F"] = self.obj_func(theta, g)
 
+        if "dF" in out:
+            out["dF"] = calc_degenerated_jacobian(X_, theta, g, 0.1 * anp.power(X_M, -0.9))
+
 
 class DTLZ7(DTLZ):
     def __init__(self, n_var=10, n_obj=3, **kwargs):
         super().__init__(n_var, n_obj, **kwargs)
 
+    def _kernel(self):
+        return kernels.dtlz7, ()
+
     def _evaluate(self, x, out, *args, **kwargs):
-        f = []
-        for i in range(0, self.n_obj - 1):
-            f.append(x[:, i])
-        f = anp.column_stack(f)
+        f = x[:, :self.n_obj - 1]
 
         g = 1 + 9 / self.k * anp.sum(x[:, -self.k:], axis=1)
         h = self.n_obj - anp.sum(f / (1 + g[:, None]) * (1 + anp.sin(3 * anp.pi * f)), axis=1)
 
         out["F"] = anp.column_stack([f, (1 + g) * h])
 
+        if "dF" in out:
+            dF = anp.zeros((x.shape[0], self.n_obj, self.n_var), dtype=x.dtype)
+            dF[:, :-1, :self.n_obj - 1] = anp.eye(self.n_obj - 1)
+            dF[:, -1, :self.n_obj - 1] = -(1 + anp.sin(3 * anp.pi * f) + 3 * anp.pi * f * anp.cos(3 * anp.pi * f))
+            dF[:, -1, self.n_obj - 1:] = (h + anp.sum(f * (1 + anp.sin(3 * anp.pi * f)), axis=1) / (1 + g))[:, None] \
+                                         * 9 / self.k
+            out["dF"] = dF
+
 
 class InvertedDTLZ1(DTLZ1):
 
@@ -163,6 +278,10 @@ class InvertedDTLZ1(DTLZ1):
         super()._evaluate(x, out, *args, **kwargs)
         out["F"] = 0.5 * (1 + g[:, None]) - out["F"]
 
+        if "dF" in out:
+            dg = anp.concatenate([anp.zeros_like(X_), 0.5 * self.dg1(X_M)], axis=1)
+            out["dF"] = dg[:, None, :] - out["dF"]
+
     def _calc_pareto_front(self, *args, **kwargs):
         return self.problem.pareto_front(*args, **kwargs)
 
@@ -1,18 +1,30 @@
 import math
-import autograd.numpy as anp
 
+from pymop import kernels
+from pymop.backend import anp
 from pymop.problems import Problem
 
 
+# stacks the gradients (each a list of the derivatives with respect to every variable) of several functions
+# to a jacobian matrix of shape (n, n_functions, n_var) - constant derivatives are broadcasted in the type of x
+def stack_gradients(x, grads):
+    return anp.stack([anp.column_stack([anp.full(x.shape[0], e, dtype=x.dtype) if anp.ndim(e) == 0 else e
+                                        for e in grad])
+                      for grad in grads], axis=1)
+
+
 class G1(Problem):
-    def __init__(self):
+    def __init__(self, **kwargs):
         self.n_var = 13
         self.n_constr = 9
         self.n_obj = 1
         self.xl = anp.zeros(self.n_var)
         self.xu = anp.array([1, 1, 1, 1, 1, 1, 1, 1, 1, 100, 100, 100, 1])
         super(G1, self).__init__(n_var=self.n_var, n_obj=self.n_obj, n_constr=self.n_constr, xl=self.xl, xu=self.xu,
-                                 type_var=anp.double)
+                                 type_var=anp.double, evaluation_of=["F", "dF", "G", "dG"], **kwargs)
+
+    def _kernel(self):
+        return kernels.g1, ()
 
     def _evaluate(self, x, out, *args, **kwargs):
         x1 = x[:, 0: 4]
@@ -33,6 +45,18 @@ class G1(Problem):
         out["F"] = f
         out["G"] = anp.column_stack([g1, g2, g3, g4, g5, g6, g7, g8, g9])
 
+        if "dF" in out:
+            out["dF"] = anp.column_stack([5 - 10 * x1, -anp.ones(x2.shape, dtype=x.dtype)])[:, None, :]
+
+        if "dG" in out:
+            A = anp.zeros((9, 13), dtype=x.dtype)
+            A[[0, 0, 0, 0], [0, 1, 9, 10]] = [2, 2, 1, 1]
+            A[[1, 1, 1, 1], [0, 2, 9, 11]] = [2, 2, 1, 1]
+            A[[2, 2, 2, 2], [1, 2, 10, 11]] = [2, 2, 1, 1]
+            A[[3, 3, 4, 4, 5, 5], [0, 9, 1, 10, 2, 11]] = [-8, 1, -8, 1, -8, 1]
+            A[[6, 6, 6, 7, 7, 7, 8, 8, 8], [3, 4, 9, 5, 6, 10, 7, 8, 11]] = [-2, -1, 1, -2, -1, 1, -2, -1, 1]
+            out["dG"] = anp.tile(A, (x.shape[0], 1, 1))
+
     def _calc_pareto_front(self):
         return -15
 
@@ -41,7 +65,7 @@ class G1(Problem):
 
 
 class G2(Problem):
-    def __init__(self):
+    def __init__(self, **kwargs):
         self.n_var = 20
         self.n_constr = 2
         self.n_obj = 1
@@ -49,18 +73,20 @@ class G2(Problem):
         self.xl = anp.zeros(self.n_var)
         self.xu = 10 * anp.ones(self.n_var)
         super(G2, self).__init__(n_var=self.n_var, n_obj=self.n_obj, n_constr=self.n_constr, xl=self.xl, xu=self.xu,
-                                 type_var=anp.double)
+                                 type_var=anp.double, evaluation_of=["F", "dF", "G", "dG"], **kwargs)
+
+    def _kernel(self):
+        return kernels.g2, ()
 
     def _evaluate(self, x, out, *args, **kwargs):
-        l = []
-        for j in range(self.n_var):
-            l.append((j + 1) * x[:, j] ** 2)
-        sum_jx = anp.sum(anp.column_stack(l), axis=1)
+        J = anp.arange(1, self.n_var + 1, dtype=x.dtype)
+        sum_jx = anp.sum(J * x ** 2, axis=1)
 
-        a = anp.sum(anp.cos(x) ** 4, axis=1)
-        b = 2 * anp.prod(anp.cos(x) ** 2, axis=1)
-        c = (anp.sqrt(sum_jx)).flatten()
-        c = c + (c == 0) * 1e-20
+        cos2 = anp.cos(x) ** 2
+        a = anp.sum(cos2 ** 2, axis=1)
+        b = 2 * anp.prod(cos2, axis=1)
+        c = anp.sqrt(sum_jx)
+        c = c + (c == 0).astype(x.dtype) * 1e-20
 
         f = -anp.absolute((a - b) / c)
 
@@ -71,6 +97,16 @@ class G2(Problem):
         out["F"] = f
         out["G"] = anp.column_stack([g1, g2])
 
+        if "dF" in out:
+            da = -4 * anp.cos(x) ** 3 * anp.sin(x)
+            db = -2 * b[:, None] * anp.tan(x)
+            dc = J * x / c[:, None]
+            dq = (da - db) / c[:, None] - ((a - b) / c ** 2)[:, None] * dc
+            out["dF"] = (-anp.sign((a - b) / c)[:, None] * dq)[:, None, :]
+
+        if "dG" in out:
+            out["dG"] = anp.stack([-anp.prod(x, 1)[:, None] / x, anp.ones(x.shape, dtype=x.dtype)], axis=1)
+
     def _calc_pareto_front(self):
         return -0.80361910412559
 
@@ -84,7 +120,7 @@ class G2(Problem):
 
 class G3(Problem):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         self.n_var = 10
         self.n_constr = 1
         self.n_obj = 1
@@ -92,7 +128,10 @@ class G3(Problem):
         self.xl = anp.zeros(self.n_var)
         self.xu = anp.ones(self.n_var)
         super(G3, self).__init__(n_var=self.n_var, n_obj=self.n_obj, n_constr=self.n_constr, xl=self.xl, xu=self.xu,
-                                 type_var=anp.double)
+                                 type_var=anp.double, evaluation_of=["F", "dF", "G", "dG"], **kwargs)
+
+    def _kernel(self):
+        return kernels.g3, ()
 
     def _evaluate(self, x, out, *args, **kwargs):
         f = -anp.sqrt(self.n_var) ** self.n_var * anp.prod(x, axis=1)
@@ -103,6 +142,12 @@ class G3(Problem):
         out["F"] = f
         out["G"] = g
 
+        if "dF" in out:
+            out["dF"] = (f[:, None] / x)[:, None, :]
+
+        if "dG" in out:
+            out["dG"] = (anp.sign(anp.sum(x ** 2, axis=1) - 1)[:, None] * 2 * x)[:, None, :]
+
     def _calc_pareto_front(self):
         return -1.00050010001000
 
@@ -115,7 +160,7 @@ class G3(Problem):
 
 class G4(Problem):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         self.n_var = 5
         self.n_constr = 6
         self.n_obj = 1
@@ -123,7 +168,10 @@ class G4(Problem):
         self.xl = anp.array([78, 33, 27, 27, 27])
         self.xu = anp.array([102, 45, 45, 45, 45])
         super(G4, self).__init__(n_var=self.n_var, n_obj=self.n_obj, n_constr=self.n_constr, xl=self.xl, xu=self.xu,
-                                 type_var=anp.double)
+                                 type_var=anp.double, evaluation_of=["F", "dF", "G", "dG"], **kwargs)
+
+    def _kernel(self):
+        return kernels.g4, ()
 
     def _evaluate(self, x, out, *args, **kwargs):
         f = 5.3578547 * x[:, 2] ** 2 + 0.8356891 * x[:, 0] * x[:, 4] + 37.293239 * x[:, 0] - 40792.141
@@ -142,6 +190,21 @@ class G4(Problem):
         out["F"] = f
         out["G"] = anp.column_stack([g1, g2, g3, g4, g5, g6])
 
+
+        if "dF" in out:
+            out["dF"] = stack_gradients(x, [[0.8356891 * x[:, 4] + 37.293239, 0, 2 * 5.3578547 * x[:, 2], 0,
+                                             0.8356891 * x[:, 0]]])
+
+        if "dG" in out:
+            du = stack_gradients(x, [[0.0006262 * x[:, 3], 0.0056858 * x[:, 4], -0.0022053 * x[:, 4],
+                                      0.0006262 * x[:, 0], 0.0056858 * x[:, 1] - 0.0022053 * x[:, 2]]])
+            dv = stack_gradients(x, [[0.0029955 * x[:, 1], 0.0071317 * x[:, 4] + 0.0029955 * x[:, 0],
+                                      2 * 0.0021813 * x[:, 2], 0, 0.0071317 * x[:, 1]]])
+            dw = stack_gradients(x, [[0.0012547 * x[:, 2], 0,
+                                      0.0047026 * x[:, 4] + 0.0012547 * x[:, 0] + 0.0019085 * x[:, 3],
+                                      0.0019085 * x[:, 2], 0.0047026 * x[:, 2]]])
+            out["dG"] = anp.concatenate([-du, du, -dv, dv, -dw, dw], axis=1)
+
     def _calc_pareto_front(self):
         return -3.066553867178332 * (10 ** 4)
 
@@ -151,7 +214,7 @@ class G4(Problem):
 
 class G5(Problem):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         self.n_var = 4
         self.n_constr = 5
         self.n_obj = 1
@@ -159,7 +222,10 @@ class G5(Problem):
         self.xl = anp.array([0, 0, -0.55, -0.55])
         self.xu = anp.array([1200, 1200, 0.55, 0.55])
         super(G5, self).__init__(n_var=self.n_var, n_obj=self.n_obj, n_constr=self.n_constr, xl=self.xl, xu=self.xu,
-                                 type_var=anp.double)
+                                 type_var=anp.double, evaluation_of=["F", "dF", "G", "dG"], **kwargs)
+
+    def _kernel(self):
+        return kernels.g5, ()
 
     def _evaluate(self, x, out, *args, **kwargs):
         f = 3 * x[:, 0] + (10 ** -6) * x[:, 0] ** 3 + 2 * x[:, 1] + (2 * 10 ** (-6)) / 3 * x[:, 1] ** 3
@@ -176,6 +242,25 @@ class G5(Problem):
         out["F"] = f
         out["G"] = anp.column_stack([g1, g2, g3, g4, g5])
 
+
+        if "dF" in out:
+            out["dF"] = stack_gradients(x, [[3 + 3 * 10 ** -6 * x[:, 0] ** 2, 2 + 2 * 10 ** -6 * x[:, 1] ** 2, 0, 0]])
+
+        if "dG" in out:
+            s3 = anp.sign(1000 * (anp.sin(-x[:, 2] - 0.25) + anp.sin(-x[:, 3] - 0.25)) + 894.8 - x[:, 0])
+            s4 = anp.sign(1000 * (anp.sin(x[:, 2] - 0.25) + anp.sin(x[:, 2] - x[:, 3] - 0.25)) + 894.8 - x[:, 1])
+            s5 = anp.sign(1000 * (anp.sin(x[:, 3] - 0.25) + anp.sin(x[:, 3] - x[:, 2] - 0.25)) + 1294.8)
+
+            out["dG"] = stack_gradients(x, [
+                [0, 0, 1, -1],
+                [0, 0, -1, 1],
+                [-s3, 0, -1000 * s3 * anp.cos(-x[:, 2] - 0.25), -1000 * s3 * anp.cos(-x[:, 3] - 0.25)],
+                [0, -s4, 1000 * s4 * (anp.cos(x[:, 2] - 0.25) + anp.cos(x[:, 2] - x[:, 3] - 0.25)),
+                 -1000 * s4 * anp.cos(x[:, 2] - x[:, 3] - 0.25)],
+                [0, 0, -1000 * s5 * anp.cos(x[:, 3] - x[:, 2] - 0.25),
+                 1000 * s5 * (anp.cos(x[:, 3] - 0.25) + anp.cos(x[:, 3] - x[:, 2] - 0.25))]
+            ])
+
     def _calc_pareto_front(self):
         return 5126.4967140071
 
@@ -185,7 +270,7 @@ class G5(Problem):
 
 class G6(Problem):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         self.n_var = 2
         self.n_constr = 2
         self.n_obj = 1
@@ -193,7 +278,10 @@ class G6(Problem):
         self.xl = anp.array([13, 0])
         self.xu = anp.array([100, 100])
         super(G6, self).__init__(n_var=self.n_var, n_obj=self.n_obj, n_constr=self.n_constr, xl=self.xl, xu=self.xu,
-                                 type_var=anp.double)
+                                 type_var=anp.double, evaluation_of=["F", "dF", "G", "dG"], **kwargs)
+
+    def _kernel(self):
+        return kernels.g6, ()
 
     def _evaluate(self, x, out, *args, **kwargs):
         f = (x[:, 0] - 10) ** 3 + (x[:, 1] - 20) ** 3
@@ -205,6 +293,14 @@ class G6(Problem):
         out["F"] = f
         out["G"] = anp.column_stack([g1, g2])
 
+
+        if "dF" in out:
+            out["dF"] = stack_gradients(x, [[3 * (x[:, 0] - 10) ** 2, 3 * (x[:, 1] - 20) ** 2]])
+
+        if "dG" in out:
+            out["dG"] = stack_gradients(x, [[-2 * (x[:, 0] - 5), -2 * (x[:, 1] - 5)],
+                                            [2 * (x[:, 0] - 6), 2 * (x[:, 1] - 5)]])
+
     def _calc_pareto_front(self):
         return -6961.81387558015
 
@@ -214,7 +310,7 @@ class G6(Problem):
 
 class G7(Problem):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         self.n_var = 10
         self.n_constr = 8
         self.n_obj = 1
@@ -222,7 +318,10 @@ class G7(Problem):
         self.xl = -10 * anp.ones(self.n_var)
         self.xu = 10 * anp.ones(self.n_var)
         super(G7, self).__init__(n_var=self.n_var, n_obj=self.n_obj, n_constr=self.n_constr, xl=self.xl, xu=self.xu,
-                                 type_var=anp.double)
+                                 type_var=anp.double, evaluation_of=["F", "dF", "G", "dG"], **kwargs)
+
+    def _kernel(self):
+        return kernels.g7, ()
 
     def _evaluate(self, x, out, *args, **kwargs):
         f = x[:, 0] ** 2 + x[:, 1] ** 2 + x[:, 0] * x[:, 1] - 14 * x[:, 0] - 16 * x[:, 1] + (x[:, 2] - 10) ** 2 \
@@ -242,6 +341,24 @@ class G7(Problem):
         out["F"] = f
         out["G"] = anp.column_stack([g1, g2, g3, g4, g5, g6, g7, g8])
 
+
+        if "dF" in out:
+            out["dF"] = stack_gradients(x, [[2 * x[:, 0] + x[:, 1] - 14, 2 * x[:, 1] + x[:, 0] - 16, 2 * (x[:, 2] - 10),
+                                             8 * (x[:, 3] - 5), 2 * (x[:, 4] - 3), 4 * (x[:, 5] - 1), 10 * x[:, 6],
+                                             14 * (x[:, 7] - 11), 4 * (x[:, 8] - 10), 2 * (x[:, 9] - 7)]])
+
+        if "dG" in out:
+            out["dG"] = stack_gradients(x, [
+                [4, 5, 0, 0, 0, 0, -3, 9, 0, 0],
+                [10, -8, 0, 0, 0, 0, -17, 2, 0, 0],
+                [-8, 2, 0, 0, 0, 0, 0, 0, 5, -2],
+                [6 * (x[:, 0] - 2), 8 * (x[:, 1] - 3), 4 * x[:, 2], -7, 0, 0, 0, 0, 0, 0],
+                [10 * x[:, 0], 8, 2 * (x[:, 2] - 6), -2, 0, 0, 0, 0, 0, 0],
+                [x[:, 0] - 8, 4 * (x[:, 1] - 4), 0, 0, 6 * x[:, 4], -1, 0, 0, 0, 0],
+                [2 * x[:, 0] - 2 * x[:, 1], 4 * (x[:, 1] - 2) - 2 * x[:, 0], 0, 0, 14, -6, 0, 0, 0, 0],
+                [-3, 6, 0, 0, 0, 0, 0, 0, 24 * (x[:, 8] - 8), -7]
+            ])
+
     def _calc_pareto_front(self):
         return 24.30620906818
 
@@ -253,7 +370,7 @@ class G7(Problem):
 
 class G8(Problem):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         self.n_var = 2
         self.n_constr = 2
         self.n_obj = 1
@@ -261,7 +378,10 @@ class G8(Problem):
         self.xl = anp.zeros(self.n_var)
         self.xu = 10 * anp.ones(self.n_var)
         super(G8, self).__init__(n_var=self.n_var, n_obj=self.n_obj, n_constr=self.n_constr, xl=self.xl, xu=self.xu,
-                                 type_var=anp.double)
+                                 type_var=anp.double, evaluation_of=["F", "dF", "G", "dG"], **kwargs)
+
+    def _kernel(self):
+        return kernels.g8, ()
 
     def _evaluate(self, x, out, *args, **kwargs):
         f = -(anp.sin(2 * math.pi * x[:, 0]) ** 3 * anp.sin(2 * math.pi * x[:, 1])) / (
@@ -274,6 +394,20 @@ class G8(Problem):
         out["F"] = f
         out["G"] = anp.column_stack([g1, g2])
 
+
+        if "dF" in out:
+            s0, s1 = anp.sin(2 * math.pi * x[:, 0]), anp.sin(2 * math.pi * x[:, 1])
+            c0, c1 = anp.cos(2 * math.pi * x[:, 0]), anp.cos(2 * math.pi * x[:, 1])
+
+            num, den = s0 ** 3 * s1, x[:, 0] ** 3 * (x[:, 0] + x[:, 1])
+            dnum = [6 * math.pi * s0 ** 2 * c0 * s1, 2 * math.pi * s0 ** 3 * c1]
+            dden = [3 * x[:, 0] ** 2 * (x[:, 0] + x[:, 1]) + x[:, 0] ** 3, x[:, 0] ** 3]
+
+            out["dF"] = stack_gradients(x, [[-(dnum[j] * den - num * dden[j]) / den ** 2 for j in range(2)]])
+
+        if "dG" in out:
+            out["dG"] = stack_gradients(x, [[2 * x[:, 0], -1], [-1, 2 * (x[:, 1] - 4)]])
+
     def _calc_pareto_front(self):
         return -0.0958250414180359
 
@@ -283,7 +417,7 @@ class G8(Problem):
 
 class G9(Problem):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         self.n_var = 7
         self.n_constr = 4
         self.n_obj = 1
@@ -291,7 +425,10 @@ class G9(Problem):
         self.xl = -10 * anp.zeros(self.n_var)
         self.xu = 10 * anp.ones(self.n_var)
         super(G9, self).__init__(n_var=self.n_var, n_obj=self.n_obj, n_constr=self.n_constr, xl=self.xl, xu=self.xu,
-                                 type_var=anp.double)
+                                 type_var=anp.double, evaluation_of=["F", "dF", "G", "dG"], **kwargs)
+
+    def _kernel(self):
+        return kernels.g9, ()
 
     def _evaluate(self, x, out, *args, **kwargs):
         f = (x[:, 0] - 10) ** 2 + 5 * (x[:, 1] - 12) ** 2 + x[:, 2] ** 4 \
@@ -309,6 +446,20 @@ class G9(Problem):
         out["F"] = f[:, None]
         out["G"] = anp.column_stack([g1, g2, g3, g4])
 
+
+        if "dF" in out:
+            out["dF"] = stack_gradients(x, [[2 * (x[:, 0] - 10), 10 * (x[:, 1] - 12), 4 * x[:, 2] ** 3,
+                                             6 * (x[:, 3] - 11), 60 * x[:, 4] ** 5, 14 * x[:, 5] - 4 * x[:, 6] - 10,
+                                             4 * x[:, 6] ** 3 - 4 * x[:, 5] - 8]])
+
+        if "dG" in out:
+            out["dG"] = stack_gradients(x, [
+                [4 * x[:, 0], 12 * x[:, 1] ** 3, 1, 8 * x[:, 3], 5, 0, 0],
+                [7, 3, 20 * x[:, 2], 1, -1, 0, 0],
+                [23, 2 * x[:, 1], 0, 0, 0, 12 * x[:, 5], -8],
+                [8 * x[:, 0] - 3 * x[:, 1], 2 * x[:, 1] - 3 * x[:, 0], 4 * x[:, 2], 0, 0, 5, -11]
+            ])
+
     def _calc_pareto_front(self):
         return 680.630057374402
 
@@ -319,7 +470,7 @@ class G9(Problem):
 
 class G10(Problem):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         self.n_var = 8
         self.n_constr = 6
         self.n_obj = 1
@@ -327,7 +478,10 @@ class G10(Problem):
         self.xl = anp.array([100, 1000, 1000, 10, 10, 10, 10, 10])
         self.xu = anp.array([10000, 10000, 10000, 1000, 1000, 1000, 1000, 1000])
         super(G10, self).__init__(n_var=self.n_var, n_obj=self.n_obj, n_constr=self.n_constr, xl=self.xl, xu=self.xu,
-                                  type_var=anp.double)
+                                  type_var=anp.double, evaluation_of=["F", "dF", "G", "dG"], **kwargs)
+
+    def _kernel(self):
+        return kernels.g10, ()
 
     def _evaluate(self, x, out, *args, **kwargs):
         f = x[:, 0] + x[:, 1] + x[:, 2]
@@ -338,11 +492,25 @@ class G10(Problem):
         g3 = -1 + 0.01 * (-x[:, 4] + x[:, 7])
         g4 = 100 * x[:, 0] - x[:, 0] * x[:, 5] + 833.33252 * x[:, 3] - 83333.333
         g5 = x[:, 1] * x[:, 3] - x[:, 1] * x[:, 6] - 1250 * x[:, 3] + 1250 * x[:, 4]
-        g6 = x[:, 2] * x[:, 4] - x[:, 2] * x[:, 7] - 2500. * x[:, 4] + 1250000
+        g6 = x[:, 2] * x[:, 4] - x[:, 2] * x[:, 7] - 2500. * x[:, 4] + 1250000.
 
         out["F"] = f
         out["G"] = anp.column_stack([g1, g2, g3, g4, g5, g6])
 
+
+        if "dF" in out:
+            out["dF"] = stack_gradients(x, [[1, 1, 1, 0, 0, 0, 0, 0]])
+
+        if "dG" in out:
+            out["dG"] = stack_gradients(x, [
+                [0, 0, 0, 0.0025, 0, 0.0025, 0, 0],
+                [0, 0, 0, -0.0025, 0.0025, 0, 0.0025, 0],
+                [0, 0, 0, 0, -0.01, 0, 0, 0.01],
+                [100 - x[:, 5], 0, 0, 833.33252, 0, -x[:, 0], 0, 0],
+                [0, x[:, 3] - x[:, 6], 0, x[:, 1] - 1250, 1250, 0, -x[:, 1], 0],
+                [0, 0, x[:, 4] - x[:, 7], 0, x[:, 2] - 2500, 0, 0, -x[:, 2]]
+            ])
+
     def _calc_pareto_front(self):
         return 7049.24802052867
 
@@ -1,12 +1,11 @@
-import autograd.numpy as np
-
+from pymop.backend import anp as np
 from pymop.problem import Problem
 
 
 class Griewank(Problem):
-    def __init__(self, n_var=2):
-        super().__init__(n_var=n_var, n_obj=1, n_constr=0, xl=-600, xu=600, type_var=np.double)
+    def __init__(self, n_var=2, **kwargs):
+        super().__init__(n_var=n_var, n_obj=1, n_constr=0, xl=-600, xu=600, type_var=np.double, **kwargs)
 
     def _evaluate(self, x, out, *args, **kwargs):
         out["F"] = 1 + 1 / 4000 * np.sum(np.power(x, 2), axis=1) \
-                  - np.prod(np.cos(x / np.sqrt(np.arange(1, x.shape[1] + 1))), axis=1)
\ No newline at end of file
+                  - np.prod(np.cos(x / np.sqrt(np.arange(1, x.shape[1] + 1, dtype=x.dtype))), axis=1)
\ No newline at end of file
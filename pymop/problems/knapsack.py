@@ -1,5 +1,4 @@
-import autograd.numpy as anp
-
+from pymop.backend import anp
 from pymop.problem import Problem
 
 
@@ -9,8 +8,8 @@ class Knapsack(Problem):
                  W,  # weights for each item
                  P,  # profit of each item
                  C,  # maximum capacity
-                 ):
-        super().__init__(n_var=n_items, n_obj=1, n_constr=0, xl=0, xu=1, type_var=anp.bool)
+                 **kwargs):
+        super().__init__(n_var=n_items, n_obj=1, n_constr=0, xl=0, xu=1, type_var=anp.bool, **kwargs)
 
         self.n_var = n_items
         self.n_constr = 1
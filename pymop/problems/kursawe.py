@@ -1,18 +1,14 @@
-import autograd.numpy as anp
-
+from pymop.backend import anp
 from pymop import load_pareto_front_from_file
 from pymop.problem import Problem
 
 
 class Kursawe(Problem):
-    def __init__(self):
-        super().__init__(n_var=3, n_obj=2, n_constr=0, xl=-5, xu=5, type_var=anp.double)
+    def __init__(self, **kwargs):
+        super().__init__(n_var=3, n_obj=2, n_constr=0, xl=-5, xu=5, type_var=anp.double, **kwargs)
 
     def _evaluate(self, x, out, *args, **kwargs):
-        l = []
-        for i in range(2):
-            l.append(-10 * anp.exp(-0.2 * anp.sqrt(anp.square(x[:, i]) + anp.square(x[:, i + 1]))))
-        f1 = anp.sum(anp.column_stack(l), axis=1)
+        f1 = anp.sum(-10 * anp.exp(-0.2 * anp.sqrt(anp.square(x[:, :-1]) + anp.square(x[:, 1:]))), axis=1)
 
         f2 = anp.sum(anp.power(anp.abs(x), 0.8) + 5 * anp.sin(anp.power(x, 3)), axis=1)
 
@@ -1,12 +1,11 @@
-import autograd.numpy as anp
-
+from pymop.backend import anp
 from pymop import load_pareto_front_from_file
 from pymop.problem import Problem
 
 
 class OSY(Problem):
-    def __init__(self):
-        super().__init__(n_var=6, n_obj=2, n_constr=6, type_var=anp.double)
+    def __init__(self, **kwargs):
+        super().__init__(n_var=6, n_obj=2, n_constr=6, type_var=anp.double, **kwargs)
         self.xl = anp.array([0.0, 0.0, 1.0, 0.0, 1.0, 0.0])
         self.xu = anp.array([10.0, 10.0, 5.0, 6.0, 5.0, 10.0])
 
@@ -1,11 +1,10 @@
-import autograd.numpy as anp
-
+from pymop.backend import anp
 from pymop.problem import Problem
 
 
 class PressureVessel(Problem):
-    def __init__(self):
-        super().__init__(n_var=4, n_obj=1, n_constr=4, type_var=anp.double)
+    def __init__(self, **kwargs):
+        super().__init__(n_var=4, n_obj=1, n_constr=4, type_var=anp.double, **kwargs)
         self.xl = anp.array([1, 1, 10.0, 10.0])
         self.xu = anp.array([99, 99, 200.0, 200.0])
 
@@ -17,7 +16,7 @@ class PressureVessel(Problem):
 
         g1 = (-d1 + 0.0193*r)/3
         g2 = (-d2 + 0.00954*r)/3
-        g3 = (-anp.pi * r ** 2 * L - 4 * anp.pi / 3 * r ** 3 + 1296000) / 1296000
+        g3 = (-anp.pi * r ** 2 * L - 4 * anp.pi / 3 * r ** 3 + 1296000.0) / 1296000.0
         g4 = (L - 240)/240
 
         out["G"] = anp.column_stack([g1, g2, g3, g4])
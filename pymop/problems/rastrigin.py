@@ -1,11 +1,10 @@
-import autograd.numpy as anp
-
+from pymop.backend import anp
 from pymop.problem import Problem
 
 
 class Rastrigin(Problem):
-    def __init__(self, n_var=2, A=10.0):
-        super().__init__(n_var=n_var, n_obj=1, n_constr=0, xl=-5, xu=5, type_var=anp.double)
+    def __init__(self, n_var=2, A=10.0, **kwargs):
+        super().__init__(n_var=n_var, n_obj=1, n_constr=0, xl=-5, xu=5, type_var=anp.double, **kwargs)
         self.A = A
 
     def _evaluate(self, x, out, *args, **kwargs):
@@ -1,12 +1,11 @@
-import autograd.numpy as anp
-
+from pymop.backend import anp
 from pymop import load_pareto_front_from_file
 from pymop.problem import Problem
 
 
 class TNK(Problem):
-    def __init__(self):
-        super().__init__(n_var=2, n_obj=2, n_constr=2, type_var=anp.double)
+    def __init__(self, **kwargs):
+        super().__init__(n_var=2, n_obj=2, n_constr=2, type_var=anp.double, **kwargs)
         self.xl = anp.array([0, 1e-30])
         self.xu = anp.array([anp.pi, anp.pi])
 
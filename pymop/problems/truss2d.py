@@ -1,12 +1,11 @@
-import autograd.numpy as anp
-
+from pymop.backend import anp
 from pymop.problem import Problem
 
 
 class Truss2D(Problem):
 
-    def __init__(self):
-        super().__init__(n_var=3, n_obj=2, n_constr=1, type_var=anp.double)
+    def __init__(self, **kwargs):
+        super().__init__(n_var=3, n_obj=2, n_constr=1, type_var=anp.double, **kwargs)
 
         self.Amax = 0.01
         self.Smax = 1e5
@@ -1,12 +1,11 @@
-import autograd.numpy as anp
-
+from pymop.backend import anp
 from pymop.problem import Problem
 from pymop.util import load_pareto_front_from_file
 
 
 class WeldedBeam(Problem):
-    def __init__(self):
-        super().__init__(n_var=4, n_obj=2, n_constr=4, type_var=anp.double)
+    def __init__(self, **kwargs):
+        super().__init__(n_var=4, n_obj=2, n_constr=4, type_var=anp.double, **kwargs)
         self.xl = anp.array([0.125, 0.1, 0.1, 0.125])
         self.xu = anp.array([5.0, 10.0, 10.0, 5.0])
 
@@ -25,7 +24,7 @@ class WeldedBeam(Problem):
         t1 = P / (anp.sqrt(2) * x[:, 0] * x[:, 1])
         t2 = M * R / J
         t = anp.sqrt(t1 ** 2 + t2 ** 2 + t1 * t2 * x[:, 1] / R)
-        s = 6 * P * L / (x[:, 3] * x[:, 2] ** 2)
+        s = 6.0 * P * L / (x[:, 3] * x[:, 2] ** 2)
         P_c = 64746.022 * (1 - 0.0282346 * x[:, 2]) * x[:, 2] * x[:, 3] ** 3
 
         g1 = (1 / t_max) * (t - t_max)
@@ -1,12 +1,27 @@
-import autograd.numpy as anp
-
+from pymop import kernels
+from pymop.backend import anp
 from pymop.problem import Problem
 
 
 class ZDT(Problem):
 
-    def __init__(self, n_var=30, **kwargs):
-        super().__init__(n_var=n_var, n_obj=2, n_constr=0, xl=0, xu=1, type_var=anp.double, **kwargs)
+    def __init__(self, n_var=30, evaluation_of=None, **kwargs):
+
+        # by default the analytic jacobian is provided - a new list for each problem as it can be modified
+        if evaluation_of is None:
+            evaluation_of = ["F", "dF"]
+
+        super().__init__(n_var=n_var, n_obj=2, n_constr=0, xl=0, xu=1, type_var=anp.double,
+                         evaluation_of=evaluation_of, **kwargs)
+
+
+# the jacobian of (f1, f2) if f1 depends only on x[:, 0] and g on all other variables
+def calc_jacobian(df1, df2, df2_dg, dg, n_var):
+    dF = anp.zeros((df1.shape[0], 2, n_var), dtype=df2.dtype)
+    dF[:, 0, 0] = df1
+    dF[:, 1, 0] = df2
+    dF[:, 1, 1:] = df2_dg[:, None] * dg
+    return dF
 
 
 class ZDT1(ZDT):
@@ -15,6 +30,9 @@ class ZDT1(ZDT):
         x = anp.linspace(0, 1, n_pareto_points)
         return anp.array([x, 1 - anp.sqrt(x)]).T
 
+    def _kernel(self):
+        return kernels.zdt1, ()
+
     def _evaluate(self, x, out, *args, **kwargs):
         f1 = x[:, 0]
         g = 1 + 9.0 / (self.n_var - 1) * anp.sum(x[:, 1:], axis=1)
@@ -22,6 +40,10 @@ class ZDT1(ZDT):
 
         out["F"] = anp.column_stack([f1, f2])
 
+        if "dF" in out:
+            out["dF"] = calc_jacobian(anp.ones(x.shape[0]), -0.5 * anp.sqrt(g / f1), 1 - 0.5 * anp.sqrt(f1 / g),
+                                      9.0 / (self.n_var - 1), self.n_var)
+
 
 class ZDT2(ZDT):
 
@@ -29,6 +51,9 @@ class ZDT2(ZDT):
         x = anp.linspace(0, 1, n_pareto_points)
         return anp.array([x, 1 - anp.power(x, 2)]).T
 
+    def _kernel(self):
+        return kernels.zdt2, ()
+
     def _evaluate(self, x, out, *args, **kwargs):
         f1 = x[:, 0]
         c = anp.sum(x[:, 1:], axis=1)
@@ -37,6 +62,10 @@ class ZDT2(ZDT):
 
         out["F"] = anp.column_stack([f1, f2])
 
+        if "dF" in out:
+            out["dF"] = calc_jacobian(anp.ones(x.shape[0]), -2 * f1 / g, 1 + anp.power(f1 / g, 2),
+                                      9.0 / (self.n_var - 1), self.n_var)
+
 
 class ZDT3(ZDT):
 
@@ -54,6 +83,9 @@ class ZDT3(ZDT):
             pareto_front = anp.concatenate((pareto_front, anp.array([x1, x2]).T), axis=0)
         return pareto_front
 
+    def _kernel(self):
+        return kernels.zdt3, ()
+
     def _evaluate(self, x, out, *args, **kwargs):
         f1 = x[:, 0]
         c = anp.sum(x[:, 1:], axis=1)
@@ -62,10 +94,15 @@ class ZDT3(ZDT):
 
         out["F"] = anp.column_stack([f1, f2])
 
+        if "dF" in out:
+            df2 = -0.5 * anp.sqrt(g / f1) - anp.sin(10 * anp.pi * f1) - 10 * anp.pi * f1 * anp.cos(10 * anp.pi * f1)
+            out["dF"] = calc_jacobian(anp.ones(x.shape[0]), df2, 1 - 0.5 * anp.sqrt(f1 / g),
+                                      9.0 / (self.n_var - 1), self.n_var)
+
 
 class ZDT4(ZDT):
-    def __init__(self, n_var=10):
-        super().__init__(n_var)
+    def __init__(self, n_var=10, **kwargs):
+        super().__init__(n_var, **kwargs)
         self.xl = -5 * anp.ones(self.n_var)
         self.xl[0] = 0.0
         self.xu = 5 * anp.ones(self.n_var)
@@ -76,17 +113,22 @@ class ZDT4(ZDT):
         x = anp.linspace(0, 1, n_pareto_points)
         return anp.array([x, 1 - anp.sqrt(x)]).T
 
+    def _kernel(self):
+        return kernels.zdt4, ()
+
     def _evaluate(self, x, out, *args, **kwargs):
         f1 = x[:, 0]
-        g = 1.0
-        g += 10 * (self.n_var - 1)
-        for i in range(1, self.n_var):
-            g += x[:, i] * x[:, i] - 10.0 * anp.cos(4.0 * anp.pi * x[:, i])
+        g = 1.0 + 10 * (self.n_var - 1) + anp.sum(x[:, 1:] * x[:, 1:] - 10.0 * anp.cos(4.0 * anp.pi * x[:, 1:]), axis=1)
         h = 1.0 - anp.sqrt(f1 / g)
         f2 = g * h
 
         out["F"] = anp.column_stack([f1, f2])
 
+        if "dF" in out:
+            dg = 2 * x[:, 1:] + 40 * anp.pi * anp.sin(4.0 * anp.pi * x[:, 1:])
+            out["dF"] = calc_jacobian(anp.ones(x.shape[0]), -0.5 * anp.sqrt(g / f1), 1 - 0.5 * anp.sqrt(f1 / g), dg,
+                                      self.n_var)
+
 
 class ZDT6(ZDT):
 
@@ -94,9 +136,18 @@ class ZDT6(ZDT):
         x = anp.linspace(0.2807753191, 1, n_pareto_points)
         return anp.array([x, 1 - anp.power(x, 2)]).T
 
+    def _kernel(self):
+        return kernels.zdt6, ()
+
     def _evaluate(self, x, out, *args, **kwargs):
         f1 = 1 - anp.exp(-4 * x[:, 0]) * anp.power(anp.sin(6 * anp.pi * x[:, 0]), 6)
         g = 1 + 9.0 * anp.power(anp.sum(x[:, 1:], axis=1) / (self.n_var - 1.0), 0.25)
         f2 = g * (1 - anp.power(f1 / g, 2))
 
         out["F"] = anp.column_stack([f1, f2])
+
+        if "dF" in out:
+            s = anp.sin(6 * anp.pi * x[:, 0])
+            df1 = anp.exp(-4 * x[:, 0]) * anp.power(s, 5) * (4 * s - 36 * anp.pi * anp.cos(6 * anp.pi * x[:, 0]))
+            dg = 2.25 / (self.n_var - 1.0) * anp.power(anp.sum(x[:, 1:], axis=1) / (self.n_var - 1.0), -0.75)
+            out["dF"] = calc_jacobian(df1, -2 * f1 / g * df1, 1 + anp.power(f1 / g, 2), dg[:, None], self.n_var)
@@ -0,0 +1,153 @@
+import numpy as np
+
+from pymop.gradient import calc_derivatives, calc_jacobian_fd
+
+
+def detect_sparsity(fun, xl, xu, n_var, keys, mode="reverse", n_points=5, seed=1):
+    """
+    Detects the sparsity pattern of the jacobian matrices by probing them at random points within the bounds. An
+    entry is assumed to be structurally nonzero if it is nonzero for at least one of the points.
+
+    Parameters
+    ----------
+    fun : func
+        A function returning a dictionary with the values of all rows of its input.
+
+    xl : np.array
+        The lower bounds of the variables. If None, 0 is used.
+
+    xu : np.array
+        The upper bounds of the variables. If None, 1 is used.
+
+    n_var : int
+        The number of variables.
+
+    keys : list
+        The outputs the sparsity pattern is detected for.
+
+    mode : str
+        The mode the jacobian matrices are calculated with - autograd if it is not a finite difference scheme.
+
+    n_points : int
+        The number of random points the jacobian matrices are calculated at.
+
+    seed : int
+        The random seed of the points - the global random state is not changed.
+
+    Returns
+    -------
+    patterns : dict
+        The boolean matrix of size (n_outputs, n_var) for each key whose output is set by the function.
+
+    """
+
+    xl = np.zeros(n_var) if xl is None else xl
+    xu = np.ones(n_var) if xu is None else xu
+    X = xl + np.random.RandomState(seed).random_sample((n_points, n_var)) * (xu - xl)
+
+    if mode in ["fd-forward", "fd-central", "complex-step"]:
+        _, jac = calc_jacobian_fd(fun, X, keys, mode=mode)
+    else:
+        _, deriv = calc_derivatives(fun, X, keys, [])
+        jac = {key[1:]: val for key, val in deriv.items()}
+
+    return {key: np.any(val != 0, axis=0) for key, val in jac.items()}
+
+
+def color_columns(pattern):
+    """
+    Colors the columns (variables) of a sparsity pattern greedily - the columns with the most nonzeros first. Two
+    columns get different colors if an output depends on both of them. All columns of one color can be perturbed
+    at once and the number of passes to calculate the jacobian is the number of colors.
+
+    Returns
+    -------
+    colors : np.array
+        The color of each column starting at zero.
+
+    """
+
+    n_var = pattern.shape[1]
+    colors = np.full(n_var, -1, dtype=int)
+
+    for j in np.argsort(-pattern.sum(axis=0), kind="stable"):
+
+        # the colors of all columns sharing at least one output with this column
+        neighbours = np.any(pattern[pattern[:, j]], axis=0)
+        used = set(colors[neighbours].tolist())
+
+        c = 0
+        while c in used:
+            c += 1
+        colors[j] = c
+
+    return colors
+
+
+def decompress(C, colors, pattern, sparse=False):
+    """
+    Recovers the jacobian matrices from the compressed ones of size (n_rows, n_outputs, n_colors) calculated by
+    perturbing all columns of one color at once.
+
+    Parameters
+    ----------
+    C : np.array
+        The compressed jacobian matrices.
+
+    colors : np.array
+        The color of each column.
+
+    pattern : np.array
+        The sparsity pattern of size (n_outputs, n_var).
+
+    sparse : bool
+        If true a scipy.sparse.coo_matrix of size (n_rows * n_outputs, n_var) is returned, where the jacobian
+        of row i is stored in the rows i * n_outputs to (i + 1) * n_outputs. Otherwise a dense array of size
+        (n_rows, n_outputs, n_var).
+
+    """
+
+    if not sparse:
+        return np.where(pattern, C[:, :, colors], 0.0)
+
+    n = C.shape[0]
+    n_outputs, n_var = pattern.shape
+    rows, cols = np.nonzero(pattern)
+
+    data = C[:, rows, colors[cols]]
+    I = (np.arange(n)[:, None] * n_outputs + rows[None, :]).ravel()
+    J = np.tile(cols, n)
+
+    return coo_matrix()((data.ravel(), (I, J)), shape=(n * n_outputs, n_var))
+
+
+# converts dense jacobian matrices of size (n_rows, n_outputs, n_var) to the sparse layout
+def to_sparse(jac):
+    return coo_matrix()(np.reshape(jac, (-1, jac.shape[-1])))
+
+
+# the columns of the (dense or sparse) jacobian matrices of the given variables
+def select_columns(jac, columns):
+    if is_sparse(jac):
+        return jac.tocsc()[:, columns].tocoo()
+    return jac[..., columns]
+
+
+def is_sparse(val):
+    return type(val).__module__.startswith("scipy.sparse")
+
+
+# stacks the values of blocks of rows - sparse jacobian matrices are stacked by scipy
+def concatenate(vals):
+    if is_sparse(vals[0]):
+        from scipy.sparse import vstack
+        return vstack(vals, format="coo")
+    return np.concatenate(vals, axis=0)
+
+
+def coo_matrix():
+    try:
+        from scipy.sparse import coo_matrix
+    except ImportError:
+        raise Exception("Sparse jacobian matrices require scipy. Please install it (pip install scipy).")
+    return coo_matrix
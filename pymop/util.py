@@ -1,7 +1,8 @@
 import os
 
 import numpy as np
-import autograd.numpy as anp
+
+from pymop.backend import anp
 
 
 
@@ -0,0 +1,182 @@
+import asyncio
+import threading
+import unittest
+
+import numpy as np
+
+from pymop import WeldedBeam, ZDT1
+from pymop.asynchronous import EvaluationQueue, BatchCoalescer
+from pymop.problem import Problem
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+class AsynchronousTest(unittest.TestCase):
+
+    def test_evaluate_async(self):
+        problem = WeldedBeam()
+        X = np.random.random((20, problem.n_var))
+
+        F, CV = problem.evaluate(X)
+        _F, _CV = run(problem.evaluate_async(X))
+
+        self.assertTrue(np.array_equal(F, _F))
+        self.assertTrue(np.array_equal(CV, _CV))
+
+    def check_queue(self, parallelization):
+        problem = WeldedBeam()
+        X = np.random.random((20, problem.n_var))
+        correct = problem.evaluate(X, return_values_of=["F", "CV", "feasible"], return_as_dictionary=True)
+
+        with EvaluationQueue(problem, parallelization=parallelization, n_workers=2,
+                             return_values_of=["F", "CV", "feasible"]) as queue:
+
+            ids = queue.submit(X[:10])
+            id, x, out = run(queue.next())
+            self.assertIn(id, ids)
+
+            # the pool of the problem is replaced by this call - the one of the queue must not be affected
+            problem.evaluate(X, parallelization="threads", n_workers=3)
+
+            queue.submit(X[10:])
+            results = [(id, x, out)] + run(queue.results()) + queue.poll()
+
+            self.assertEqual(len(queue), 0)
+            self.assertEqual(sorted([id for id, _, _ in results]), list(range(20)))
+
+            for id, x, out in results:
+                self.assertTrue(np.array_equal(X[id], x))
+                for key in ["F", "CV", "feasible"]:
+                    self.assertTrue(np.allclose(correct[key][id], out[key]))
+
+        problem.shutdown()
+
+    def test_queue_threads(self):
+        self.check_queue("threads")
+
+    def test_queue_process(self):
+        self.check_queue("process")
+
+    def test_poll(self):
+        problem = ZDT1()
+        queue = EvaluationQueue(problem)
+        id = queue.submit(np.random.random(problem.n_var))
+
+        results = []
+        while len(results) == 0:
+            results = queue.poll()
+
+        self.assertEqual(results[0][0], id)
+        self.assertEqual(results[0][2]["F"].shape, (2,))
+        queue.close()
+
+    def test_close(self):
+        problem = ZDT1()
+        X = np.random.random((10, problem.n_var))
+
+        queue = EvaluationQueue(problem, parallelization="process", n_workers=2)
+        queue.submit(X)
+        queue.close()
+
+        # all rows submitted before closing are evaluated and no more can be submitted
+        self.assertEqual(len(run(queue.results())), 10)
+        self.assertRaisesRegex(Exception, "closed", queue.submit, X)
+
+
+class BatchCoalescerTest(unittest.TestCase):
+
+    def test_coalescing(self):
+        problem = WeldedBeam()
+        X = np.random.random((40, problem.n_var))
+        F, CV = problem.evaluate(X)
+
+        coalescer = BatchCoalescer(problem, max_batch=8, max_wait=0.05)
+
+        results = [None] * len(X)
+
+        def request(k):
+            results[k] = coalescer.evaluate(X[k])
+
+        threads = [threading.Thread(target=request, args=(k,)) for k in range(len(X))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        coalescer.close()
+
+        for k, (_F, _CV) in enumerate(results):
+            self.assertTrue(np.array_equal(F[k], _F))
+            self.assertTrue(np.array_equal(CV[k], _CV))
+
+        stats = coalescer.stats()
+        self.assertEqual(stats["n_rows"], 40)
+        self.assertLessEqual(stats["max_batch_size"], 8)
+        self.assertLess(stats["n_batches"], 40)
+
+    def test_exception(self):
+        problem = FailingProblem()
+        coalescer = BatchCoalescer(problem)
+        future = coalescer.submit(np.random.random(problem.n_var))
+        coalescer.close()
+
+        with self.assertRaises(Exception):
+            future.result()
+
+    def test_cancelled(self):
+        problem = WeldedBeam()
+        coalescer = BatchCoalescer(problem, max_batch=4, max_wait=0.2)
+
+        # the cancelled point is dropped from its batch - all others and all later points are still evaluated
+        X = np.random.random((3, problem.n_var))
+        futures = [coalescer.submit(x) for x in X[:2]]
+        self.assertTrue(futures[0].cancel())
+
+        F, CV = futures[1].result(timeout=5)
+        self.assertTrue(np.array_equal(problem.evaluate(X[1])[0], F))
+
+        F, CV = coalescer.evaluate(X[2], timeout=5)
+        self.assertTrue(np.array_equal(problem.evaluate(X[2])[0], F))
+        self.assertEqual(coalescer.stats()["n_rows"], 2)
+        coalescer.close()
+
+    def test_closed(self):
+        problem = WeldedBeam()
+        coalescer = BatchCoalescer(problem)
+        coalescer.close()
+
+        with self.assertRaises(Exception):
+            coalescer.submit(np.random.random(problem.n_var))
+
+    def test_format_exception(self):
+        problem = WeldedBeam()
+        coalescer = BatchCoalescer(problem, max_batch=4, max_wait=1.0)
+
+        # the batch itself is still evaluated (as a dictionary) but the points can not be split from it
+        def _format_output(out, return_values_of, only_single_value, return_as_dictionary, **kwargs):
+            if not return_as_dictionary:
+                raise Exception("The output can not be formatted.")
+            return Problem._format_output(out, return_values_of, only_single_value, return_as_dictionary, **kwargs)
+
+        # a failure after the evaluation is sent to all points of the batch and the coalescer keeps on working
+        problem._format_output = _format_output
+        futures = [coalescer.submit(x) for x in np.random.random((4, problem.n_var))]
+        for future in futures:
+            self.assertRaisesRegex(Exception, "formatted", lambda: future.result(timeout=5))
+
+        del problem._format_output
+        x = np.random.random(problem.n_var)
+        F, CV = coalescer.evaluate(x, timeout=5)
+        self.assertTrue(np.array_equal(problem.evaluate(x)[0], F))
+        coalescer.close()
+
+
+class FailingProblem(WeldedBeam):
+
+    def _evaluate(self, x, out, *args, **kwargs):
+        raise Exception("The evaluation has failed.")
+
+
+if __name__ == '__main__':
+    unittest.main()
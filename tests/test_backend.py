@@ -0,0 +1,101 @@
+import importlib.util
+import threading
+import unittest
+
+import autograd.numpy
+import numpy as np
+
+from pymop import ZDT1, DTLZ2, G1, Carside
+from pymop.backend import anp, bind_namespace
+
+HAS_JAX = importlib.util.find_spec("jax") is not None
+
+
+class RecordingZDT1(ZDT1):
+
+    def _evaluate(self, x, out, *args, **kwargs):
+        self.namespace = "numpy" if anp.sum is np.sum else "autograd"
+        super()._evaluate(x, out, *args, **kwargs)
+
+
+class BackendTest(unittest.TestCase):
+
+    def test_bind_namespace(self):
+        self.assertIs(anp.sum, autograd.numpy.sum)
+
+        with bind_namespace(np):
+            self.assertIs(anp.sum, np.sum)
+
+            # other threads are not affected by the binding
+            ret = []
+            thread = threading.Thread(target=lambda: ret.append(anp.sum is autograd.numpy.sum))
+            thread.start()
+            thread.join()
+            self.assertTrue(ret[0])
+
+        self.assertIs(anp.sum, autograd.numpy.sum)
+
+        # the problems evaluate with the bound namespace
+        X = np.random.random((10, 30))
+        with bind_namespace(np):
+            F = ZDT1().evaluate(X)
+        self.assertTrue(np.allclose(F, ZDT1().evaluate(X)))
+
+    def test_numpy_without_derivatives(self):
+        problem = RecordingZDT1()
+        X = np.random.random((10, problem.n_var))
+
+        # nothing needs to be traced - also not for the analytic derivatives
+        for x, return_values_of in [(X, ["F"]), (X[0], ["F"]), (X, ["F", "dF"])]:
+            problem.evaluate(x, return_values_of=return_values_of)
+            self.assertEqual(problem.namespace, "numpy")
+
+        problem = RecordingZDT1()
+        problem.evaluation_of = ["F"]
+        F, dF = problem.evaluate(X, return_values_of=["F", "dF"])
+        self.assertEqual(problem.namespace, "autograd")
+        self.assertTrue(np.allclose(dF, ZDT1().evaluate(X, return_values_of=["dF"])))
+
+    @unittest.skipUnless(HAS_JAX, "jax is not installed")
+    def test_jax(self):
+        for problem in [ZDT1(), DTLZ2(), G1(), Carside()]:
+            X = problem.xl + np.random.random((20, problem.n_var)) * (problem.xu - problem.xl)
+            return_values_of = ["F", "dF", "hF"] + (["G", "dG"] if problem.n_constr > 0 else [])
+            problem.evaluation_of = ["F", "G"]
+
+            correct = problem.evaluate(X, return_values_of=return_values_of, return_as_dictionary=True)
+
+            problem.backend = "jax"
+            for _ in range(2):
+                out = problem.evaluate(X, return_values_of=return_values_of, return_as_dictionary=True)
+                for key in return_values_of:
+                    self.assertTrue(np.allclose(correct[key], out[key]))
+
+            # the function is compiled once for the shape and the values requested
+            self.assertEqual(len(problem._compiled), 1)
+            self.assertIsNotNone(list(problem._compiled.values())[0])
+
+    @unittest.skipUnless(HAS_JAX, "jax is not installed")
+    def test_jax_precision(self):
+        import jax
+
+        problem = ZDT1(backend="jax", evaluation_of=["F"])
+        X = np.random.random((10, problem.n_var))
+        F, dF = ZDT1().evaluate(X, return_values_of=["F", "dF"])
+
+        # the input is evaluated in its own precision without enabling float64 for the whole process
+        _F, _dF = problem.evaluate(X, return_values_of=["F", "dF"])
+        self.assertEqual(_dF.dtype, np.float64)
+        self.assertTrue(np.allclose(_F, F) and np.allclose(_dF, dF))
+        self.assertFalse(jax.config.jax_enable_x64)
+
+        _F, _dF = problem.evaluate(X.astype(np.float32), return_values_of=["F", "dF"])
+        self.assertEqual(_dF.dtype, np.float32)
+        self.assertTrue(np.allclose(_dF, dF, rtol=1e-4, atol=1e-4))
+
+        # both precisions have been compiled by jax
+        self.assertEqual(len([fun for fun in problem._compiled.values() if fun is not None]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+
+import numpy as np
+
+from pymop import WeldedBeam, ZDT1
+from pymop.cache import EvaluationCache
+
+
+class CountingWeldedBeam(WeldedBeam):
+
+    def __init__(self):
+        super().__init__()
+        self._n_evals = 0
+
+    def _evaluate(self, x, out, *args, **kwargs):
+        self._n_evals += len(x)
+        super()._evaluate(x, out, *args, **kwargs)
+
+
+class CacheTest(unittest.TestCase):
+
+    def test_hits_and_misses(self):
+        problem = CountingWeldedBeam()
+        cache = EvaluationCache()
+
+        X = np.random.random((10, problem.n_var))
+        F, CV = problem.evaluate(X)
+
+        _F, _CV = problem.evaluate(X, cache=cache)
+        self.assertEqual(problem._n_evals, 20)
+
+        # the first rows are served by the cache and the duplicate rows are evaluated once
+        Y = np.row_stack([X[:5], np.random.random((2, problem.n_var))])
+        Y = np.row_stack([Y, Y[-1:]])
+        __F, __CV = problem.evaluate(Y, cache=cache)
+
+        self.assertEqual(problem._n_evals, 22)
+        self.assertTrue(np.array_equal(F, _F))
+        self.assertTrue(np.array_equal(CV, _CV))
+        self.assertTrue(np.array_equal(F[:5], __F[:5]))
+        self.assertTrue(np.array_equal(__F[-1], __F[-2]))
+        self.assertEqual(cache.stats()["hits"], 5)
+        self.assertEqual(cache.stats()["misses"], 13)
+
+    def test_empty(self):
+        problem = CountingWeldedBeam()
+        cache = EvaluationCache()
+
+        X = np.zeros((0, problem.n_var))
+        F, CV = problem.evaluate(X)
+        _F, _CV = problem.evaluate(X, cache=cache)
+
+        self.assertEqual(_F.shape, F.shape)
+        self.assertEqual(_CV.shape, CV.shape)
+        self.assertEqual(len(cache), 0)
+
+    def test_missing_values_are_evaluated(self):
+        problem = CountingWeldedBeam()
+        cache = EvaluationCache()
+
+        X = np.random.random((10, problem.n_var))
+        problem.evaluate(X, return_values_of=["F"], cache=cache)
+        F, dF = problem.evaluate(X, return_values_of=["F", "dF"], cache=cache)
+        _F, _dF = problem.evaluate(X, return_values_of=["F", "dF"])
+
+        self.assertTrue(np.allclose(dF, _dF))
+        self.assertEqual(cache.stats()["hits"], 0)
+        self.assertEqual(len(cache), 10)
+
+    def test_problem_parameters(self):
+        cache = EvaluationCache()
+        X = np.random.random((10, 30))
+
+        ZDT1(n_var=30).evaluate(X, cache=cache)
+        ZDT1(n_var=30).evaluate(X, cache=cache)
+        self.assertEqual(cache.stats()["hits"], 10)
+
+        problem = ZDT1(n_var=30)
+        problem.xu = 2 * problem.xu
+        problem.evaluate(X, cache=cache)
+        self.assertEqual(cache.stats()["hits"], 10)
+
+    def test_eviction(self):
+        problem = CountingWeldedBeam()
+        cache = EvaluationCache(max_size=5)
+
+        X = np.random.random((10, problem.n_var))
+        problem.evaluate(X, cache=cache)
+        problem.evaluate(X[-5:], cache=cache)
+
+        self.assertEqual(len(cache), 5)
+        self.assertEqual(cache.stats()["evictions"], 5)
+        self.assertEqual(cache.stats()["hits"], 5)
+
+        cache = EvaluationCache(max_bytes=1)
+        problem.evaluate(X, cache=cache)
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -60,6 +60,46 @@ class CorrectnessTest(unittest.TestCase):
             if problem.n_constr > 0:
                 self.assertTrue(anp.all(anp.abs(_CV[:, 0] - CV) < 0.0001))
 
+    def test_problems_float32(self):
+        for entry in problems:
+            name, params = entry
+
+            X, F, CV = load(name)
+
+            if F is None:
+                continue
+
+            problem = globals()[name](*params, dtype=anp.float32)
+            _F, _CV, _dF = problem.evaluate(X, return_values_of=["F", "CV", "dF"])
+
+            self.assertEqual(_F.dtype, anp.float32)
+            self.assertEqual(_CV.dtype, anp.float32)
+            self.assertEqual(_dF.dtype, anp.float32)
+
+            if problem.n_obj == 1:
+                F = F[:, None]
+
+            self.assertTrue(anp.allclose(_F, F, rtol=1e-4, atol=1e-4))
+
+            if problem.n_constr > 0:
+                self.assertTrue(anp.allclose(_CV[:, 0], CV, rtol=1e-4, atol=1e-4))
+
+    def test_intermediates_float32(self):
+        for name, params in problems + [('CTP%s' % k, []) for k in range(1, 9)]:
+            if name not in globals():
+                continue
+
+            problem = globals()[name](*params)
+            X = (problem.xl + anp.random.random((10, problem.n_var)) * (problem.xu - problem.xl)).astype(anp.float32)
+
+            # the evaluation function itself (also its analytic derivatives) does not upcast any value
+            out = dict.fromkeys(["F", "G"] + [key for key in ["dF", "dG"] if key in problem.evaluation_of])
+            problem._evaluate(X, out)
+
+            for key, val in out.items():
+                if val is not None:
+                    self.assertEqual(anp.asarray(val).dtype, anp.float32, "%s %s" % (name, key))
+
 
 if __name__ == '__main__':
     unittest.main()
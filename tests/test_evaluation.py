@@ -0,0 +1,272 @@
+import threading
+import time
+import timeit
+import unittest
+
+import numpy as np
+
+from pymop import ZDT1, WeldedBeam, G1, DTLZ2, Carside
+from pymop.factory import get_problem, STR_TO_PROBLEM
+from pymop.problem import Problem
+
+
+class ChunkedEvaluationTest(unittest.TestCase):
+
+    def test_chunk_size(self):
+        for problem in [ZDT1(), WeldedBeam(), G1(), DTLZ2()]:
+            X = np.random.random((101, problem.n_var))
+            return_values_of = ["F", "G", "CV", "feasible", "dF"]
+
+            correct = problem.evaluate(X, return_values_of=return_values_of, return_as_dictionary=True)
+            chunked = problem.evaluate(X, return_values_of=return_values_of, return_as_dictionary=True, chunk_size=7)
+
+            for key in return_values_of:
+                if correct[key] is None:
+                    self.assertIsNone(chunked[key])
+                else:
+                    self.assertTrue(np.allclose(correct[key], chunked[key]))
+
+    def test_memory_budget(self):
+        problem = WeldedBeam()
+        X = np.random.random((50, problem.n_var))
+
+        F, dF, dG = problem.evaluate(X, return_values_of=["F", "dF", "dG"])
+        _F, _dF, _dG = problem.evaluate(X, return_values_of=["F", "dF", "dG"], memory_budget=1000)
+
+        self.assertTrue(np.allclose(F, _F))
+        self.assertTrue(np.allclose(dF, _dF))
+        self.assertTrue(np.allclose(dG, _dG))
+
+    def test_evaluate_iter(self):
+        problem = WeldedBeam()
+        X = np.random.random((25, problem.n_var))
+
+        F, CV = problem.evaluate(X)
+        blocks = list(problem.evaluate_iter(X, chunk_size=10))
+
+        self.assertEqual([len(_F) for _F, _ in blocks], [10, 10, 5])
+        self.assertTrue(np.allclose(F, np.concatenate([_F for _F, _ in blocks])))
+        self.assertTrue(np.allclose(CV, np.concatenate([_CV for _, _CV in blocks])))
+
+
+class SinglePointTest(unittest.TestCase):
+
+    def test_single_point(self):
+        for problem in [ZDT1(), WeldedBeam(), G1(), DTLZ2(), Carside()]:
+            X = np.random.random((5, problem.n_var))
+
+            for return_values_of in ["auto", ["F"], ["F", "G", "CV", "feasible"], ["CV", "F", "dF"]]:
+                correct = problem.evaluate(X, return_values_of=return_values_of, return_as_dictionary=True)
+
+                for k in range(len(X)):
+                    out = problem.evaluate(X[k], return_values_of=return_values_of, return_as_dictionary=True)
+
+                    for key in out.keys():
+                        if correct[key] is None:
+                            self.assertIsNone(out[key])
+                        else:
+                            self.assertEqual(correct[key][k].shape, out[key].shape)
+                            self.assertTrue(np.allclose(correct[key][k], out[key]))
+
+    def test_overhead(self):
+        problem = TrivialProblem()
+        x = np.random.random(problem.n_var)
+
+        # the overhead of a single point is compared to a numpy call of similar size to not depend on the machine -
+        # the functions are timed alternately and the fastest run is kept to be robust against a busy machine
+        funs = [lambda: np.sum(x), lambda: problem._evaluate(x[None, :], {"F": None}),
+                lambda: problem.evaluate(x), lambda: problem.evaluate(x[None, :])]
+
+        times = [np.inf] * len(funs)
+        for _ in range(20):
+            for k, fun in enumerate(funs):
+                times[k] = min(times[k], timeit.timeit(fun, number=500) / 500)
+        reference, direct, single, batch = times
+
+        self.assertLess(single, 0.7 * batch)
+        self.assertLess(single - direct, 3 * reference, "overhead of %.1fus" % (1e6 * (single - direct)))
+
+    def test_wrong_dimension(self):
+        with self.assertRaises(Exception):
+            ZDT1().evaluate(np.random.random(5))
+
+
+class BufferTest(unittest.TestCase):
+
+    def test_buffers(self):
+        problem = WeldedBeam()
+        X = np.asfortranarray(np.random.random((20, problem.n_var)))
+        F, CV, feasible = problem.evaluate(X, return_values_of=["F", "CV", "feasible"])
+
+        buffers = {"F": np.empty((20, problem.n_obj)), "CV": np.empty((20, 1)), "feasible": np.empty((20, 1), bool)}
+
+        for _ in range(2):
+            _F, _CV, _feasible = problem.evaluate(X, return_values_of=["F", "CV", "feasible"], buffers=buffers)
+            self.assertIs(_F, buffers["F"])
+            self.assertIs(_CV, buffers["CV"])
+            self.assertTrue(np.array_equal(F, buffers["F"]))
+            self.assertTrue(np.array_equal(CV, buffers["CV"]))
+            self.assertTrue(np.array_equal(feasible, buffers["feasible"]))
+
+    def test_single_point(self):
+        problem = ZDT1()
+        x = np.random.random(problem.n_var)
+
+        buf = np.empty(problem.n_obj)
+        F = problem.evaluate(x, return_values_of=["F"], buffers={"F": buf})
+        self.assertIs(F, buf)
+        self.assertTrue(np.array_equal(problem.evaluate(x), buf))
+
+        with self.assertRaises(Exception):
+            problem.evaluate(x, return_values_of=["F"], buffers={"F": np.empty((1, problem.n_obj))})
+
+    def test_written_directly(self):
+        problem = WeldedBeam()
+        X = np.random.random((20, problem.n_var))
+        buffers = {"G": np.empty((20, problem.n_constr)), "CV": np.empty((20, 1)), "feasible": np.empty((20, 1), bool)}
+
+        # the constraint violation and the feasibility are calculated into the buffers
+        out = problem._evaluate_batch(X, ["G", "CV", "feasible"], buffers=buffers)
+        for key in buffers.keys():
+            self.assertIs(out[key], buffers[key])
+
+
+class ParallelEvaluationTest(unittest.TestCase):
+
+    def assert_equal_outputs(self, correct, other):
+        self.assertEqual(set(correct.keys()), set(other.keys()))
+        for key in correct.keys():
+            if correct[key] is None:
+                self.assertIsNone(other[key])
+            else:
+                self.assertTrue(np.array_equal(correct[key], other[key]))
+
+    def check_parallelization(self, parallelization):
+        # the compiled kernels sum up in a different order - the values are compared bit by bit
+        for problem in [Carside(kernels="numpy"), WeldedBeam(kernels="numpy"), G1(kernels="numpy"),
+                        ZDT1(kernels="numpy")]:
+            X = np.random.random((53, problem.n_var))
+            return_values_of = ["F", "G", "CV", "feasible", "dF", "dG"]
+
+            correct = problem.evaluate(X, return_values_of=return_values_of, return_as_dictionary=True)
+
+            try:
+                for _ in range(2):
+                    out = problem.evaluate(X, return_values_of=return_values_of, return_as_dictionary=True,
+                                           parallelization=parallelization, n_workers=3)
+                    self.assert_equal_outputs(correct, out)
+
+                F = problem.evaluate(X[0], return_values_of=["F"], parallelization=parallelization, n_workers=3)
+                self.assertTrue(np.array_equal(correct["F"][0], F))
+            finally:
+                problem.shutdown()
+
+    def check_empty(self, parallelization):
+        for problem in [ZDT1(), G1()]:
+            X = np.zeros((0, problem.n_var))
+            return_values_of = ["F", "G", "CV", "dF"]
+
+            correct = problem.evaluate(X, return_values_of=return_values_of, return_as_dictionary=True)
+
+            try:
+                out = problem.evaluate(X, return_values_of=return_values_of, return_as_dictionary=True,
+                                       parallelization=parallelization, n_workers=2)
+                self.assert_equal_outputs(correct, out)
+                self.assertEqual(out["F"].shape, (0, problem.n_obj))
+            finally:
+                problem.shutdown()
+
+    def test_process(self):
+        self.check_parallelization("process")
+
+    def test_process_empty(self):
+        self.check_empty("process")
+
+    def test_threads(self):
+        self.check_parallelization("threads")
+
+    def test_threads_empty(self):
+        self.check_empty("threads")
+
+    def test_pareto_front_is_calculated_once(self):
+        problem = SlowParetoFront()
+
+        threads = [threading.Thread(target=problem.pareto_front, kwargs={"n_pareto_points": 10}) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(problem.n_calls, 1)
+
+
+class OptionTest(unittest.TestCase):
+
+    def test_passed_to_problem(self):
+        options = dict(dtype=np.float32, jacobian_mode="forward", fd_step=1e-4, jacobian_sparsity="auto",
+                       jacobian_format="dense", hessian_format="packed", backend="autograd", kernels="numpy")
+
+        for name in STR_TO_PROBLEM:
+            if name == "knp":
+                continue
+
+            problem = get_problem(name, **options)
+            for key, value in options.items():
+                self.assertEqual(getattr(problem, key), value, "%s: %s" % (name, key))
+
+            X = np.random.random((5, problem.n_var))
+            self.assertEqual(problem.evaluate(X, return_values_of=["F"]).dtype, np.float32, name)
+
+    def test_validated(self):
+        self.assertRaisesRegex(Exception, "jacobian mode", lambda: ZDT1(jacobian_mode="backward"))
+        self.assertRaisesRegex(Exception, "kernel mode", lambda: G1(kernels="fortran"))
+        self.assertRaisesRegex(Exception, "floating point", lambda: DTLZ2(dtype=np.int32))
+        self.assertRaisesRegex(Exception, "positive", lambda: Carside(fd_step=0))
+
+        problem = WeldedBeam()
+        for key, value in [("hessian_format", "full"), ("jacobian_format", "csr"), ("backend", "torch"),
+                           ("jacobian_sparsity", "yes")]:
+            self.assertRaises(Exception, setattr, problem, key, value)
+
+    def test_changed(self):
+        problem = WeldedBeam()
+        X = np.random.random((20, problem.n_var))
+
+        dF = problem.evaluate(X, return_values_of=["dF"])
+        problem.evaluate(X, return_values_of=["F"], parallelization="process", n_workers=2)
+
+        # the plans and the workers (which keep a copy of the problem) of the previous options are discarded
+        problem.jacobian_mode = "fd-central"
+        self.assertNotIn("_plans", problem.__dict__)
+        self.assertIsNone(problem._pool)
+
+        problem.dtype = np.float32
+        _dF = problem.evaluate(X, return_values_of=["dF"], parallelization="process", n_workers=2)
+        self.assertEqual(_dF.dtype, np.float32)
+        self.assertTrue(np.allclose(dF, _dF, rtol=1e-2, atol=1e-2))
+        problem.shutdown()
+
+
+class TrivialProblem(Problem):
+
+    def __init__(self):
+        super().__init__(n_var=2, n_obj=1, n_constr=0, xl=0, xu=1)
+
+    def _evaluate(self, x, out, *args, **kwargs):
+        out["F"] = x[:, 0]
+
+
+class SlowParetoFront(ZDT1):
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.n_calls = 0
+
+    def _calc_pareto_front(self, *args, **kwargs):
+        self.n_calls += 1
+        time.sleep(0.05)
+        return super()._calc_pareto_front(*args, **kwargs)
+
+
+if __name__ == '__main__':
+    unittest.main()
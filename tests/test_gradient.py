@@ -2,7 +2,9 @@ import unittest
 
 import numpy as np
 
-from pymop import ZDT, ZDT1, ZDT2, ZDT3
+from pymop import Problem, ZDT, ZDT1, ZDT2, ZDT3, ZDT4, Carside, G1
+from pymop.factory import get_problem
+from pymop.gradient import calc_jacobian_mode
 
 
 class GradientTest(unittest.TestCase):
@@ -19,6 +21,189 @@ class GradientTest(unittest.TestCase):
             self.assertTrue(np.all(np.abs(_F - F) < 0.00001))
             self.assertTrue(np.all(np.abs(_dF - dF) < 0.00001))
 
+    def test_jacobian_modes(self):
+        for problem in [ZDT1(n_var=5), Carside(), G1()]:
+            X = problem.xl + np.random.random((20, problem.n_var)) * (problem.xu - problem.xl)
+
+            return_values_of = ["F", "dF"] + (["G", "dG"] if problem.n_constr > 0 else [])
+
+            # the derivatives are calculated by autograd even if the problem provides them
+            problem.evaluation_of = ["F", "G"]
+
+            problem.jacobian_mode = "reverse"
+            reverse = problem.evaluate(X, return_values_of=return_values_of, return_as_dictionary=True)
+
+            problem.jacobian_mode = "forward"
+            forward = problem.evaluate(X, return_values_of=return_values_of, return_as_dictionary=True)
+
+            for key in return_values_of:
+                self.assertTrue(np.allclose(reverse[key], forward[key]))
+
+    def test_analytic_gradients(self):
+        names = ["zdt1", "zdt2", "zdt3", "zdt4", "zdt6", "dtlz1", "dtlz2", "dtlz3", "dtlz4", "dtlz5", "dtlz6", "dtlz7",
+                 "c1dtlz1", "c1dtlz3", "c2dtlz2", "c3dtlz4", "ctp1", "ctp2", "ctp3", "ctp4", "ctp5", "ctp6", "ctp7",
+                 "ctp8", "g01", "g02", "g03", "g04", "g05", "g06", "g07", "g08", "g09", "g10"]
+
+        for name in names:
+            problem = get_problem(name)
+            errors = problem.verify_gradient(n_points=20)
+
+            self.assertEqual(len(errors), 2 if problem.n_constr > 0 else 1)
+            for key, error in errors.items():
+                self.assertLess(error, 1e-8, "%s: %s" % (name, key))
+
+    def test_zdt4_options(self):
+        x = ZDT4().xl + np.random.random((10, 10)) * 5
+
+        # the options are passed on to the problem - without the analytic jacobian it is approximated
+        problem = get_problem("zdt4", evaluation_of=["F"], jacobian_mode="fd-central")
+        self.assertEqual(problem.jacobian_mode, "fd-central")
+        self.assertTrue(np.allclose(problem.evaluate(x, return_values_of=["dF"]),
+                                    ZDT4().evaluate(x, return_values_of=["dF"]), atol=1e-5))
+
+    def test_zdt_evaluation_of(self):
+        problem = ZDT1()
+        problem.evaluation_of.remove("dF")
+
+        # each problem has its own list of the values its evaluation function provides
+        self.assertEqual(ZDT1().evaluation_of, ["F", "dF"])
+        self.assertEqual(ZDT4().evaluation_of, ["F", "dF"])
+
+    def test_many_objectives(self):
+        for name in ["dtlz1", "dtlz2", "dtlz4", "dtlz5", "dtlz6", "dtlz7", "c1dtlz1", "c2dtlz2", "c3dtlz4"]:
+            for n_obj in [2, 10]:
+                problem = get_problem(name, n_var=n_obj + 4, n_obj=n_obj)
+                errors = problem.verify_gradient(n_points=10)
+
+                for key, error in errors.items():
+                    self.assertLess(error, 1e-8, "%s (%s objectives): %s" % (name, n_obj, key))
+
+                # the objectives are the same if evaluated by the kernel (calculated row by row)
+                X = np.random.random((10, problem.n_var))
+                F = problem.evaluate(X, return_values_of=["F", "dF"])[0]
+
+                fun, params = problem._kernel()
+                _F = np.empty((10, n_obj))
+                fun(X, _F, np.empty((10, 0)), *params)
+                self.assertTrue(np.allclose(F, _F), "%s (%s objectives)" % (name, n_obj))
+
+    def test_constraint_violation_derivatives(self):
+        for problem in [get_problem("g06"), Carside(), ZDT1(n_var=5)]:
+            X = problem.xl + np.random.random((20, problem.n_var)) * (problem.xu - problem.xl)
+
+            CV, dCV, hCV = problem.evaluate(X, return_values_of=["CV", "dCV", "hCV"])
+            self.assertEqual(dCV.shape, (20, 1, problem.n_var))
+            self.assertEqual(hCV.shape, (20, 1, problem.n_var, problem.n_var))
+
+            # the constraint violation is the sum of all violated constraints - and so are its derivatives
+            if problem.n_constr > 0:
+                G, dG, hG = problem.evaluate(X, return_values_of=["G", "dG", "hG"])
+                self.assertTrue(np.allclose(dCV[:, 0], np.sum(dG * (G > 0)[:, :, None], axis=1)))
+                self.assertTrue(np.allclose(hCV[:, 0], np.sum(hG * (G > 0)[:, :, None, None], axis=1)))
+
+            h = 1e-6
+            for j in range(problem.n_var):
+                e = h * np.eye(problem.n_var)[j]
+                fd = problem.evaluate(X + e, return_values_of=["CV"]) - problem.evaluate(X - e, return_values_of=["CV"])
+                self.assertTrue(np.allclose(fd[:, 0] / (2 * h), dCV[:, 0, j], rtol=1e-4, atol=1e-4))
+
+            self.assertTrue(np.allclose(problem.evaluate(X[0], return_values_of=["dCV"]), dCV[0]))
+
+    def test_directional_derivatives(self):
+        problem = Carside()
+        X = problem.xl + np.random.random((20, problem.n_var)) * (problem.xu - problem.xl)
+        V = np.random.random((20, problem.n_var))
+
+        dF, dG = problem.evaluate(X, return_values_of=["dF", "dG"])
+        dF_v, dG_v = problem.evaluate(X, return_values_of=["dF_v", "dG_v"], V=V)
+
+        self.assertEqual(dF_v.shape, (20, problem.n_obj))
+        self.assertTrue(np.allclose(dF_v, np.einsum("noi,ni->no", dF, V)))
+        self.assertTrue(np.allclose(dG_v, np.einsum("noi,ni->no", dG, V)))
+
+        # the same direction for all rows and a single point
+        _dF_v = problem.evaluate(X, return_values_of=["dF_v"], V=V[0])
+        self.assertTrue(np.allclose(_dF_v, np.einsum("noi,i->no", dF, V[0])))
+        self.assertTrue(np.allclose(problem.evaluate(X[0], return_values_of=["dF_v"], V=V[0]), _dF_v[0]))
+
+    def test_finite_differences(self):
+        X = np.random.random((50, 3))
+        F, dF = PlainProblem(evaluation_of=["F", "dF"]).evaluate(X, return_values_of=["F", "dF"])
+
+        for mode, tol in [("fd-forward", 1e-5), ("fd-central", 1e-8), ("complex-step", 1e-12)]:
+            problem = PlainProblem(jacobian_mode=mode)
+            _F, _dF = problem.evaluate(X, return_values_of=["F", "dF"])
+
+            self.assertTrue(np.allclose(_F, F))
+            self.assertTrue(np.all(np.abs(_dF - dF) < tol))
+
+    def test_complex_step_not_holomorphic(self):
+        X = np.random.random((20, 3))
+        dF = PlainProblem(evaluation_of=["F", "dF"], absolute=True).evaluate(X, return_values_of=["dF"])
+
+        # the absolute value drops the imaginary part - the central differences are used instead
+        problem = PlainProblem(jacobian_mode="complex-step", absolute=True)
+        with self.assertWarns(UserWarning):
+            _dF = problem.evaluate(X, return_values_of=["dF"])
+        self.assertTrue(np.all(np.abs(_dF - dF) < 1e-8))
+
+    def test_wrt(self):
+        problem = Carside()
+        X = problem.xl + np.random.random((20, problem.n_var)) * (problem.xu - problem.xl)
+        dF, dG, dCV = problem.evaluate(X, return_values_of=["dF", "dG", "dCV"])
+
+        wrt = [4, 0, 2]
+        for mode in ["forward", "reverse", "fd-central"]:
+            problem = Carside(jacobian_mode=mode)
+
+            _dF, _dG, _dCV = problem.evaluate(X, return_values_of=["dF", "dG", "dCV"], wrt=wrt)
+            self.assertEqual(_dF.shape, (20, problem.n_obj, 3))
+            self.assertTrue(np.allclose(_dF, dF[..., wrt], atol=1e-5))
+            self.assertTrue(np.allclose(_dG, dG[..., wrt], atol=1e-5))
+            self.assertTrue(np.allclose(_dCV, dCV[..., wrt], atol=1e-5))
+
+        # the analytic derivatives are restricted as well - also by a boolean mask
+        x = np.random.random(30)
+        self.assertTrue(np.allclose(ZDT1().evaluate(x, return_values_of=["dF"], wrt=np.arange(30) < 5),
+                                    ZDT1().evaluate(x, return_values_of=["dF"])[..., :5]))
+
+        self.assertRaises(Exception, lambda: problem.evaluate(X, return_values_of=["dF"], wrt=[0, 0]))
+        self.assertRaises(Exception, lambda: problem.evaluate(X, return_values_of=["hF"], wrt=[0]))
+
+    def test_jacobian_mode_selection(self):
+        self.assertEqual(calc_jacobian_mode(30, 2), "reverse")
+        self.assertEqual(calc_jacobian_mode(7, 13), "forward")
+
+
+class PlainProblem(Problem):
+
+    def __init__(self, evaluation_of=None, absolute=False, **kwargs):
+        super().__init__(n_var=3, n_obj=2, evaluation_of=["F"] if evaluation_of is None else evaluation_of, **kwargs)
+        self.absolute = absolute
+
+    def _evaluate(self, x, out, *args, **kwargs):
+
+        # values are assigned element-wise which can not be traced by autograd
+        F = np.zeros((x.shape[0], 2), dtype=x.dtype)
+        F[:, 0] = np.sin(x[:, 0]) * x[:, 1]
+        F[:, 1] = np.exp(x[:, 1] * x[:, 2])
+
+        # the absolute value of a negative objective is not holomorphic
+        if self.absolute:
+            F[:, 0] = np.abs(F[:, 0] - 1)
+
+        out["F"] = F
+
+        if "dF" in out and "dF" in self.evaluation_of:
+            dF = np.zeros((x.shape[0], 2, 3))
+            dF[:, 0, 0], dF[:, 0, 1] = np.cos(x[:, 0]) * x[:, 1], np.sin(x[:, 0])
+            dF[:, 1, 1], dF[:, 1, 2] = x[:, 2] * F[:, 1], x[:, 1] * F[:, 1]
+
+            if self.absolute:
+                dF[:, 0] = -dF[:, 0]
+
+            out["dF"] = dF
+
 
 class ZDT1WithGradient(ZDT):
 
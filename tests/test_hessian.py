@@ -4,6 +4,7 @@ import autograd.numpy as anp
 import numpy as np
 
 from pymop import Problem
+from pymop.gradient import unpack_hessian
 
 
 class HessianTest(unittest.TestCase):
@@ -22,6 +23,63 @@ class HessianTest(unittest.TestCase):
 
         self.assertTrue(np.all(np.abs(_F - F) < 0.00001))
         self.assertTrue(np.all(np.abs(_dF - dF) < 0.00001))
+        self.assertTrue(np.all(np.abs(_hF - hF) < 0.00001))
+
+    def test_single_evaluation(self):
+        problem = MyConstrainedProblem()
+        X = np.random.random((10, problem.n_var))
+
+        F, G, dF, dG, hF, hG = problem.evaluate(X, return_values_of=["F", "G", "dF", "dG", "hF", "hG"])
+        self.assertEqual(problem._n_evals, 1)
+
+        self.assertEqual(hF.shape, (10, 1, 2, 2))
+        self.assertEqual(hG.shape, (10, 1, 2, 2))
+        self.assertTrue(np.allclose(hG, 2 * np.eye(2)))
+
+        _dF, _hF = MyProblemWithHessian().evaluate(X, return_values_of=["dF", "hF"])
+        self.assertTrue(np.allclose(dF, _dF))
+        self.assertTrue(np.allclose(hF, _hF))
+
+    def test_hessian_formats(self):
+        X = np.random.random((10, 2))
+        hF, hG = MyConstrainedProblem().evaluate(X, return_values_of=["hF", "hG"])
+
+        packed = MyConstrainedProblem(hessian_format="packed").evaluate(X, return_values_of=["hF", "hG"])
+        diagonal = MyConstrainedProblem(hessian_format="diagonal").evaluate(X, return_values_of=["hF", "hG"])
+
+        for H, P, D in zip([hF, hG], packed, diagonal):
+            self.assertTrue(np.allclose(H, np.swapaxes(H, 2, 3)))
+            self.assertEqual(P.shape, (10, 1, 3))
+            self.assertTrue(np.allclose(unpack_hessian(P, 2), H))
+            self.assertEqual(D.shape, (10, 1, 2))
+            self.assertTrue(np.allclose(D, np.diagonal(H, axis1=2, axis2=3)))
+
+        # the hessian matrices provided by the evaluation function are converted as well
+        _hF = MyProblemWithHessian(hessian_format="packed").evaluate(X, return_values_of=["hF"])
+        self.assertTrue(np.allclose(unpack_hessian(_hF, 2), hF))
+
+    def test_hessian_products(self):
+        problem = MyConstrainedProblem()
+        X, V = np.random.random((10, 2)), np.random.random((10, 2))
+        hF, hG = problem.evaluate(X, return_values_of=["hF", "hG"])
+
+        problem._n_evals = 0
+        hF_v, hG_v, hL, hL_v = problem.evaluate(X, return_values_of=["hF_v", "hG_v", "hL", "hL_v"], V=V,
+                                                weights=[2.0], multipliers=[3.0])
+
+        self.assertTrue(np.allclose(hF_v, np.einsum("noij,nj->noi", hF, V)))
+        self.assertTrue(np.allclose(hG_v, np.einsum("noij,nj->noi", hG, V)))
+
+        # the lagrangian 2 * f + 3 * g
+        self.assertTrue(np.allclose(hL, 2 * hF + 3 * hG))
+        self.assertTrue(np.allclose(hL_v, np.einsum("noij,nj->noi", 2 * hF + 3 * hG, V)))
+
+        # one evaluation for the products and one for the hessian of the lagrangian
+        self.assertEqual(problem._n_evals, 2)
+
+        # the directions are split together with the rows
+        _hL_v = problem.evaluate(X, return_values_of=["hL_v"], V=V, weights=[2.0], multipliers=[3.0], chunk_size=3)
+        self.assertTrue(np.allclose(_hL_v, hL_v))
 
 
 class MyProblem(Problem):
@@ -33,6 +91,19 @@ class MyProblem(Problem):
         out["F"] = 3 * x[:, 0] ** 3 + 10 * x[:, 1] ** 4 + 4 * x[:, 0] ** 2 * x[:, 1] ** 2
 
 
+class MyConstrainedProblem(MyProblem):
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.n_constr = 1
+        self._n_evals = 0
+
+    def _evaluate(self, x, out, *args, **kwargs):
+        self._n_evals += 1
+        super()._evaluate(x, out, *args, **kwargs)
+        out["G"] = x[:, 0] ** 2 + x[:, 1] ** 2 - 1
+
+
 class MyProblemWithHessian(Problem):
 
     def __init__(self, **kwargs):
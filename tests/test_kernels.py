@@ -0,0 +1,118 @@
+import unittest
+
+import numpy as np
+
+from pymop import *
+from pymop.kernels import HAS_NUMBA
+from pymop.problem import has_kernel
+from tests.test_correctness import load, problems
+
+# the problems with resources providing a kernel - and some more without resources
+RESOURCES = [(name, params) for name, params in problems if name in globals() and has_kernel(globals()[name])]
+
+PROBLEMS = RESOURCES + [('CTP1', [2, 3]), ('CTP2', []), ('CTP3', []), ('CTP4', []), ('CTP5', []), ('CTP6', []),
+                        ('CTP7', []), ('CTP8', []), ('DTLZ1', [12, 5]), ('DTLZ2', [14, 5])]
+
+
+def evaluate_kernel(problem, X):
+    fun, params = problem._kernel()
+    F, G = np.full((X.shape[0], problem.n_obj), np.nan), np.full((X.shape[0], problem.n_constr), np.nan)
+
+    # the kernel is evaluated by python itself without being compiled
+    fun(X, F, G, *params)
+
+    CV = np.maximum(G, 0).sum(axis=1)
+    return F, CV
+
+
+class KernelsTest(unittest.TestCase):
+
+    def test_resources(self):
+        for name, params in RESOURCES:
+            X, F, CV = load(name)
+            if F is None:
+                continue
+
+            _F, _CV = evaluate_kernel(globals()[name](*params), X)
+
+            if F.ndim == 1:
+                F = F[:, None]
+
+            self.assertTrue(np.all(np.abs(_F - F) < 0.00001), name)
+
+            if CV is not None:
+                self.assertTrue(np.all(np.abs(_CV - CV) < 0.0001), name)
+
+    def test_random(self):
+        np.random.seed(1)
+
+        for name, params in PROBLEMS:
+            problem = globals()[name](*params, kernels="numpy")
+
+            X = problem.xl + np.random.random((50, problem.n_var)) * (problem.xu - problem.xl)
+            F, CV = problem.evaluate(X, return_values_of=["F", "CV"])
+
+            _F, _CV = evaluate_kernel(problem, X)
+            self.assertTrue(np.allclose(_F, F), name)
+            self.assertTrue(np.allclose(_CV, CV[:, 0]), name)
+
+    @unittest.skipUnless(HAS_NUMBA, "numba is not installed")
+    def test_compiled(self):
+        np.random.seed(1)
+
+        for name, params in PROBLEMS:
+            problem = globals()[name](*params, kernels="numpy")
+
+            X = problem.xl + np.random.random((50, problem.n_var)) * (problem.xu - problem.xl)
+            F, CV = problem.evaluate(X, return_values_of=["F", "CV"])
+
+            # the plans of the previous kernel mode are discarded
+            problem.kernels = "numba"
+            for x in [X, X[0]]:
+                _F, _CV = problem.evaluate(x, return_values_of=["F", "CV"])
+                self.assertTrue(np.allclose(_F, F if x.ndim == 2 else F[0]), name)
+                self.assertTrue(np.allclose(_CV, CV if x.ndim == 2 else CV[0]), name)
+
+    def test_has_kernel(self):
+        self.assertTrue(has_kernel(ZDT1))
+        self.assertTrue(has_kernel(CTP2))
+
+        # the subclasses are evaluated by their own function
+        self.assertFalse(has_kernel(InvertedDTLZ1))
+        self.assertFalse(has_kernel(C1DTLZ1))
+        self.assertFalse(has_kernel(Carside))
+
+        # the kernel is not used if any method the evaluation depends on is overridden
+        self.assertFalse(has_kernel(ShiftedDTLZ2))
+        self.assertTrue(has_kernel(NamedZDT1))
+
+        problem = ShiftedDTLZ2(kernels="numba" if HAS_NUMBA else "auto")
+
+        # the distance of the subclass is constant - the objectives are the ones of DTLZ2 scaled accordingly
+        X = np.random.random((10, problem.n_var))
+        F, _F = problem.evaluate(X, return_values_of=["F"]), DTLZ2().evaluate(X, return_values_of=["F"])
+        self.assertTrue(np.allclose(F, _F * 1.5 / (1 + DTLZ2().g2(X[:, 2:]))[:, None]))
+
+        problem = ZDT1(kernels="numba")
+        if not HAS_NUMBA:
+            self.assertRaises(Exception, lambda: problem.evaluate(np.random.random((5, 30))))
+
+        # the derivatives are never evaluated by a kernel
+        F, dF = problem.evaluate(np.random.random((5, 30)), return_values_of=["F", "dF"])
+        self.assertEqual(dF.shape, (5, 2, 30))
+
+
+class ShiftedDTLZ2(DTLZ2):
+
+    def g2(self, X_M):
+        return anp.full(X_M.shape[0], 0.5)
+
+
+class NamedZDT1(ZDT1):
+
+    def name(self):
+        return "Named"
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from pymop import WeldedBeam, ZDT1
+
+
+class MetricsTest(unittest.TestCase):
+
+    def test_counts_and_phases(self):
+        problem = WeldedBeam()
+        metrics = problem.enable_metrics()
+
+        problem.evaluate(np.random.random((10, problem.n_var)), chunk_size=4)
+        problem.evaluate(np.random.random(problem.n_var), return_values_of=["F", "dF"])
+
+        summary = metrics.summary()
+        self.assertEqual(summary["n_evals"], 2)
+        self.assertEqual(summary["n_rows"], 11)
+        self.assertEqual(summary["n_batches"], 4)
+        self.assertEqual(summary["batch_sizes"]["max"], 4)
+        self.assertEqual(summary["times"]["jacobian"]["n"], 4)
+        self.assertTrue(summary["times"]["jacobian"]["max"] > 0)
+        self.assertEqual(summary["times"]["hessian"]["max"], 0)
+
+        problem.disable_metrics()
+        problem.evaluate(np.random.random((10, problem.n_var)))
+        self.assertIsNone(problem.metrics)
+        self.assertEqual(metrics.n_evals, 2)
+
+    def test_hooks(self):
+        problem = ZDT1()
+        metrics = problem.enable_metrics()
+
+        calls = []
+        metrics.add_hooks(before=lambda problem, X, rvo: calls.append(("before", len(X), list(rvo))),
+                          after=lambda problem, X, out: calls.append(("after", len(X), out["F"].shape)))
+
+        F = problem.evaluate(np.random.random((5, problem.n_var)))
+        self.assertEqual(calls, [("before", 5, ["F"]), ("after", 5, F.shape)])
+
+    def test_trace(self):
+        fname = os.path.join(tempfile.mkdtemp(), "trace.jsonl")
+
+        problem = ZDT1()
+        metrics = problem.enable_metrics(trace=fname)
+        problem.evaluate(np.random.random((5, problem.n_var)))
+        metrics.export(fname)
+        problem.disable_metrics()
+
+        with open(fname) as f:
+            records = [json.loads(line) for line in f]
+
+        self.assertEqual([r["type"] for r in records], ["batch", "evaluation", "summary"])
+        self.assertEqual(records[1]["n_rows"], 5)
+        self.assertEqual(records[2]["n_evals"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
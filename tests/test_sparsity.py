@@ -0,0 +1,101 @@
+import unittest
+
+import numpy as np
+
+from pymop import G1, ZDT1
+from pymop.sparsity import color_columns
+
+
+class CountingG1(G1):
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._n_evals = 0
+
+    def _evaluate(self, x, out, *args, **kwargs):
+        self._n_evals += 1
+        super()._evaluate(x, out, *args, **kwargs)
+
+
+class SparsityTest(unittest.TestCase):
+
+    def test_coloring(self):
+        pattern = np.random.random((20, 30)) < 0.1
+        colors = color_columns(pattern)
+
+        # no output depends on two variables of the same color
+        for c in range(colors.max() + 1):
+            self.assertTrue(np.all(pattern[:, colors == c].sum(axis=1) <= 1))
+
+        self.assertEqual(color_columns(np.eye(10, dtype=bool)).max(), 0)
+
+    def test_colored_jacobian(self):
+        problem = G1()
+        X = problem.xl + np.random.random((50, problem.n_var)) * (problem.xu - problem.xl)
+        F, G, dF, dG = problem.evaluate(X, return_values_of=["F", "G", "dF", "dG"])
+
+        problem = CountingG1(jacobian_sparsity="auto", jacobian_mode="forward")
+
+        _F, _G, _dF, _dG = problem.evaluate(X, return_values_of=["F", "G", "dF", "dG"])
+        self.assertTrue(np.allclose(G, _G))
+        self.assertTrue(np.allclose(dF, _dF))
+        self.assertTrue(np.allclose(dG, _dG))
+
+        # each constraint depends on a few variables only - but the objective on all of them
+        problem._n_evals = 0
+        problem.evaluate(X, return_values_of=["G", "dG"])
+        self.assertTrue(problem._n_evals < problem.n_constr)
+
+    def test_declared_pattern(self):
+        pattern = np.ones((2, 5), dtype=bool)
+        pattern[0, 1:] = False
+        problem = ZDT1(n_var=5, jacobian_sparsity={"F": pattern})
+
+        X = np.random.random((10, problem.n_var))
+        dF = problem.evaluate(X, return_values_of=["dF"])
+        self.assertTrue(np.allclose(dF, ZDT1(n_var=5).evaluate(X, return_values_of=["dF"])))
+
+    def test_sparse_format(self):
+        try:
+            import scipy
+        except ImportError:
+            return
+
+        problem = G1()
+        X = problem.xl + np.random.random((10, problem.n_var)) * (problem.xu - problem.xl)
+        dG = problem.evaluate(X, return_values_of=["dG"])
+
+        for mode in ["auto", "fd-central"]:
+            problem = G1(jacobian_sparsity="auto", jacobian_format="sparse", jacobian_mode=mode)
+
+            _dG = problem.evaluate(X, return_values_of=["dG"])
+            self.assertEqual(_dG.shape, (10 * problem.n_constr, problem.n_var))
+            self.assertTrue(_dG.nnz < np.prod(_dG.shape))
+            self.assertTrue(np.allclose(_dG.toarray().reshape(dG.shape), dG, atol=1e-6))
+
+            self.assertTrue(np.allclose(problem.evaluate(X[0], return_values_of=["dG"]).toarray(), dG[0], atol=1e-6))
+
+            # the derivatives of the constraint violation are reduced from the sparse jacobian as well
+            G, dCV = problem.evaluate(X, return_values_of=["G", "dCV"])
+            self.assertEqual(dCV.shape, (10, problem.n_var))
+            self.assertTrue(np.allclose(dCV.toarray(), np.sum(dG * (G > 0)[:, :, None], axis=1), atol=1e-6))
+
+    def test_colored_subset(self):
+        problem = G1()
+        X = problem.xl + np.random.random((20, problem.n_var)) * (problem.xu - problem.xl)
+        dG = problem.evaluate(X, return_values_of=["dG"])
+
+        problem = CountingG1(jacobian_sparsity="auto", jacobian_mode="forward")
+
+        wrt = [9, 10, 11]
+        problem.evaluate(X, return_values_of=["dG"], wrt=wrt)
+
+        # only the columns of the subset are colored and seeded
+        problem._n_evals = 0
+        _dG = problem.evaluate(X, return_values_of=["dG"], wrt=wrt)
+        self.assertTrue(np.allclose(_dG, dG[..., wrt]))
+        self.assertTrue(problem._n_evals <= len(wrt))
+
+
+if __name__ == '__main__':
+    unittest.main()
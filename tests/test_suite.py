@@ -9,7 +9,14 @@ testmodules = [
     'tests.test_correctness',
     'tests.test_usage',
     'tests.test_gradient',
-    'tests.test_hessian'
+    'tests.test_hessian',
+    'tests.test_evaluation',
+    'tests.test_asynchronous',
+    'tests.test_cache',
+    'tests.test_metrics',
+    'tests.test_sparsity',
+    'tests.test_backend',
+    'tests.test_kernels'
 ]
 
 suite = unittest.TestSuite()